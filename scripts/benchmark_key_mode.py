@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark dedup key mode (text, hash64, hash128).
+
+Mengisi satu database per mode dengan N event, lalu mengukur:
+1. Waktu claim per event saat mengisi (try_claim, batch baru semua) dan
+   saat claim ulang key yang sudah ada (batch duplikat)
+2. Ukuran struktur dedup key (dbstat) dan ukuran file database
+3. Waktu lookup key yang ada (hit) dan tidak ada (miss)
+
+    python scripts/benchmark_key_mode.py --events 200000 --lookups 20000
+    python scripts/benchmark_key_mode.py --events 1000000 --durability fast
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.dedup_store import KEY_MODES, DedupStore
+
+TIMESTAMP = "2025-10-24T10:00:00Z"
+# text: index UNIQUE(topic, event_id); hash64/hash128: tabel WITHOUT ROWID
+KEY_INDEXES = ("sqlite_autoindex_processed_events_1", "event_keys", "colliding_keys")
+
+
+def make_key(i: int):
+    """
+    Key realistis: topic bervariasi, event_id UUID-like acak (tanpa prefix
+    berurutan yang membuat insert dan lookup index text selalu mengenai
+    page yang sama).
+    """
+    digest = hashlib.md5(str(i).encode("ascii")).hexdigest()
+    event_id = "-".join(
+        (digest[:8], digest[8:12], digest[12:16], digest[16:20], digest[20:])
+    )
+    return f"service-{i % 50}.events", event_id
+
+
+async def fill(store: DedupStore, events: int, batch_size: int) -> float:
+    """Isi store, return rata-rata mikrodetik claim per event."""
+    started = time.perf_counter()
+    for start in range(0, events, batch_size):
+        batch = [
+            (*make_key(i), TIMESTAMP, "benchmark", "{}")
+            for i in range(start, min(start + batch_size, events))
+        ]
+        await store.try_claim(batch)
+    return (time.perf_counter() - started) / events * 1e6
+
+
+def index_bytes(conn) -> int:
+    placeholders = ", ".join("?" * len(KEY_INDEXES))
+    row = conn.execute(
+        f"SELECT COALESCE(SUM(pgsize), 0) FROM dbstat WHERE name IN ({placeholders})",
+        KEY_INDEXES,
+    ).fetchone()
+    return row[0]
+
+
+async def time_duplicate_claims(store: DedupStore, keys, batch_size: int) -> float:
+    """Rata-rata mikrodetik per event untuk try_claim batch yang semuanya duplikat."""
+    events = [(topic, event_id, TIMESTAMP, "benchmark", "{}") for topic, event_id in keys]
+    started = time.perf_counter()
+    for start in range(0, len(events), batch_size):
+        await store.try_claim(events[start : start + batch_size])
+    return (time.perf_counter() - started) / len(events) * 1e6
+
+
+def time_lookups(store: DedupStore, keys) -> float:
+    """Rata-rata mikrodetik per lookup langsung ke SQLite (tanpa Bloom/cache)."""
+    conn = store._writer
+    started = time.perf_counter()
+    for topic, event_id in keys:
+        store._key_exists_sync(conn, topic, event_id)
+    return (time.perf_counter() - started) / len(keys) * 1e6
+
+
+async def run(events: int, lookups: int, batch_size: int, durability: str):
+    rng = random.Random(0)
+    hits = [make_key(rng.randrange(events)) for _ in range(lookups)]
+    misses = [make_key(events + rng.randrange(events)) for _ in range(lookups)]
+
+    print(f"{events} events, {lookups} lookups per case, durability {durability}")
+    print(
+        f"{'mode':<8} {'claim us':>9} {'dup us':>7} {'index KiB':>10} "
+        f"{'file KiB':>10} {'hit us':>8} {'miss us':>8}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in KEY_MODES:
+            db_path = os.path.join(tmp, f"{mode}.db")
+            store = DedupStore(
+                db_path=db_path,
+                key_mode=mode,
+                durability=durability,
+                bloom_filter=False,
+                recent_cache_size=0,
+            )
+            claim = await fill(store, events, batch_size)
+            store._writer.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+            size = index_bytes(store._writer) / 1024
+            file_size = os.path.getsize(db_path) / 1024
+            hit = time_lookups(store, hits)
+            miss = time_lookups(store, misses)
+            duplicate = await time_duplicate_claims(store, hits, batch_size)
+            print(
+                f"{mode:<8} {claim:>9.2f} {duplicate:>7.2f} {size:>10.0f} "
+                f"{file_size:>10.0f} {hit:>8.2f} {miss:>8.2f}"
+            )
+            store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dedup key mode")
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument(
+        "--durability",
+        default="balanced",
+        help="Durability profile (fast = page cache 64 MiB + mmap)",
+    )
+    args = parser.parse_args()
+    asyncio.run(run(args.events, args.lookups, args.batch_size, args.durability))
+
+
+if __name__ == "__main__":
+    main()
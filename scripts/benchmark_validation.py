@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark validasi body /publish: model pydantic (VALIDATION_MODE=strict)
+vs validator fast path (VALIDATION_MODE=fast).
+
+Mengukur waktu per event untuk:
+1. Validasi saja (body sudah di-decode)
+2. Decode JSON (json_codec) + validasi, seperti di /publish
+
+    python scripts/benchmark_validation.py --batch-size 1000 --rounds 200
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.event_validation import validate_publish_body
+from src.json_codec import JsonCodec
+from src.models import PublishRequest
+
+
+def make_body(batch_size: int) -> dict:
+    """Batch realistis: payload kecil bersarang, timestamp dengan mikrodetik."""
+    return {
+        "events": [
+            {
+                "topic": f"service-{i % 20}.events",
+                "event_id": f"evt-{i:08d}",
+                "timestamp": f"2025-10-24T10:{i % 60:02d}:00.{i % 1000000:06d}Z",
+                "source": "benchmark",
+                "payload": {"user_id": f"user{i}", "ip": "10.0.0.1", "tags": ["a"]},
+            }
+            for i in range(batch_size)
+        ]
+    }
+
+
+def best_time(fn, rounds: int) -> float:
+    """Waktu terbaik (detik) dari beberapa putaran."""
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run(batch_size: int, rounds: int, codec_name: str):
+    codec = JsonCodec(codec_name)
+    body = make_body(batch_size)
+    raw = codec.encode(body)
+
+    cases = {
+        "validate": {
+            "strict": lambda: PublishRequest.model_validate(body),
+            "fast": lambda: validate_publish_body(body),
+        },
+        f"decode+validate ({codec.name})": {
+            "strict": lambda: PublishRequest.model_validate(codec.loads(raw)),
+            "fast": lambda: validate_publish_body(codec.loads(raw)),
+        },
+    }
+
+    print(f"batch {batch_size} event(s), best of {rounds} rounds")
+    print(f"{'case':<28} {'strict us/ev':>13} {'fast us/ev':>11} {'speedup':>8}")
+    for name, modes in cases.items():
+        strict, fast = (
+            best_time(modes[mode], rounds) / batch_size * 1e6
+            for mode in ("strict", "fast")
+        )
+        print(f"{name:<28} {strict:>13.2f} {fast:>11.2f} {strict / fast:>7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark validasi /publish")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--codec", default="auto")
+    args = parser.parse_args()
+    run(args.batch_size, args.rounds, args.codec)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import hashlib
+import math
+from typing import List
+
+
+class BloomFilter:
+    """
+    Bloom filter dengan ukuran tetap.
+
+    Struktur probabilistik untuk membership test:
+    - Jika key "tidak ada" -> pasti belum pernah ditambahkan
+    - Jika key "ada" -> mungkin sudah ditambahkan (bisa false positive)
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        """
+        Inisialisasi Bloom filter.
+
+        Args:
+            capacity: Jumlah item yang direncanakan
+            error_rate: Target false positive rate saat capacity tercapai
+        """
+        if capacity <= 0:
+            raise ValueError("capacity harus lebih dari 0")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate harus di antara 0 dan 1")
+
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(
+            8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        )
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, digest: bytes):
+        # Double hashing (Kirsch-Mitzenmacher): h1 + i*h2
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add_digest(self, digest: bytes):
+        """
+        Tambahkan key (dalam bentuk digest 16 byte) ke filter.
+
+        Args:
+            digest: Hash 128-bit dari key
+        """
+        bits = self._bits
+        for pos in self._positions(digest):
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def contains_digest(self, digest: bytes) -> bool:
+        """
+        Check apakah key (dalam bentuk digest) mungkin ada di filter.
+
+        Args:
+            digest: Hash 128-bit dari key
+
+        Returns:
+            False jika pasti tidak ada, True jika mungkin ada
+        """
+        bits = self._bits
+        for pos in self._positions(digest):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    @property
+    def is_full(self) -> bool:
+        return self.count >= self.capacity
+
+    @property
+    def false_positive_rate(self) -> float:
+        """Estimasi false positive rate berdasarkan jumlah item saat ini."""
+        fill = 1 - math.exp(-self.num_hashes * self.count / self.num_bits)
+        return fill**self.num_hashes
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._bits)
+
+
+class ScalableBloomFilter:
+    """
+    Scalable Bloom filter (Almeida et al.).
+
+    Saat filter aktif penuh, filter baru dengan capacity lebih besar dan
+    error rate lebih ketat ditambahkan, sehingga false positive rate total
+    tetap terbatas tanpa perlu tahu jumlah item di awal.
+    """
+
+    def __init__(
+        self,
+        initial_capacity: int = 100000,
+        error_rate: float = 0.001,
+        growth_factor: int = 2,
+        tightening_ratio: float = 0.5,
+    ):
+        """
+        Inisialisasi scalable Bloom filter.
+
+        Args:
+            initial_capacity: Capacity filter pertama
+            error_rate: Target false positive rate keseluruhan
+            growth_factor: Faktor pengali capacity untuk filter berikutnya
+            tightening_ratio: Faktor pengali error rate untuk filter berikutnya
+        """
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.growth_factor = growth_factor
+        self.tightening_ratio = tightening_ratio
+        self.filters: List[BloomFilter] = []
+        self._add_filter()
+
+    def _add_filter(self):
+        n = len(self.filters)
+        capacity = self.initial_capacity * (self.growth_factor**n)
+        # Deret geometris error rate agar total tetap <= error_rate
+        error = self.error_rate * (1 - self.tightening_ratio) * (
+            self.tightening_ratio**n
+        )
+        self.filters.append(BloomFilter(capacity, error))
+
+    @staticmethod
+    def digest(key: str) -> bytes:
+        """
+        Hash key menjadi digest 128-bit.
+
+        Args:
+            key: Key yang akan di-hash
+
+        Returns:
+            Digest 16 byte
+        """
+        return hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+
+    def add(self, key: str):
+        """
+        Tambahkan key ke filter.
+
+        Args:
+            key: Key yang ditambahkan
+        """
+        self.add_digest(self.digest(key))
+
+    def add_digest(self, digest: bytes):
+        """
+        Tambahkan key yang sudah di-hash (hasil digest()) ke filter.
+
+        Args:
+            digest: Digest 16 byte dari key
+        """
+        if self._contains_digest(digest):
+            return
+        if self.filters[-1].is_full:
+            self._add_filter()
+        self.filters[-1].add_digest(digest)
+
+    def _contains_digest(self, digest: bytes) -> bool:
+        return any(f.contains_digest(digest) for f in self.filters)
+
+    def __contains__(self, key: str) -> bool:
+        return self._contains_digest(self.digest(key))
+
+    def __len__(self) -> int:
+        return sum(f.count for f in self.filters)
+
+    def clear(self):
+        """Hapus semua item dari filter."""
+        self.filters = []
+        self._add_filter()
+
+    @property
+    def false_positive_rate(self) -> float:
+        """Estimasi false positive rate gabungan semua filter."""
+        prob_negative = 1.0
+        for f in self.filters:
+            prob_negative *= 1 - f.false_positive_rate
+        return 1 - prob_negative
+
+    @property
+    def size_bytes(self) -> int:
+        """Total memori bit array semua filter (byte)."""
+        return sum(f.size_bytes for f in self.filters)
@@ -1,5 +1,5 @@
 import os
-from typing import Optional
+from typing import Optional, Dict, Any
 
 
 class Config:
@@ -13,9 +13,85 @@ class Config:
     # Server configuration
     HOST: str = os.getenv("HOST", "0.0.0.0")
     PORT: int = int(os.getenv("PORT", "8080"))
+    # Jumlah proses uvicorn. Lebih dari 1 = database dipakai bersama beberapa
+    # proses (write dengan BEGIN IMMEDIATE + retry, stats dibaca dari database)
+    WORKERS: int = int(os.getenv("WORKERS", "1"))
 
     # Database configuration
     DB_PATH: str = os.getenv("DB_PATH", "dedup_store.db")
+    # Jumlah file database; processed_events di-partisi berdasarkan hash
+    # (topic, event_id). Ubah nilai ini hanya lewat `python -m src.reshard`
+    DB_PARTITIONS: int = int(os.getenv("DB_PARTITIONS", "1"))
+    DB_READER_POOL_SIZE: int = int(os.getenv("DB_READER_POOL_SIZE", "4"))
+    # Dedup key di index: text (topic, event_id) atau fingerprint hash64/hash128
+    # (index lebih kecil, collision diverifikasi). Database lama dikonversi
+    # otomatis saat startup jika mode berubah
+    DB_KEY_MODE: str = os.getenv("DB_KEY_MODE", "text")
+    DB_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "128"))
+
+    # Retry write saat database terkunci proses lain (exponential backoff)
+    DB_WRITE_RETRIES: int = int(os.getenv("DB_WRITE_RETRIES", "10"))
+    DB_RETRY_BACKOFF: float = float(os.getenv("DB_RETRY_BACKOFF", "0.01"))
+    DB_RETRY_BACKOFF_MAX: float = float(os.getenv("DB_RETRY_BACKOFF_MAX", "1.0"))
+
+    # Durability profile SQLite: trade-off antara throughput dan keamanan data.
+    # - strict: rollback journal + fsync penuh setiap commit (perilaku lama)
+    # - balanced: WAL, reader tidak memblokir writer; fsync hanya saat checkpoint
+    # - fast: WAL tanpa fsync + temp store di memori, page cache besar dan mmap.
+    #   Commit terakhir bisa hilang jika mesin mati mendadak (bukan crash proses)
+    DB_DURABILITY: str = os.getenv("DB_DURABILITY", "balanced").lower()
+    DURABILITY_PROFILES: Dict[str, Dict[str, Any]] = {
+        "strict": {
+            "journal_mode": "DELETE",
+            "synchronous": "FULL",
+        },
+        "balanced": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+        },
+        "fast": {
+            "journal_mode": "WAL",
+            "synchronous": "OFF",
+            "temp_store": "MEMORY",
+            "cache_size": -65536,  # 64 MiB
+            "mmap_size": 268435456,  # 256 MiB
+        },
+    }
+
+    # Bloom filter di depan SELECT fingerprint (setelah compaction) dan
+    # is_duplicate. Claim tanpa compaction tidak melakukan SELECT
+    # (INSERT ... ON CONFLICT di semua key mode), jadi default nonaktif
+    BLOOM_FILTER_ENABLED: bool = (
+        os.getenv("BLOOM_FILTER_ENABLED", "false").lower() == "true"
+    )
+    BLOOM_INITIAL_CAPACITY: int = int(os.getenv("BLOOM_INITIAL_CAPACITY", "100000"))
+    BLOOM_ERROR_RATE: float = float(os.getenv("BLOOM_ERROR_RATE", "0.001"))
+
+    # Cache exact (LRU + TTL) untuk key yang baru diproses; 0 = nonaktif
+    RECENT_CACHE_SIZE: int = int(os.getenv("RECENT_CACHE_SIZE", "100000"))
+    RECENT_CACHE_TTL: float = float(os.getenv("RECENT_CACHE_TTL", "300"))
+
+    # Retention (detik, 0 = selamanya): setelah payload TTL baris di-compact
+    # menjadi fingerprint key; setelah dedup window fingerprint ikut dihapus.
+    # Payload TTL 0 menyimpan baris selamanya, apa pun dedup window-nya.
+    # Override per topic dalam JSON, contoh:
+    # {"audit": {"payload_ttl": 0}, "metrics": {"payload_ttl": 3600}}
+    RETENTION_PAYLOAD_TTL: float = float(os.getenv("RETENTION_PAYLOAD_TTL", "0"))
+    RETENTION_DEDUP_WINDOW: float = float(os.getenv("RETENTION_DEDUP_WINDOW", "0"))
+    RETENTION_TOPIC_POLICIES: str = os.getenv("RETENTION_TOPIC_POLICIES", "{}")
+    RETENTION_INTERVAL: float = float(os.getenv("RETENTION_INTERVAL", "60"))
+    RETENTION_CHUNK_SIZE: int = int(os.getenv("RETENTION_CHUNK_SIZE", "1000"))
+    RETENTION_VACUUM_PAGES: int = int(os.getenv("RETENTION_VACUUM_PAGES", "1000"))
+
+    # Kompresi payload at rest: none, zlib atau lzma (stdlib). Baris lama tetap
+    # terbaca karena format disimpan per baris. Dengan PAYLOAD_DICTIONARY_SAMPLES
+    # > 0 (zlib saja), sample payload per topic dijadikan preset dictionary
+    PAYLOAD_COMPRESSION: str = os.getenv("PAYLOAD_COMPRESSION", "none")
+    PAYLOAD_COMPRESSION_LEVEL: int = int(os.getenv("PAYLOAD_COMPRESSION_LEVEL", "6"))
+    PAYLOAD_MIN_SIZE: int = int(os.getenv("PAYLOAD_MIN_SIZE", "64"))
+    PAYLOAD_DICTIONARY_SAMPLES: int = int(
+        os.getenv("PAYLOAD_DICTIONARY_SAMPLES", "0")
+    )
 
     # Logging configuration
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
@@ -24,9 +100,63 @@ class Config:
     # Queue configuration
     QUEUE_MAX_SIZE: int = int(os.getenv("QUEUE_MAX_SIZE", "10000"))
 
+    # Admission control /publish saat consumer tertinggal:
+    # - block: request menunggu sampai ada ruang di queue (default)
+    # - reject: batch diterima utuh atau ditolak 503 + Retry-After
+    # - partial: terima bagian batch yang muat, sisanya dilaporkan ke client
+    ADMISSION_MODE: str = os.getenv("ADMISSION_MODE", "block").lower()
+    # Watermark sebagai fraksi QUEUE_MAX_SIZE: mulai menolak saat depth
+    # mencapai high, menerima lagi setelah depth turun ke low
+    QUEUE_HIGH_WATERMARK: float = float(os.getenv("QUEUE_HIGH_WATERMARK", "0.9"))
+    QUEUE_LOW_WATERMARK: float = float(os.getenv("QUEUE_LOW_WATERMARK", "0.7"))
+    RETRY_AFTER_MAX: int = int(os.getenv("RETRY_AFTER_MAX", "60"))
+
+    # Ingest log (write-ahead log /publish): event yang sudah di-ack ke client
+    # di-fsync ke segment di direktori ini (group commit) dan di-replay saat
+    # start jika belum tersimpan di dedup store. Kosong = nonaktif
+    INGEST_LOG_DIR: str = os.getenv("INGEST_LOG_DIR", "")
+    INGEST_LOG_SEGMENT_BYTES: int = int(
+        os.getenv("INGEST_LOG_SEGMENT_BYTES", str(64 * 1024 * 1024))
+    )
+    INGEST_LOG_GROUP_COMMIT_DELAY: float = float(
+        os.getenv("INGEST_LOG_GROUP_COMMIT_DELAY", "0.002")
+    )
+    INGEST_LOG_FSYNC: bool = os.getenv("INGEST_LOG_FSYNC", "true").lower() == "true"
+    INGEST_LOG_CHECKPOINT_INTERVAL: float = float(
+        os.getenv("INGEST_LOG_CHECKPOINT_INTERVAL", "1.0")
+    )
+
     # Processing configuration
+    # Jumlah consumer; event di-shard ke consumer berdasarkan hash topic
+    CONSUMER_WORKERS: int = int(os.getenv("CONSUMER_WORKERS", "4"))
     BATCH_PROCESS_SIZE: int = int(os.getenv("BATCH_PROCESS_SIZE", "100"))
     PROCESS_INTERVAL: float = float(os.getenv("PROCESS_INTERVAL", "0.1"))
+    STATS_FLUSH_INTERVAL: float = float(os.getenv("STATS_FLUSH_INTERVAL", "1.0"))
+    # Batch yang gagal disimpan di-retry dengan exponential backoff; jika tetap
+    # gagal, event ditulis ke file NDJSON dead-letter (bisa di-POST ulang ke
+    # /publish) lalu di-ack agar checkpoint ingest log tetap maju
+    PROCESS_RETRIES: int = int(os.getenv("PROCESS_RETRIES", "5"))
+    PROCESS_RETRY_BACKOFF: float = float(os.getenv("PROCESS_RETRY_BACKOFF", "0.1"))
+    PROCESS_RETRY_BACKOFF_MAX: float = float(
+        os.getenv("PROCESS_RETRY_BACKOFF_MAX", "5.0")
+    )
+    DEAD_LETTER_PATH: str = os.getenv("DEAD_LETTER_PATH", "dead_letter.ndjson")
+    # Batas waktu (detik) memproses sisa queue saat shutdown; sisanya tetap di
+    # ingest log (jika aktif) dan di-replay saat start berikutnya
+    SHUTDOWN_DRAIN_TIMEOUT: float = float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", "5.0"))
+
+    # Backend JSON untuk payload, ingest log dan response GET /events:
+    # auto (orjson / msgspec jika ter-install, selain itu stdlib), stdlib,
+    # orjson, msgspec
+    JSON_CODEC: str = os.getenv("JSON_CODEC", "auto")
+    # Validasi event /publish: strict (model pydantic) atau fast (validator
+    # tanpa pydantic dengan aturan yang sama, lihat event_validation.py)
+    VALIDATION_MODE: str = os.getenv("VALIDATION_MODE", "strict").lower()
+
+    # Pagination GET /events
+    EVENTS_PAGE_SIZE: int = int(os.getenv("EVENTS_PAGE_SIZE", "100"))
+    EVENTS_PAGE_MAX: int = int(os.getenv("EVENTS_PAGE_MAX", "1000"))
+    STREAM_CHUNK_SIZE: int = int(os.getenv("STREAM_CHUNK_SIZE", "1000"))
 
     # API configuration
     API_TITLE: str = "Pub-Sub Log Aggregator"
@@ -42,7 +172,9 @@ class Config:
 
     ### Endpoints:
     - `POST /publish`: Publish event (single/batch)
-    - `GET /events`: Get processed events (optional topic filter)
+    - `GET /events`: Get processed events (topic filter, cursor pagination)
+    - `GET /events/stream`: Export processed events as NDJSON
+    - `GET /topics`: Get per-topic breakdown
     - `GET /stats`: Get system statistics
     - `GET /health`: Health check
     """
@@ -75,8 +207,29 @@ class Config:
         print("=" * 50)
         print(f"HOST: {cls.HOST}")
         print(f"PORT: {cls.PORT}")
+        print(f"WORKERS: {cls.WORKERS}")
         print(f"DB_PATH: {cls.DB_PATH}")
+        print(f"DB_PARTITIONS: {cls.DB_PARTITIONS}")
+        print(f"DB_READER_POOL_SIZE: {cls.DB_READER_POOL_SIZE}")
+        print(f"DB_KEY_MODE: {cls.DB_KEY_MODE}")
+        print(f"DB_DURABILITY: {cls.DB_DURABILITY}")
+        print(f"BLOOM_FILTER_ENABLED: {cls.BLOOM_FILTER_ENABLED}")
+        print(f"RECENT_CACHE_SIZE: {cls.RECENT_CACHE_SIZE}")
+        print(f"RETENTION_PAYLOAD_TTL: {cls.RETENTION_PAYLOAD_TTL}")
+        print(f"RETENTION_DEDUP_WINDOW: {cls.RETENTION_DEDUP_WINDOW}")
+        print(f"PAYLOAD_COMPRESSION: {cls.PAYLOAD_COMPRESSION}")
         print(f"LOG_LEVEL: {cls.LOG_LEVEL}")
         print(f"QUEUE_MAX_SIZE: {cls.QUEUE_MAX_SIZE}")
+        print(f"ADMISSION_MODE: {cls.ADMISSION_MODE}")
+        print(f"INGEST_LOG_DIR: {cls.INGEST_LOG_DIR or '(disabled)'}")
+        print(f"CONSUMER_WORKERS: {cls.CONSUMER_WORKERS}")
+        print(f"BATCH_PROCESS_SIZE: {cls.BATCH_PROCESS_SIZE}")
+        print(f"PROCESS_INTERVAL: {cls.PROCESS_INTERVAL}")
+        print(f"STATS_FLUSH_INTERVAL: {cls.STATS_FLUSH_INTERVAL}")
+        print(f"PROCESS_RETRIES: {cls.PROCESS_RETRIES}")
+        print(f"DEAD_LETTER_PATH: {cls.DEAD_LETTER_PATH}")
+        print(f"SHUTDOWN_DRAIN_TIMEOUT: {cls.SHUTDOWN_DRAIN_TIMEOUT}")
+        print(f"JSON_CODEC: {cls.JSON_CODEC}")
+        print(f"VALIDATION_MODE: {cls.VALIDATION_MODE}")
         print(f"ENABLE_METRICS: {cls.ENABLE_METRICS}")
         print("=" * 50)
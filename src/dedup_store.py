@@ -1,13 +1,152 @@
 import sqlite3
 import logging
 import os
+import queue
+import random
+import time
 from datetime import datetime
-from typing import Optional, Set, List, Tuple
+from typing import Optional, Set, List, Tuple, Dict, AsyncIterator, NamedTuple, Union
 import asyncio
-from contextlib import asynccontextmanager
+import base64
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+
+from src.config import Config
+from src.bloom_filter import ScalableBloomFilter
+from src.recent_cache import RecentKeyCache
+from src.migrations import apply_migrations, set_key_mode
+from src.models import format_timestamp_us, parse_timestamp_us
+from src.payload_codec import FORMAT_PLAIN, PayloadCodec
+from src.retention import RetentionPolicy
 
 logger = logging.getLogger(__name__)
 
+# Pragma per-koneksi, di-apply sekali saat koneksi dibuka (bukan per query)
+CONNECTION_PRAGMAS = {
+    "busy_timeout": 5000,
+    # Hanya berlaku untuk database baru (harus sebelum journal_mode dan tabel
+    # pertama); database lama perlu VACUUM sekali agar incremental vacuum aktif
+    "auto_vacuum": "INCREMENTAL",
+}
+
+# SQL hot path sebagai konstanta: sqlite3 meng-cache prepared statement
+# per koneksi berdasarkan teks SQL, jadi teks yang sama = statement di-reuse.
+SQL_IS_DUPLICATE = (
+    "SELECT 1 FROM processed_events WHERE topic = ? AND event_id = ? LIMIT 1"
+)
+# Key mode hash64/hash128: fingerprint adalah PRIMARY KEY event_keys yang
+# menunjuk id baris pemiliknya; hit diverifikasi terhadap topic/event_id
+# baris itu, event lain dengan fingerprint sama ada di colliding_keys
+SQL_SELECT_KEY_OWNER = """
+    SELECT e.topic, e.event_id FROM event_keys k
+    JOIN processed_events e ON e.id = k.row_id
+    WHERE k.key_hash = ?
+"""
+SQL_COLLIDING_KEY_EXISTS = (
+    "SELECT 1 FROM colliding_keys WHERE topic = ? AND event_id = ?"
+)
+# Claim batch (key mode hash): id baris dialokasikan dulu, fingerprint di-claim
+# dengan satu INSERT multi-row, lalu hanya baris yang key-nya didapat di-insert
+SQL_NEXT_EVENT_ID = """
+    SELECT MAX(
+        COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'processed_events'), 0),
+        COALESCE((SELECT MAX(id) FROM processed_events), 0)
+    ) + 1
+"""
+SQL_CLAIM_KEYS = """
+    INSERT INTO event_keys (key_hash, row_id)
+    VALUES {rows}
+    ON CONFLICT(key_hash) DO NOTHING
+    RETURNING row_id
+"""
+SQL_SELECT_KEY_OWNERS = """
+    SELECT k.key_hash, e.topic, e.event_id FROM event_keys k
+    JOIN processed_events e ON e.id = k.row_id
+    WHERE k.key_hash IN ({keys})
+"""
+SQL_CLAIM_COLLIDING_KEYS = """
+    INSERT INTO colliding_keys (topic, event_id, row_id)
+    VALUES {rows}
+    ON CONFLICT(topic, event_id) DO NOTHING
+    RETURNING row_id
+"""
+SQL_INSERT_EVENT_ROW = "(?, ?, ?, ?, ?, ?, ?, ?)"
+SQL_INSERT_EVENTS = """
+    INSERT INTO processed_events
+    (id, topic, event_id, timestamp, source, payload, processed_at, payload_format)
+    VALUES {rows}
+"""
+# Claim batch (key mode text): satu INSERT multi-row per chunk; RETURNING
+# hanya mengembalikan key yang benar-benar di-insert oleh statement ini
+SQL_CLAIM_ROW = "(?, ?, ?, ?, ?, ?, ?)"
+SQL_CLAIM_EVENTS = """
+    INSERT INTO processed_events
+    (topic, event_id, timestamp, source, payload, processed_at, payload_format)
+    VALUES {rows}
+    ON CONFLICT(topic, event_id) DO NOTHING
+    RETURNING topic, event_id
+"""
+# Maksimal 8 parameter per baris, jauh di bawah SQLITE_MAX_VARIABLE_NUMBER (32766)
+CLAIM_CHUNK_ROWS = 500
+# Counter di-flush sebagai delta (x = x + ?), bukan nilai absolut
+SQL_ADD_STATS = """
+    UPDATE stats
+    SET received = received + ?,
+        unique_processed = unique_processed + ?,
+        duplicate_dropped = duplicate_dropped + ?
+    WHERE id = 1
+"""
+# Katalog topic di-maintain inkremental: satu upsert per topic per batch
+SQL_UPSERT_TOPIC = """
+    INSERT INTO topics (topic, event_count, duplicate_count, first_seen, last_seen)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(topic) DO UPDATE SET
+        event_count = event_count + excluded.event_count,
+        duplicate_count = duplicate_count + excluded.duplicate_count,
+        last_seen = CASE WHEN excluded.event_count > 0
+                         THEN excluded.last_seen ELSE last_seen END
+"""
+SQL_FINGERPRINT_EXISTS = "SELECT 1 FROM dedup_keys WHERE fingerprint = ?"
+SQL_INSERT_FINGERPRINT = """
+    INSERT OR IGNORE INTO dedup_keys (fingerprint, expires_at) VALUES (?, ?)
+"""
+SQL_COUNT_TOPICS = "SELECT COUNT(*) FROM topics"
+SQL_SELECT_STATS = (
+    "SELECT received, unique_processed, duplicate_dropped FROM stats WHERE id = 1"
+)
+
+COUNTER_NAMES = ("received", "unique_processed", "duplicate_dropped")
+
+# Dedup key: text = UNIQUE(topic, event_id); hash64/hash128 = fingerprint
+# INTEGER 8 byte / BLOB 16 byte sebagai PRIMARY KEY event_keys (WITHOUT ROWID)
+# dengan verifikasi collision ke baris tersimpan
+KEY_MODES = ("text", "hash64", "hash128")
+
+
+class TimeWindow(NamedTuple):
+    """
+    Filter waktu query events dalam epoch mikrodetik UTC (None = tanpa batas):
+    since/until pada processed_at, time_from/time_to pada timestamp event.
+    """
+
+    since: Optional[int] = None
+    until: Optional[int] = None
+    time_from: Optional[int] = None
+    time_to: Optional[int] = None
+
+    @property
+    def by_event_time(self) -> bool:
+        """
+        True jika filter waktu event dipakai: query diurutkan dan di-keyset
+        berdasarkan (timestamp, id) alih-alih (processed_at, id).
+        """
+        return self.time_from is not None or self.time_to is not None
+
+    @property
+    def key_index(self) -> int:
+        """Index kolom urutan di tuple baris query_events."""
+        return 3 if self.by_event_time else 6
+
 
 class DedupStore:
     """
@@ -17,75 +156,839 @@ class DedupStore:
     Desain ini mendukung:
     - Idempotency: event dengan (topic, event_id) sama hanya diproses sekali
     - Persistence: data tetap ada setelah restart
-    - Thread-safe: menggunakan lock untuk concurrent access
+    - Non-blocking: semua query SQLite berjalan di thread terpisah
+      (satu writer thread + pool reader thread), event loop tidak pernah
+      menunggu disk
+    - Connection reuse: satu writer connection dan pool reader connection
+      yang dibuka sekali saat startup, bukan per operasi
+    - In-memory counters: statistik disimpan di memori dan di-flush ke tabel
+      stats secara periodik, per batch, dan saat close()
+    - Multi-process (shared=True): beberapa proses memakai file database yang
+      sama; write memakai BEGIN IMMEDIATE + retry/backoff, dan statistik
+      dibaca dari database agar teragregasi antar proses
+    - Retention: baris yang melewati payload TTL di-compact menjadi fingerprint
+      key di tabel dedup_keys, yang tetap dipakai untuk dedup selama window
     """
 
-    def __init__(self, db_path: str = "dedup_store.db"):
+    def __init__(
+        self,
+        db_path: str = "dedup_store.db",
+        reader_pool_size: int = 4,
+        statement_cache_size: int = 128,
+        durability: str = "balanced",
+        bloom_filter: bool = False,
+        bloom_initial_capacity: int = 100000,
+        bloom_error_rate: float = 0.001,
+        recent_cache_size: int = 100000,
+        recent_cache_ttl: Optional[float] = 300.0,
+        shared: bool = False,
+        write_retries: int = 10,
+        retry_backoff: float = 0.01,
+        retry_backoff_max: float = 1.0,
+        retention: Optional[RetentionPolicy] = None,
+        retention_chunk_size: int = 1000,
+        vacuum_pages: int = 1000,
+        key_mode: str = "text",
+        payload_compression: str = "none",
+        payload_compression_level: int = 6,
+        payload_min_size: int = 64,
+        payload_dictionary_samples: int = 0,
+    ):
         """
         Inisialisasi dedup store.
 
         Args:
             db_path: Path ke file database SQLite
+            reader_pool_size: Jumlah reader connection di pool
+            statement_cache_size: Ukuran cache prepared statement per koneksi
+            durability: Nama durability profile (lihat Config.DURABILITY_PROFILES)
+            bloom_filter: Aktifkan Bloom filter di depan lookup key
+            bloom_initial_capacity: Capacity awal scalable Bloom filter
+            bloom_error_rate: Target false positive rate Bloom filter
+            recent_cache_size: Capacity cache key yang baru diproses (0 = nonaktif)
+            recent_cache_ttl: Umur maksimal key di cache dalam detik
+            shared: True jika database dipakai bersama beberapa proses
+            write_retries: Jumlah retry write saat database terkunci
+            retry_backoff: Backoff awal (detik) antar retry, dikali 2 tiap retry
+            retry_backoff_max: Backoff maksimal (detik)
+            retention: Retention policy (None = simpan selamanya)
+            retention_chunk_size: Jumlah baris per transaksi compaction
+            vacuum_pages: Jumlah page per langkah incremental vacuum
+            key_mode: Dedup key mode (lihat KEY_MODES); database yang sudah
+                ada dikonversi saat dibuka jika mode-nya berbeda
+            payload_compression: Codec payload baru (lihat payload_codec.CODECS);
+                baris lama tetap terbaca apa pun codec-nya
+            payload_compression_level: Level kompresi
+            payload_min_size: Payload lebih pendek dari ini disimpan plain
+            payload_dictionary_samples: Sample per topic sebelum dictionary
+                zlib dibuat (0 = tanpa dictionary)
+
+        Raises:
+            ValueError: Jika durability profile, key mode atau codec tidak dikenal
         """
+        if key_mode not in KEY_MODES:
+            raise ValueError(
+                f"Unknown key mode: {key_mode} (available: {', '.join(KEY_MODES)})"
+            )
+        if durability not in Config.DURABILITY_PROFILES:
+            raise ValueError(
+                f"Unknown durability profile: {durability} "
+                f"(available: {', '.join(Config.DURABILITY_PROFILES)})"
+            )
+
         self.db_path = db_path
-        self.lock = asyncio.Lock()
+        self.durability = durability
+        self.shared = shared
+        self.write_retries = write_retries
+        self.retry_backoff = retry_backoff
+        self.retry_backoff_max = retry_backoff_max
+        self.write_retry_count = 0
+        self.key_mode = key_mode
+        self.key_collisions = 0
+        self.codec = PayloadCodec(
+            payload_compression,
+            level=payload_compression_level,
+            min_size=payload_min_size,
+            dictionary_samples=payload_dictionary_samples,
+        )
+
+        self.retention = retention
+        self.retention_chunk_size = retention_chunk_size
+        self.vacuum_pages = vacuum_pages
+        self.compacted_rows = 0
+        self.expired_keys = 0
+        self.vacuumed_pages = 0
+        self.last_compaction: Optional[str] = None
+        # True jika dedup_keys berisi fingerprint: lookup dedup perlu cek tabel itu
+        self._compacted = False
+        self.journal_mode: Optional[str] = None
+        self.schema_version = 0
+        self.reader_pool_size = max(1, reader_pool_size)
+        self.statement_cache_size = statement_cache_size
+
+        self._writer: Optional[sqlite3.Connection] = None
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._reader_conns: List[sqlite3.Connection] = []
+
+        # Writer thread tunggal = command queue yang men-serialisasi semua write;
+        # reader thread sebanyak reader connection di pool
+        self._write_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="dedup-writer"
+        )
+        self._read_executor = ThreadPoolExecutor(
+            max_workers=self.reader_pool_size, thread_name_prefix="dedup-reader"
+        )
+
+        # Bloom filter: event yang pasti baru tidak perlu SELECT ke SQLite
+        self._bloom: Optional[ScalableBloomFilter] = None
+        self.bloom_skipped_lookups = 0
+        self.bloom_false_positives = 0
+        # Dengan beberapa proses, filter lokal tidak melihat insert proses lain,
+        # jadi jawaban "pasti baru" tidak lagi valid
+        if bloom_filter and not shared:
+            self._bloom = ScalableBloomFilter(
+                initial_capacity=bloom_initial_capacity, error_rate=bloom_error_rate
+            )
+
+        # Cache exact key yang baru diproses: retry cepat ditolak tanpa disk
+        self._recent: Optional[RecentKeyCache] = None
+        if recent_cache_size > 0:
+            self._recent = RecentKeyCache(
+                capacity=recent_cache_size, ttl=recent_cache_ttl
+            )
+
+        # Counter in-memory (hanya diubah dari thread event loop).
+        # _flushed = nilai yang sudah tertulis ke tabel stats oleh proses ini
+        self._counters: Dict[str, int] = dict.fromkeys(COUNTER_NAMES, 0)
+        self._flushed: Dict[str, int] = dict.fromkeys(COUNTER_NAMES, 0)
+
+        # Nama topic yang sudah ada di katalog (untuk /stats O(1))
+        self._topics: Set[str] = set()
+
         self._init_db()
-        logger.info(f"DedupStore initialized with database: {db_path}")
+        self._load_stats()
+        self._load_topics()
+        self.codec.load_dictionaries(self._writer)
+        self._rebuild_bloom()
+        self._open_readers()
+        logger.info(
+            f"DedupStore initialized with database: {db_path} "
+            f"(readers={self.reader_pool_size}, durability={durability}, "
+            f"journal_mode={self.journal_mode}, shared={shared}, "
+            f"payload_compression={payload_compression})"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Buka koneksi SQLite baru dengan pragma yang sudah dikonfigurasi.
+
+        Returns:
+            Koneksi SQLite siap pakai
+        """
+        # IMMEDIATE: transaksi implisit memakai BEGIN IMMEDIATE, jadi write lock
+        # diambil di awal transaksi (tidak ada upgrade read -> write yang gagal
+        # dengan SQLITE_BUSY saat beberapa proses menulis bersamaan)
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            cached_statements=self.statement_cache_size,
+            isolation_level="IMMEDIATE",
+        )
+        pragmas = {**CONNECTION_PRAGMAS, **Config.DURABILITY_PROFILES[self.durability]}
+        for name, value in pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _open_readers(self):
+        """
+        Buka pool reader connection.
+        Dipanggil setelah schema dibuat agar schema hanya di-parse sekali.
+        """
+        for _ in range(self.reader_pool_size):
+            conn = self._connect()
+            self._reader_conns.append(conn)
+            self._readers.put(conn)
+
+    @contextmanager
+    def _reader(self):
+        """
+        Pinjam reader connection dari pool dan kembalikan setelah selesai.
+
+        Yields:
+            Reader connection
+        """
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
 
     def _init_db(self):
         """
         Inisialisasi database dan tabel.
-        Membuat tabel jika belum ada.
+        Schema dibuat/di-upgrade lewat migration berversi (src/migrations.py).
         """
         # Create directory if it doesn't exist
         db_dir = os.path.dirname(self.db_path)
         if db_dir and not os.path.exists(db_dir):
             os.makedirs(db_dir, exist_ok=True)
             logger.info(f"Created database directory: {db_dir}")
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS processed_events (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                topic TEXT NOT NULL,
-                event_id TEXT NOT NULL,
-                timestamp TEXT NOT NULL,
-                source TEXT NOT NULL,
-                payload TEXT NOT NULL,
-                processed_at TEXT NOT NULL,
-                UNIQUE(topic, event_id)
+
+        self._writer = self._connect()
+        conn = self._writer
+
+        # journal_mode bersifat persistent di file database; baca nilai efektifnya
+        self.journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+
+        self.schema_version = apply_migrations(conn)
+        set_key_mode(conn, self.key_mode, self.key_hash)
+        self._compacted = (
+            conn.execute("SELECT 1 FROM dedup_keys LIMIT 1").fetchone() is not None
+        )
+        logger.info(
+            f"Database tables initialized successfully "
+            f"(schema version {self.schema_version})"
+        )
+
+    def _load_stats(self):
+        """
+        Load counter dari tabel stats saat startup.
+
+        Crash recovery: counter yang belum sempat di-flush sebelum crash
+        direkonsiliasi dari processed_events (unique_processed tidak mungkin
+        lebih kecil dari jumlah baris, dan received tidak mungkin lebih kecil
+        dari unique_processed + duplicate_dropped).
+        """
+        conn = self._writer
+        received, unique_processed, duplicate_dropped = conn.execute(
+            SQL_SELECT_STATS
+        ).fetchone()
+        stored_rows = conn.execute(
+            "SELECT COUNT(*) FROM processed_events"
+        ).fetchone()[0]
+
+        reconciled_unique = max(unique_processed, stored_rows)
+        reconciled_received = max(received, reconciled_unique + duplicate_dropped)
+        if (reconciled_unique, reconciled_received) != (unique_processed, received):
+            logger.warning(
+                f"Stats reconciled after unclean shutdown: "
+                f"unique_processed {unique_processed} -> {reconciled_unique}, "
+                f"received {received} -> {reconciled_received}"
             )
-        """)
-
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_topic_event
-            ON processed_events(topic, event_id)
-        """)
-
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_topic
-            ON processed_events(topic)
-        """)
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS stats (
-                id INTEGER PRIMARY KEY CHECK (id = 1),
-                received INTEGER DEFAULT 0,
-                unique_processed INTEGER DEFAULT 0,
-                duplicate_dropped INTEGER DEFAULT 0
+            conn.execute(
+                SQL_ADD_STATS,
+                (
+                    reconciled_received - received,
+                    reconciled_unique - unique_processed,
+                    0,
+                ),
             )
-        """)
+            conn.commit()
 
-        cursor.execute("""
-            INSERT OR IGNORE INTO stats (id, received, unique_processed, duplicate_dropped)
-            VALUES (1, 0, 0, 0)
-        """)
+        self._counters = {
+            "received": reconciled_received,
+            "unique_processed": reconciled_unique,
+            "duplicate_dropped": duplicate_dropped,
+        }
+        self._flushed = dict(self._counters)
 
-        conn.commit()
-        conn.close()
-        logger.info("Database tables initialized successfully")
+    def _load_topics(self):
+        """
+        Load nama topic dari katalog topics saat startup.
+        """
+        self._topics = {
+            row[0] for row in self._writer.execute("SELECT topic FROM topics")
+        }
+
+    def _update_topics_sync(
+        self,
+        cursor: sqlite3.Cursor,
+        per_topic: Dict[str, List[int]],
+        processed_at: int,
+    ):
+        """
+        Update katalog topic untuk satu batch (dipanggil di dalam transaksi).
+
+        Args:
+            cursor: Cursor writer connection
+            per_topic: Mapping topic -> [jumlah event baru, jumlah duplikat]
+            processed_at: Waktu proses batch (epoch mikrodetik)
+        """
+        cursor.executemany(
+            SQL_UPSERT_TOPIC,
+            [
+                (topic, new, dup, processed_at, processed_at)
+                for topic, (new, dup) in per_topic.items()
+            ],
+        )
+
+    def _take_counter_deltas(self) -> Dict[str, int]:
+        """
+        Ambil selisih counter yang belum di-flush dan tandai sebagai flushed.
+
+        Returns:
+            Dictionary delta per counter
+        """
+        deltas = {}
+        for name in COUNTER_NAMES:
+            deltas[name] = self._counters[name] - self._flushed[name]
+            self._flushed[name] = self._counters[name]
+        return deltas
+
+    def _restore_counter_deltas(self, deltas: Dict[str, int]):
+        """
+        Kembalikan delta yang gagal di-flush agar ikut flush berikutnya.
+
+        Args:
+            deltas: Delta dari _take_counter_deltas
+        """
+        for name, delta in deltas.items():
+            self._flushed[name] -= delta
+
+    def _flush_stats_sync(self, deltas: Dict[str, int]):
+        self._writer.execute(
+            SQL_ADD_STATS,
+            (
+                deltas["received"],
+                deltas["unique_processed"],
+                deltas["duplicate_dropped"],
+            ),
+        )
+        self._writer.commit()
+
+    async def flush_stats(self):
+        """
+        Flush counter in-memory ke tabel stats (hanya delta yang belum tertulis).
+        """
+        deltas = self._take_counter_deltas()
+        if not any(deltas.values()):
+            return
+
+        try:
+            await self._run_write(self._flush_stats_sync, deltas)
+        except Exception:
+            self._restore_counter_deltas(deltas)
+            raise
+
+    async def checkpoint(self):
+        """
+        Pastikan semua transaksi yang sudah commit durable di disk, apa pun
+        durability profile-nya: WAL di-checkpoint (PASSIVE, tidak menunggu
+        reader) lalu file database dan WAL di-fsync. Dipakai sebelum ingest
+        log membuang record yang sudah diproses.
+        """
+        await self._run_write(self._checkpoint_sync)
+
+    def _checkpoint_sync(self):
+        if self.journal_mode == "wal":
+            self._writer.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+        for path in (self.db_path, self.db_path + "-wal"):
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except FileNotFoundError:
+                continue
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    @staticmethod
+    def _bloom_key(topic: str, event_id: str) -> str:
+        return f"{topic}\x00{event_id}"
+
+    @classmethod
+    def fingerprint(cls, topic: str, event_id: str) -> bytes:
+        """
+        Fingerprint 128-bit key (topic, event_id) untuk tabel dedup_keys.
+        Sama dengan digest Bloom filter, jadi filter bisa di-rebuild darinya.
+
+        Args:
+            topic: Topic event
+            event_id: ID event
+
+        Returns:
+            Digest 16 byte
+        """
+        return ScalableBloomFilter.digest(cls._bloom_key(topic, event_id))
+
+    def key_hash(self, topic: str, event_id: str):
+        """
+        Nilai kolom key_hash untuk key mode hash64/hash128.
+
+        Args:
+            topic: Topic event
+            event_id: ID event
+
+        Returns:
+            int signed 64-bit (hash64) atau digest 16 byte (hash128)
+        """
+        digest = self.fingerprint(topic, event_id)
+        if self.key_mode == "hash128":
+            return digest
+        return int.from_bytes(digest[:8], "big", signed=True)
+
+    def _key_exists_sync(self, conn, topic: str, event_id: str) -> bool:
+        """
+        Check apakah key (topic, event_id) ada di processed_events.
+
+        Mode hash: lookup fingerprint di event_keys (PRIMARY KEY), lalu
+        topic/event_id baris pemiliknya diverifikasi. Jika pemiliknya event
+        lain (collision), key dicari exact di colliding_keys.
+        """
+        if self.key_mode == "text":
+            row = conn.execute(SQL_IS_DUPLICATE, (topic, event_id)).fetchone()
+            return row is not None
+
+        owner = conn.execute(
+            SQL_SELECT_KEY_OWNER, (self.key_hash(topic, event_id),)
+        ).fetchone()
+        if owner is None:
+            return False
+        if owner == (topic, event_id):
+            return True
+        self._log_key_collision(topic, event_id)
+        row = conn.execute(SQL_COLLIDING_KEY_EXISTS, (topic, event_id)).fetchone()
+        return row is not None
+
+    def _log_key_collision(self, topic: str, event_id: str):
+        self.key_collisions += 1
+        logger.warning(
+            f"Key hash collision: topic={topic}, event_id={event_id} "
+            f"shares its fingerprint with another event"
+        )
+
+    def _claim_events_sync(
+        self,
+        cursor: sqlite3.Cursor,
+        events: List[Tuple[str, str, str, str, str]],
+        processed_at: int,
+    ) -> List[bool]:
+        """
+        Insert event yang key-nya belum ada, di dalam transaksi writer.
+
+        Satu INSERT ... ON CONFLICT DO NOTHING RETURNING per chunk
+        CLAIM_CHUNK_ROWS baris, tanpa SELECT terpisah dan tanpa
+        IntegrityError: key mode text langsung ke processed_events, mode hash
+        ke event_keys (_claim_hashed_chunk_sync). Key yang sudah di-compact
+        tapi masih dalam dedup window tidak di-insert; SELECT fingerprint
+        dilewati untuk key yang menurut Bloom filter pasti baru.
+
+        Args:
+            cursor: Cursor writer
+            events: List tuple (topic, event_id, timestamp, source, payload);
+                timestamp epoch mikrodetik UTC (string ISO8601 dikonversi)
+            processed_at: Waktu proses (epoch mikrodetik UTC)
+
+        Returns:
+            List boolean sesuai urutan input: True jika event di-insert
+        """
+        # sqlite3 hanya memulai transaksi implisit sebelum DML, bukan SELECT.
+        # Write lock diambil sebelum cek fingerprint dan alokasi id (mode
+        # hash), agar dua proses tidak sama-sama melihat key belum ada lalu
+        # sama-sama meng-insert-nya
+        if not cursor.connection.in_transaction:
+            cursor.execute("BEGIN IMMEDIATE")
+
+        if not self._check_fingerprints:
+            return self._insert_events_sync(cursor, events, processed_at)
+
+        looked_up = [
+            not self._bloom_rules_out(topic, event_id) for topic, event_id, *_ in events
+        ]
+        compacted = [
+            lookup and self._fingerprint_exists(cursor, topic, event_id)
+            for (topic, event_id, *_), lookup in zip(events, looked_up)
+        ]
+        claimed = iter(
+            self._insert_events_sync(
+                cursor,
+                [event for event, skip in zip(events, compacted) if not skip],
+                processed_at,
+            )
+        )
+        results = [False if skip else next(claimed) for skip in compacted]
+        if self._bloom is not None:
+            # Filter bilang "mungkin ada" tapi key ternyata baru
+            self.bloom_false_positives += sum(
+                lookup and is_new for lookup, is_new in zip(looked_up, results)
+            )
+        return results
+
+    def _insert_events_sync(
+        self,
+        cursor: sqlite3.Cursor,
+        events: List[Tuple[str, str, str, str, str]],
+        processed_at: int,
+    ) -> List[bool]:
+        results = []
+        if self.key_mode != "text":
+            next_id = cursor.execute(SQL_NEXT_EVENT_ID).fetchone()[0]
+            for start in range(0, len(events), CLAIM_CHUNK_ROWS):
+                chunk = events[start : start + CLAIM_CHUNK_ROWS]
+                results.extend(
+                    self._claim_hashed_chunk_sync(
+                        cursor, chunk, range(next_id, next_id + len(chunk)), processed_at
+                    )
+                )
+                next_id += len(chunk)
+        else:
+            for start in range(0, len(events), CLAIM_CHUNK_ROWS):
+                chunk = events[start : start + CLAIM_CHUNK_ROWS]
+                params: list = []
+                encoded = []
+                for topic, event_id, timestamp, source, payload in chunk:
+                    value, payload_format = self.codec.encode(topic, payload)
+                    encoded.append(value)
+                    if type(timestamp) is not int:
+                        timestamp = parse_timestamp_us(timestamp)
+                    params.extend(
+                        (topic, event_id, timestamp, source, value)
+                        + (processed_at, payload_format)
+                    )
+                sql = SQL_CLAIM_EVENTS.format(
+                    rows=", ".join([SQL_CLAIM_ROW] * len(chunk))
+                )
+                inserted = set(cursor.execute(sql, params).fetchall())
+                # Key ganda di dalam batch: hanya kemunculan pertama yang baru
+                for (topic, event_id, *_, payload), value in zip(chunk, encoded):
+                    is_new = (topic, event_id) in inserted
+                    results.append(is_new)
+                    inserted.discard((topic, event_id))
+                    if not is_new:
+                        # Statistik kompresi hanya menghitung baris tersimpan
+                        self.codec.discard(payload, value)
+
+        if self._bloom is not None:
+            for (topic, event_id, *_), is_new in zip(events, results):
+                if is_new:
+                    self._bloom.add(self._bloom_key(topic, event_id))
+        return results
+
+    def _claim_hashed_chunk_sync(
+        self,
+        cursor: sqlite3.Cursor,
+        chunk: List[Tuple[str, str, str, str, str]],
+        ids: range,
+        processed_at: int,
+    ) -> List[bool]:
+        """
+        Claim satu chunk event (key mode hash).
+
+        Setiap event mendapat calon id baris. Fingerprint di-claim dengan satu
+        INSERT INTO event_keys ... ON CONFLICT DO NOTHING RETURNING row_id;
+        hanya event yang fingerprint-nya didapat yang di-insert ke
+        processed_events. Fingerprint yang sudah dimiliki diverifikasi
+        terhadap topic/event_id baris pemiliknya: jika sama event itu
+        duplikat, jika beda (collision) key exact-nya di-claim di
+        colliding_keys. id yang tidak terpakai menjadi celah, seperti id
+        AUTOINCREMENT transaksi yang di-rollback.
+
+        Args:
+            cursor: Cursor writer (di dalam transaksi)
+            chunk: Event (topic, event_id, timestamp, source, payload)
+            ids: Calon id baris, satu per event
+            processed_at: Waktu proses (epoch mikrodetik UTC)
+
+        Returns:
+            List boolean sesuai urutan chunk: True jika event di-insert
+        """
+        keys = [self.key_hash(topic, event_id) for topic, event_id, *_ in chunk]
+        params: list = []
+        for key, row_id in zip(keys, ids):
+            params.extend((key, row_id))
+        sql = SQL_CLAIM_KEYS.format(rows=", ".join(["(?, ?)"] * len(chunk)))
+        claimed = {row_id for (row_id,) in cursor.execute(sql, params)}
+        results = [row_id in claimed for row_id in ids]
+        # Baris pemilik dari chunk ini di-insert dulu agar bisa diverifikasi
+        self._insert_rows_sync(
+            cursor,
+            [(row_id, event) for row_id, event in zip(ids, chunk) if row_id in claimed],
+            processed_at,
+        )
+
+        conflicted = [i for i, is_new in enumerate(results) if not is_new]
+        if not conflicted:
+            return results
+        owner_keys = list({keys[i] for i in conflicted})
+        owners = {
+            key: (topic, event_id)
+            for key, topic, event_id in cursor.execute(
+                SQL_SELECT_KEY_OWNERS.format(keys=", ".join("?" * len(owner_keys))),
+                owner_keys,
+            )
+        }
+        colliding = []
+        for i in conflicted:
+            topic, event_id = chunk[i][0], chunk[i][1]
+            if owners.get(keys[i]) != (topic, event_id):
+                self._log_key_collision(topic, event_id)
+                colliding.append(i)
+        if not colliding:
+            return results
+
+        params = []
+        for i in colliding:
+            params.extend((chunk[i][0], chunk[i][1], ids[i]))
+        sql = SQL_CLAIM_COLLIDING_KEYS.format(
+            rows=", ".join(["(?, ?, ?)"] * len(colliding))
+        )
+        claimed = {row_id for (row_id,) in cursor.execute(sql, params)}
+        self._insert_rows_sync(
+            cursor,
+            [(ids[i], chunk[i]) for i in colliding if ids[i] in claimed],
+            processed_at,
+        )
+        for i in colliding:
+            results[i] = ids[i] in claimed
+        return results
+
+    def _insert_rows_sync(
+        self,
+        cursor: sqlite3.Cursor,
+        rows: List[Tuple[int, Tuple[str, str, str, str, str]]],
+        processed_at: int,
+    ):
+        """
+        Insert baris processed_events dengan id yang sudah dialokasikan
+        (key mode hash; key-nya sudah di-claim).
+        """
+        if not rows:
+            return
+        params: list = []
+        for row_id, (topic, event_id, timestamp, source, payload) in rows:
+            payload, payload_format = self.codec.encode(topic, payload)
+            if type(timestamp) is not int:
+                timestamp = parse_timestamp_us(timestamp)
+            params.extend(
+                (row_id, topic, event_id, timestamp, source, payload)
+                + (processed_at, payload_format)
+            )
+        cursor.execute(
+            SQL_INSERT_EVENTS.format(rows=", ".join([SQL_INSERT_EVENT_ROW] * len(rows))),
+            params,
+        )
+
+    def _train_codec_sync(
+        self, events: List[Tuple[str, str, str, str, str]], results: List[bool]
+    ):
+        """
+        Beri payload event yang baru disimpan ke codec sebagai sample, setelah
+        transaksi batch di-commit (dictionary baru di-commit terpisah, lihat
+        PayloadCodec.train) dan berlaku untuk batch berikutnya. Duplikat tidak
+        ikut menjadi sample.
+
+        Batch sudah tersimpan, jadi kegagalan training hanya di-log: exception
+        di sini akan membuat batch di-retry dan terhitung duplikat.
+        """
+        if not self.codec.dictionary_samples:
+            return
+        try:
+            for (topic, _, _, _, payload), is_new in zip(events, results):
+                if is_new and self.codec.train(self._writer, topic, payload):
+                    logger.info(f"Trained payload dictionary for topic: {topic}")
+        except sqlite3.Error as e:
+            self._writer.rollback()
+            logger.warning(f"Payload dictionary training failed: {e}")
+
+    @property
+    def _check_fingerprints(self) -> bool:
+        # Proses lain bisa meng-compact database bersama kapan saja
+        return self._compacted or self.shared
+
+    def _bloom_rules_out(self, topic: str, event_id: str) -> bool:
+        """
+        True jika Bloom filter memastikan key belum pernah diproses, sehingga
+        SELECT ke SQLite boleh dilewati. Dipanggil tepat sekali per lookup
+        (lookup yang dilewati dihitung di sini, false positive oleh
+        pemanggil setelah SELECT).
+        """
+        if self._bloom is None or self._bloom_key(topic, event_id) in self._bloom:
+            return False
+        self.bloom_skipped_lookups += 1
+        return True
+
+    def _fingerprint_exists(self, conn, topic: str, event_id: str) -> bool:
+        row = conn.execute(
+            SQL_FINGERPRINT_EXISTS, (self.fingerprint(topic, event_id),)
+        ).fetchone()
+        return row is not None
+
+    def _rebuild_bloom(self):
+        """
+        Isi ulang Bloom filter dari tabel processed_events saat startup.
+        """
+        if self._bloom is None:
+            return
+
+        self._bloom.clear()
+        cursor = self._writer.execute("SELECT topic, event_id FROM processed_events")
+        while True:
+            rows = cursor.fetchmany(10000)
+            if not rows:
+                break
+            for topic, event_id in rows:
+                self._bloom.add(self._bloom_key(topic, event_id))
+
+        # Key yang sudah di-compact hanya tersisa sebagai fingerprint (= digest)
+        for (digest,) in self._writer.execute("SELECT fingerprint FROM dedup_keys"):
+            self._bloom.add_digest(digest)
+
+        logger.info(
+            f"Bloom filter rebuilt: {len(self._bloom)} key(s), "
+            f"{self._bloom.size_bytes} bytes"
+        )
+
+    def get_bloom_stats(self) -> Optional[dict]:
+        """
+        Get statistik Bloom filter.
+
+        Returns:
+            Dictionary statistik, atau None jika Bloom filter tidak aktif
+        """
+        if self._bloom is None:
+            return None
+        return {
+            "items": len(self._bloom),
+            "false_positive_rate": self._bloom.false_positive_rate,
+            "memory_bytes": self._bloom.size_bytes,
+            "skipped_lookups": self.bloom_skipped_lookups,
+            "false_positives": self.bloom_false_positives,
+        }
+
+    def get_recent_cache_stats(self) -> Optional[dict]:
+        """
+        Get statistik cache key yang baru diproses.
+
+        Returns:
+            Dictionary statistik, atau None jika cache tidak aktif
+        """
+        if self._recent is None:
+            return None
+        return self._recent.get_stats()
+
+    def get_payload_stats(self) -> Optional[dict]:
+        """
+        Get statistik kompresi payload sejak start.
+
+        Returns:
+            Dictionary statistik, atau None jika kompresi payload tidak aktif
+        """
+        if not self.codec.enabled:
+            return None
+        return self.codec.stats()
+
+    @staticmethod
+    def _is_locked_error(error: sqlite3.OperationalError) -> bool:
+        message = str(error).lower()
+        return "locked" in message or "busy" in message
+
+    def _with_retry(self, fn, *args):
+        """
+        Jalankan fungsi write, retry dengan exponential backoff + jitter
+        jika database terkunci oleh proses lain (setelah busy_timeout habis).
+
+        Args:
+            fn: Fungsi sinkron yang memakai self._writer
+            *args: Argumen untuk fn
+
+        Returns:
+            Hasil fn
+
+        Raises:
+            sqlite3.OperationalError: Jika masih terkunci setelah semua retry
+        """
+        attempt = 0
+        while True:
+            try:
+                return fn(*args)
+            except sqlite3.OperationalError as e:
+                if not self._is_locked_error(e) or attempt >= self.write_retries:
+                    raise
+                if self._writer.in_transaction:
+                    self._writer.rollback()
+                delay = min(self.retry_backoff_max, self.retry_backoff * 2**attempt)
+                attempt += 1
+                self.write_retry_count += 1
+                logger.warning(
+                    f"Database locked, retry {attempt}/{self.write_retries} "
+                    f"in {delay:.3f}s"
+                )
+                time.sleep(delay * random.uniform(0.5, 1.0))
+
+    async def _run_write(self, fn, *args):
+        """
+        Jalankan fungsi write di writer thread (dengan retry jika terkunci).
+
+        Args:
+            fn: Fungsi sinkron yang memakai self._writer
+            *args: Argumen untuk fn
+
+        Returns:
+            Hasil fn
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._write_executor, self._with_retry, fn, *args
+        )
+
+    async def _run_read(self, fn, *args):
+        """
+        Jalankan fungsi read di reader thread dengan koneksi dari pool.
+
+        Args:
+            fn: Fungsi sinkron dengan argumen pertama reader connection
+            *args: Argumen tambahan untuk fn
+
+        Returns:
+            Hasil fn
+        """
+
+        def task():
+            with self._reader() as conn:
+                return fn(conn, *args)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._read_executor, task)
 
     async def is_duplicate(self, topic: str, event_id: str) -> bool:
         """
@@ -98,21 +1001,36 @@ class DedupStore:
         Returns:
             True jika duplicate, False jika belum pernah diproses
         """
-        async with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+        if self._recent is not None and self._recent.contains((topic, event_id)):
+            return True
 
-            cursor.execute(
-                "SELECT COUNT(*) FROM processed_events WHERE topic = ? AND event_id = ?",
-                (topic, event_id),
-            )
-            count = cursor.fetchone()[0]
-            conn.close()
+        if self._bloom_rules_out(topic, event_id):
+            # Pasti belum pernah diproses, tidak perlu query SQLite
+            return False
+
+        is_dup = await self._run_read(self._is_duplicate_sync, topic, event_id)
+        if self._bloom is not None and not is_dup:
+            self.bloom_false_positives += 1
+        if is_dup and self._recent is not None:
+            self._recent.add((topic, event_id))
+        return is_dup
 
-            return count > 0
+    def _is_duplicate_sync(
+        self, conn: sqlite3.Connection, topic: str, event_id: str
+    ) -> bool:
+        if self._key_exists_sync(conn, topic, event_id):
+            return True
+        return self._check_fingerprints and self._fingerprint_exists(
+            conn, topic, event_id
+        )
 
     async def mark_processed(
-        self, topic: str, event_id: str, timestamp: str, source: str, payload: str
+        self,
+        topic: str,
+        event_id: str,
+        timestamp: Union[int, str],
+        source: str,
+        payload: str,
     ) -> bool:
         """
         Mark event sebagai sudah diproses.
@@ -120,7 +1038,7 @@ class DedupStore:
         Args:
             topic: Topic event
             event_id: ID event
-            timestamp: Timestamp event
+            timestamp: Timestamp event (epoch mikrodetik UTC atau ISO8601)
             source: Source event
             payload: Payload event (JSON string)
 
@@ -128,167 +1046,889 @@ class DedupStore:
             True jika berhasil disimpan (event baru),
             False jika sudah ada (duplicate)
         """
-        async with self.lock:
-            conn = sqlite3.connect(self.db_path)
+        if self._recent is not None and self._recent.contains((topic, event_id)):
+            logger.warning(
+                f"Duplicate event detected: topic={topic}, event_id={event_id}"
+            )
+            return False
+
+        success = await self._run_write(
+            self._mark_processed_sync, topic, event_id, timestamp, source, payload
+        )
+        if self._recent is not None:
+            self._recent.add((topic, event_id))
+        return success
+
+    def _mark_processed_sync(
+        self,
+        topic: str,
+        event_id: str,
+        timestamp: Union[int, str],
+        source: str,
+        payload: str,
+    ) -> bool:
+        event = (topic, event_id, timestamp, source, payload)
+        processed_at = time.time_ns() // 1000
+
+        conn = self._writer
+        try:
             cursor = conn.cursor()
+            [is_new] = self._claim_events_sync(cursor, [event], processed_at)
+            self._update_topics_sync(
+                cursor, {topic: [1, 0] if is_new else [0, 1]}, processed_at
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
 
-            try:
-                processed_at = datetime.utcnow().isoformat()
-                cursor.execute(
-                    """
-                    INSERT INTO processed_events
-                    (topic, event_id, timestamp, source, payload, processed_at)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """,
-                    (topic, event_id, timestamp, source, payload, processed_at),
-                )
+        self._train_codec_sync([event], [is_new])
+        if is_new:
+            self._topics.add(topic)
+            logger.info(
+                f"Event marked as processed: topic={topic}, event_id={event_id}"
+            )
+        else:
+            logger.warning(
+                f"Duplicate event detected: topic={topic}, event_id={event_id}"
+            )
+        return is_new
 
-                conn.commit()
-                logger.info(
-                    f"Event marked as processed: topic={topic}, event_id={event_id}"
-                )
-                return True
+    async def try_claim(
+        self, events: List[Tuple[str, str, str, str, str]]
+    ) -> List[bool]:
+        """
+        Claim sekumpulan event secara atomik: event yang key-nya belum ada
+        disimpan, sisanya dilaporkan duplikat, dalam satu transaksi.
 
-            except sqlite3.IntegrityError:
-                logger.warning(
-                    f"Duplicate event detected: topic={topic}, event_id={event_id}"
-                )
-                return False
+        Dedup dan insert adalah statement yang sama (INSERT ... ON CONFLICT
+        DO NOTHING RETURNING), jadi tidak perlu is_duplicate sebelumnya dan
+        race antar writer tidak menghasilkan exception. Duplikat (termasuk
+        duplikat di dalam batch yang sama) di-skip, lalu counter
+        unique_processed dan duplicate_dropped di-update sekali untuk seluruh
+        batch. Delta counter yang belum di-flush ikut ditulis di transaksi
+        yang sama (batch boundary).
+        Key yang ada di cache recent langsung dianggap duplikat tanpa INSERT.
 
-            finally:
-                conn.close()
+        Args:
+            events: List tuple (topic, event_id, timestamp, source, payload)
 
-    async def increment_received(self):
-        """Increment counter untuk total event yang diterima."""
-        async with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("UPDATE stats SET received = received + 1 WHERE id = 1")
-            conn.commit()
-            conn.close()
+        Returns:
+            List boolean sesuai urutan input: True jika event baru,
+            False jika duplicate
+        """
+        if not events:
+            return []
 
-    async def increment_unique_processed(self):
-        """Increment counter untuk event unik yang diproses."""
-        async with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute(
-                "UPDATE stats SET unique_processed = unique_processed + 1 WHERE id = 1"
+        known_duplicates = None
+        if self._recent is not None:
+            known_duplicates = [
+                self._recent.contains((event[0], event[1])) for event in events
+            ]
+
+        deltas = self._take_counter_deltas()
+        try:
+            results = await self._run_write(
+                self._try_claim_sync, events, known_duplicates, deltas
             )
-            conn.commit()
-            conn.close()
+        except Exception:
+            self._restore_counter_deltas(deltas)
+            raise
 
-    async def increment_duplicate_dropped(self):
-        """Increment counter untuk duplikat yang di-drop."""
-        async with self.lock:
-            conn = sqlite3.connect(self.db_path)
+        unique_count = sum(results)
+        for name, delta in (
+            ("unique_processed", unique_count),
+            ("duplicate_dropped", len(results) - unique_count),
+        ):
+            # Sudah tertulis di transaksi batch
+            self._counters[name] += delta
+            self._flushed[name] += delta
+
+        if self._recent is not None:
+            for event in events:
+                self._recent.add((event[0], event[1]))
+        return results
+
+    def _try_claim_sync(
+        self,
+        events: List[Tuple[str, str, str, str, str]],
+        known_duplicates: Optional[List[bool]] = None,
+        deltas: Optional[Dict[str, int]] = None,
+    ) -> List[bool]:
+        conn = self._writer
+        processed_at = time.time_ns() // 1000
+        per_topic: Dict[str, List[int]] = {}
+
+        try:
             cursor = conn.cursor()
+            # Key di cache recent: duplikat tanpa menyentuh SQLite
+            pending = [
+                i
+                for i in range(len(events))
+                if known_duplicates is None or not known_duplicates[i]
+            ]
+            results = [False] * len(events)
+            claimed = self._claim_events_sync(
+                cursor, [events[i] for i in pending], processed_at
+            )
+            for i, is_new in zip(pending, claimed):
+                results[i] = is_new
+            for (topic, *_), is_new in zip(events, results):
+                per_topic.setdefault(topic, [0, 0])[0 if is_new else 1] += 1
+
+            self._update_topics_sync(cursor, per_topic, processed_at)
+
+            deltas = deltas or dict.fromkeys(COUNTER_NAMES, 0)
+            unique_count = sum(results)
             cursor.execute(
-                "UPDATE stats SET duplicate_dropped = duplicate_dropped + 1 WHERE id = 1"
+                SQL_ADD_STATS,
+                (
+                    deltas["received"],
+                    deltas["unique_processed"] + unique_count,
+                    deltas["duplicate_dropped"] + len(results) - unique_count,
+                ),
             )
             conn.commit()
-            conn.close()
+        except Exception:
+            conn.rollback()
+            raise
+
+        self._train_codec_sync(events, results)
+        self._topics.update(per_topic)
+        return results
+
+    async def increment_received(self, count: int = 1):
+        """Increment counter untuk total event yang diterima (in-memory)."""
+        self._counters["received"] += count
+
+    async def increment_unique_processed(self, count: int = 1):
+        """Increment counter untuk event unik yang diproses (in-memory)."""
+        self._counters["unique_processed"] += count
+
+    async def increment_duplicate_dropped(self, count: int = 1):
+        """Increment counter untuk duplikat yang di-drop (in-memory)."""
+        self._counters["duplicate_dropped"] += count
 
     async def get_stats(self) -> Tuple[int, int, int]:
         """
         Get statistik sistem.
 
+        Single process: langsung dari counter in-memory. Mode shared: total
+        tabel stats (semua proses) ditambah delta proses ini yang belum
+        di-flush; delta proses lain terlihat setelah flush berikutnya.
+
         Returns:
             Tuple (received, unique_processed, duplicate_dropped)
         """
-        async with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT received, unique_processed, duplicate_dropped FROM stats WHERE id = 1"
-            )
-            result = cursor.fetchone()
-            conn.close()
+        if not self.shared:
+            return tuple(self._counters[name] for name in COUNTER_NAMES)
+
+        stored = await self._run_read(
+            lambda conn: conn.execute(SQL_SELECT_STATS).fetchone()
+        )
+        return tuple(
+            value + self._counters[name] - self._flushed[name]
+            for name, value in zip(COUNTER_NAMES, stored)
+        )
+
+    @staticmethod
+    def normalize_time(value: str) -> int:
+        """
+        Normalisasi waktu ISO8601 ke format kolom waktu (epoch mikrodetik UTC).
 
-            if result:
-                return result
-            return (0, 0, 0)
+        Args:
+            value: Waktu ISO8601 (boleh dengan Z / offset, tanpa zona = UTC)
+
+        Returns:
+            Mikrodetik sejak epoch, sebanding dengan processed_at/timestamp
 
-    async def get_events(self, topic: Optional[str] = None) -> List[dict]:
+        Raises:
+            ValueError: Jika format waktu tidak valid
+        """
+        return parse_timestamp_us(value)
+
+    @staticmethod
+    def encode_cursor(key: int, row_id: int) -> str:
+        """
+        Encode posisi keyset (key, id) menjadi cursor opaque.
+
+        Args:
+            key: Kolom urutan baris terakhir halaman (processed_at, atau
+                timestamp jika memakai filter from/to)
+            row_id: id baris terakhir halaman
+
+        Returns:
+            Cursor string (URL-safe)
+        """
+        raw = f"{key}|{row_id}".encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def parse_cursor(cursor: str) -> Tuple[int, int]:
+        """
+        Parse cursor pagination.
+
+        Args:
+            cursor: Cursor dari next_cursor halaman sebelumnya
+
+        Returns:
+            Tuple (key, id) baris terakhir halaman sebelumnya
+
+        Raises:
+            ValueError: Jika cursor tidak valid
+        """
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+            key, row_id = raw.rsplit("|", 1)
+            return int(key), int(row_id)
+        except (ValueError, UnicodeError) as e:
+            raise ValueError(f"invalid cursor: {cursor}") from e
+
+    async def get_events(
+        self,
+        topic: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        time_from: Optional[str] = None,
+        time_to: Optional[str] = None,
+    ) -> List[dict]:
         """
         Get list event yang sudah diproses.
 
         Args:
             topic: Filter berdasarkan topic (optional)
+            limit: Jumlah event maksimal (optional, default semua)
+            cursor: Lanjutkan setelah halaman dengan cursor ini (optional)
+            since: Hanya event dengan processed_at >= since (optional)
+            until: Hanya event dengan processed_at < until (optional)
+            time_from: Hanya event dengan timestamp >= time_from (optional)
+            time_to: Hanya event dengan timestamp < time_to (optional)
 
         Returns:
             List dictionary event
         """
-        async with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+        events, _ = await self.get_events_page(
+            topic, limit, cursor, since, until, time_from, time_to
+        )
+        return events
 
-            if topic:
-                cursor.execute(
-                    """
-                    SELECT topic, event_id, timestamp, source, payload
-                    FROM processed_events
-                    WHERE topic = ?
-                    ORDER BY processed_at DESC
-                """,
-                    (topic,),
-                )
-            else:
-                cursor.execute("""
-                    SELECT topic, event_id, timestamp, source, payload
-                    FROM processed_events
-                    ORDER BY processed_at DESC
-                """)
+    async def get_events_page(
+        self,
+        topic: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        time_from: Optional[str] = None,
+        time_to: Optional[str] = None,
+    ) -> Tuple[List[dict], Optional[str]]:
+        """
+        Get satu halaman event, terbaru lebih dulu.
 
-            rows = cursor.fetchall()
-            conn.close()
+        Pagination memakai keyset (processed_at, id): setiap halaman dibaca
+        lewat idx_processed_at / idx_topic_processed_at tanpa OFFSET atau
+        full sort, termasuk saat memakai filter since/until. Dengan filter
+        waktu event (time_from/time_to), halaman diurutkan berdasarkan
+        (timestamp, id) dan dibaca sebagai range scan pada idx_timestamp /
+        idx_topic_timestamp.
 
-            events = []
-            for row in rows:
-                events.append(
-                    {
-                        "topic": row[0],
-                        "event_id": row[1],
-                        "timestamp": row[2],
-                        "source": row[3],
-                        "payload": row[4],
-                    }
-                )
+        Args:
+            topic: Filter berdasarkan topic (optional)
+            limit: Ukuran halaman (optional, default semua)
+            cursor: next_cursor dari halaman sebelumnya (optional)
+            since: Hanya event dengan processed_at >= since (optional, ISO8601)
+            until: Hanya event dengan processed_at < until (optional, ISO8601)
+            time_from: Hanya event dengan timestamp >= time_from (optional,
+                ISO8601)
+            time_to: Hanya event dengan timestamp < time_to (optional, ISO8601)
+
+        Returns:
+            Tuple (list event, next_cursor atau None jika halaman terakhir)
 
-            return events
+        Raises:
+            ValueError: Jika cursor atau filter waktu tidak valid
+        """
+        before = self.parse_cursor(cursor) if cursor else None
+        window = self.normalize_window(since, until, time_from, time_to)
+        return await self._run_read(self._get_events_sync, topic, limit, before, window)
+
+    @classmethod
+    def normalize_window(
+        cls,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        time_from: Optional[str] = None,
+        time_to: Optional[str] = None,
+    ) -> TimeWindow:
+        """
+        Normalisasi filter waktu query events (ISO8601) ke epoch mikrodetik.
+
+        Returns:
+            TimeWindow
+
+        Raises:
+            ValueError: Jika ada waktu yang tidak valid
+        """
+        return TimeWindow(
+            *(
+                cls.normalize_time(value) if value else None
+                for value in (since, until, time_from, time_to)
+            )
+        )
+
+    def _get_events_sync(
+        self,
+        conn: sqlite3.Connection,
+        topic: Optional[str],
+        limit: Optional[int],
+        before: Optional[Tuple[int, int]],
+        window: TimeWindow,
+    ) -> Tuple[List[dict], Optional[str]]:
+        # Ambil satu baris ekstra untuk tahu apakah masih ada halaman berikutnya
+        rows = self._query_events_sync(
+            conn, topic, None if limit is None else limit + 1, before, window
+        )
+
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = self.encode_cursor(last[window.key_index], last[0])
+
+        # Decompress hanya baris yang benar-benar dikembalikan
+        rows = self._decode_rows_sync(conn, rows)
+        return [self.row_to_event(row) for row in rows], next_cursor
+
+    async def decode_rows(self, rows: List[tuple]) -> List[tuple]:
+        """
+        Decode payload baris hasil query_events (di reader thread jika ada
+        baris terkompresi).
+
+        Args:
+            rows: List tuple hasil query_events
+
+        Returns:
+            List tuple yang sama dengan payload berupa JSON text
+        """
+        if all(row[7] == FORMAT_PLAIN for row in rows):
+            return rows
+        return await self._run_read(self._decode_rows_sync, rows)
+
+    def _decode_rows_sync(
+        self, conn: sqlite3.Connection, rows: List[tuple]
+    ) -> List[tuple]:
+        decoded = []
+        for row in rows:
+            if row[7] != FORMAT_PLAIN:
+                payload = self.codec.decode(row[5], row[7], conn)
+                row = (*row[:5], payload, row[6], FORMAT_PLAIN)
+            decoded.append(row)
+        return decoded
+
+    @staticmethod
+    def row_to_event(row: tuple) -> dict:
+        """
+        Convert baris processed_events (payload sudah di-decode) ke dictionary.
+
+        Args:
+            row: Tuple (id, topic, event_id, timestamp, source, payload,
+                processed_at, payload_format)
+
+        Returns:
+            Dictionary event (timestamp sebagai ISO8601 UTC)
+        """
+        return {
+            "topic": row[1],
+            "event_id": row[2],
+            "timestamp": format_timestamp_us(row[3]),
+            "source": row[4],
+            "payload": row[5],
+        }
+
+    async def query_events(
+        self,
+        topic: Optional[str],
+        limit: Optional[int],
+        before: Optional[Tuple[int, int]],
+        window: TimeWindow,
+    ) -> List[tuple]:
+        """
+        Query baris event mentah, terbaru lebih dulu (untuk merge antar partisi).
+        Payload belum di-decode; pakai decode_rows untuk baris yang dikembalikan.
+
+        Args:
+            topic: Filter berdasarkan topic (optional)
+            limit: Jumlah baris maksimal (optional)
+            before: Hanya baris dengan (key, id) < before (optional); key
+                adalah processed_at, atau timestamp jika window.by_event_time
+            window: Filter waktu, sudah dinormalisasi
+
+        Returns:
+            List tuple (id, topic, event_id, timestamp, source, payload,
+            processed_at, payload_format)
+        """
+        return await self._run_read(
+            self._query_events_sync, topic, limit, before, window
+        )
+
+    def _query_events_sync(
+        self,
+        conn: sqlite3.Connection,
+        topic: Optional[str],
+        limit: Optional[int],
+        before: Optional[Tuple[int, int]],
+        window: TimeWindow,
+    ) -> List[tuple]:
+        """
+        Query baris event terbaru lebih dulu, sebelum posisi keyset before.
+
+        Returns:
+            List tuple (id, topic, event_id, timestamp, source, payload,
+            processed_at, payload_format)
+        """
+        # Kolom urutan = kolom range index yang dipakai (idx_[topic_]timestamp
+        # untuk filter waktu event, idx_[topic_]processed_at selain itu)
+        key = "timestamp" if window.by_event_time else "processed_at"
+        clauses = []
+        params: list = []
+        if topic:
+            clauses.append("topic = ?")
+            params.append(topic)
+        if before is not None:
+            clauses.append(f"({key}, id) < (?, ?)")
+            params.extend(before)
+        for column, op, value in (
+            ("processed_at", ">=", window.since),
+            ("processed_at", "<", window.until),
+            ("timestamp", ">=", window.time_from),
+            ("timestamp", "<", window.time_to),
+        ):
+            if value is not None:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+
+        sql = (
+            "SELECT id, topic, event_id, timestamp, source, payload, processed_at, "
+            "payload_format FROM processed_events"
+        )
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {key} DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        return conn.execute(sql, params).fetchall()
+
+    async def iter_events_raw(
+        self,
+        topic: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        chunk_size: int = 1000,
+    ) -> AsyncIterator[List[Tuple[str, str, int, str, str]]]:
+        """
+        Iterasi semua event (terlama lebih dulu) dalam chunk, tanpa decode payload.
+
+        Setiap chunk dibaca dengan query keyset pendek pada (processed_at, id),
+        sehingga memori tetap konstan dan reader connection tidak ditahan
+        selama seluruh export berlangsung.
+
+        Args:
+            topic: Filter berdasarkan topic (optional)
+            since: Hanya event dengan processed_at >= since (optional, ISO8601)
+            until: Hanya event dengan processed_at < until (optional, ISO8601)
+            chunk_size: Jumlah baris per chunk
+
+        Yields:
+            List tuple (topic, event_id, timestamp, source, payload_json),
+            timestamp dalam epoch mikrodetik UTC
+
+        Raises:
+            ValueError: Jika since/until tidak valid
+        """
+        since = self.normalize_time(since) if since else None
+        until = self.normalize_time(until) if until else None
+        after: Optional[Tuple[int, int]] = None
+
+        while True:
+            rows = await self.get_raw_chunk(topic, since, until, after, chunk_size)
+            if not rows:
+                return
+            after = (rows[-1][6], rows[-1][0])
+            yield [row[1:6] for row in rows]
+            if len(rows) < chunk_size:
+                return
+
+    async def get_raw_chunk(
+        self,
+        topic: Optional[str],
+        since: Optional[int],
+        until: Optional[int],
+        after: Optional[Tuple[int, int]],
+        chunk_size: int,
+    ) -> List[tuple]:
+        """
+        Baca satu chunk baris event, terlama lebih dulu, setelah posisi after.
+
+        Args:
+            topic: Filter berdasarkan topic (optional)
+            since: processed_at >= since, sudah dinormalisasi (optional)
+            until: processed_at < until, sudah dinormalisasi (optional)
+            after: Hanya baris dengan (processed_at, id) > after (optional)
+            chunk_size: Jumlah baris maksimal
+
+        Returns:
+            List tuple (id, topic, event_id, timestamp, source, payload,
+            processed_at, payload_format), payload sudah di-decode
+        """
+        return await self._run_read(
+            self._get_raw_chunk_sync, topic, since, until, after, chunk_size
+        )
+
+    def _get_raw_chunk_sync(
+        self,
+        conn: sqlite3.Connection,
+        topic: Optional[str],
+        since: Optional[int],
+        until: Optional[int],
+        after: Optional[Tuple[int, int]],
+        chunk_size: int,
+    ) -> List[tuple]:
+        clauses = []
+        params: list = []
+        if after is not None:
+            clauses.append("(processed_at, id) > (?, ?)")
+            params.extend(after)
+        if topic:
+            clauses.append("topic = ?")
+            params.append(topic)
+        if since is not None:
+            clauses.append("processed_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("processed_at < ?")
+            params.append(until)
+        params.append(chunk_size)
+
+        sql = (
+            "SELECT id, topic, event_id, timestamp, source, payload, processed_at, "
+            "payload_format FROM processed_events"
+        )
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY processed_at ASC, id ASC LIMIT ?"
+        return self._decode_rows_sync(conn, conn.execute(sql, params).fetchall())
 
     async def get_unique_topics_count(self) -> int:
         """
-        Get jumlah topic unik.
+        Get jumlah topic unik (dari katalog in-memory, O(1)).
+        Mode shared membaca katalog topics karena proses lain bisa menambah topic.
 
         Returns:
             Jumlah topic unik
         """
-        async with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(DISTINCT topic) FROM processed_events")
-            count = cursor.fetchone()[0]
-            conn.close()
-            return count
+        if self.shared:
+            return await self._run_read(
+                lambda conn: conn.execute(SQL_COUNT_TOPICS).fetchone()[0]
+            )
+        return len(self._topics)
 
-    async def clear_all(self):
+    async def get_topic_names(self) -> Set[str]:
         """
-        Clear semua data (untuk testing).
+        Get nama semua topic di katalog.
+
+        Returns:
+            Set nama topic
+        """
+        if self.shared:
+            rows = await self._run_read(
+                lambda conn: conn.execute("SELECT topic FROM topics").fetchall()
+            )
+            return {row[0] for row in rows}
+        return set(self._topics)
+
+    async def get_topics(self) -> List[dict]:
+        """
+        Get breakdown per topic dari katalog topics.
+
+        Returns:
+            List dictionary (topic, event_count, duplicate_count,
+            first_seen, last_seen), urut berdasarkan nama topic
+        """
+        return await self._run_read(self._get_topics_sync)
+
+    def _get_topics_sync(self, conn: sqlite3.Connection) -> List[dict]:
+        rows = conn.execute("""
+            SELECT topic, event_count, duplicate_count, first_seen, last_seen
+            FROM topics
+            ORDER BY topic
+        """).fetchall()
+        return [
+            {
+                "topic": row[0],
+                "event_count": row[1],
+                "duplicate_count": row[2],
+                "first_seen": format_timestamp_us(row[3]),
+                "last_seen": format_timestamp_us(row[4]),
+            }
+            for row in rows
+        ]
+
+    async def compact(self) -> Dict[str, int]:
         """
-        async with self.lock:
-            conn = sqlite3.connect(self.db_path)
+        Jalankan satu putaran retention: compact baris yang melewati TTL,
+        hapus fingerprint yang melewati dedup window, lalu incremental vacuum.
+
+        Setiap chunk (retention_chunk_size baris / vacuum_pages page) adalah
+        satu transaksi write terpisah, sehingga batch consumer yang antre di
+        writer thread bisa masuk di antara chunk dan tidak tertahan lama.
+
+        Returns:
+            Dictionary jumlah compacted, expired_keys, vacuumed_pages
+        """
+        result = {"compacted": 0, "expired_keys": 0, "vacuumed_pages": 0}
+        if self.retention is None or not self.retention.enabled:
+            return result
+
+        now = datetime.utcnow()
+        now_us = time.time_ns() // 1000
+        now_epoch = now_us // 1_000_000
+        overrides = list(self.retention.topic_policies)
+
+        # Topic dengan override diproses sendiri; policy global untuk sisanya
+        for topic in [None, *overrides]:
+            payload_ttl, dedup_window = self.retention.for_topic(topic)
+            if not payload_ttl:
+                continue
+            cutoff = now_us - int(payload_ttl * 1_000_000)
+            while True:
+                count = await self._run_write(
+                    self._compact_chunk_sync,
+                    topic,
+                    overrides if topic is None else [],
+                    cutoff,
+                    dedup_window,
+                    now_epoch,
+                )
+                result["compacted"] += count
+                if count < self.retention_chunk_size:
+                    break
+
+        while True:
+            count = await self._run_write(self._expire_fingerprints_sync, now_epoch)
+            result["expired_keys"] += count
+            if count < self.retention_chunk_size:
+                break
+
+        while True:
+            freed = await self._run_write(self._incremental_vacuum_sync)
+            result["vacuumed_pages"] += freed
+            if freed < self.vacuum_pages:
+                break
+
+        self.compacted_rows += result["compacted"]
+        self.expired_keys += result["expired_keys"]
+        self.vacuumed_pages += result["vacuumed_pages"]
+        self.last_compaction = now.isoformat()
+        if any(result.values()):
+            logger.info(
+                f"Retention: compacted {result['compacted']} event(s), "
+                f"expired {result['expired_keys']} key(s), "
+                f"vacuumed {result['vacuumed_pages']} page(s)"
+            )
+        return result
+
+    def _compact_chunk_sync(
+        self,
+        topic: Optional[str],
+        exclude_topics: List[str],
+        cutoff: int,
+        dedup_window: float,
+        now_epoch: int,
+    ) -> int:
+        conn = self._writer
+        if topic is not None:
+            where, params = "topic = ? AND processed_at < ?", [topic, cutoff]
+        else:
+            where, params = "processed_at < ?", [cutoff]
+            if exclude_topics:
+                where += f" AND topic NOT IN ({', '.join('?' * len(exclude_topics))})"
+                params.extend(exclude_topics)
+        params.append(self.retention_chunk_size)
+
+        rows = conn.execute(
+            f"SELECT id, topic, event_id, processed_at FROM processed_events "
+            f"WHERE {where} ORDER BY processed_at LIMIT ?",
+            params,
+        ).fetchall()
+        if not rows:
+            return 0
+
+        fingerprints = []
+        for _, row_topic, event_id, processed_at in rows:
+            if not dedup_window:
+                expires_at = None
+            else:
+                expires_at = int(processed_at / 1_000_000 + dedup_window)
+                if expires_at <= now_epoch:
+                    # Dedup window juga sudah habis: hapus tanpa fingerprint
+                    continue
+            fingerprints.append((self.fingerprint(row_topic, event_id), expires_at))
+
+        try:
             cursor = conn.cursor()
-            cursor.execute("DELETE FROM processed_events")
+            cursor.executemany(SQL_INSERT_FINGERPRINT, fingerprints)
+            if self.key_mode != "text":
+                self._release_keys_sync(cursor, rows)
+            cursor.executemany(
+                "DELETE FROM processed_events WHERE id = ?", [(row[0],) for row in rows]
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        if fingerprints:
+            self._compacted = True
+        return len(rows)
+
+    def _release_keys_sync(self, cursor: sqlite3.Cursor, rows: List[tuple]):
+        """
+        Hapus key baris yang di-compact dari event_keys dan colliding_keys
+        (key mode hash, di dalam transaksi compaction).
+
+        Event di colliding_keys yang pemilik fingerprint-nya ikut dihapus
+        menjadi pemilik baru, sehingga fingerprint yang tidak ada di
+        event_keys tetap berarti tidak ada event tersimpan dengan key itu.
+
+        Args:
+            cursor: Cursor writer
+            rows: Baris (id, topic, event_id, ...) yang akan dihapus
+        """
+        cursor.executemany(
+            "DELETE FROM event_keys WHERE key_hash = ? AND row_id = ?",
+            [(self.key_hash(topic, event_id), row_id) for row_id, topic, event_id, *_ in rows],
+        )
+        colliding = cursor.execute(
+            "SELECT topic, event_id, row_id FROM colliding_keys"
+        ).fetchall()
+        if not colliding:
+            return
+        removed = {row[0] for row in rows}
+        for topic, event_id, row_id in colliding:
+            if row_id not in removed:
+                promoted = cursor.execute(
+                    SQL_CLAIM_KEYS.format(rows="(?, ?)"),
+                    (self.key_hash(topic, event_id), row_id),
+                ).fetchall()
+                if not promoted:
+                    continue
             cursor.execute(
-                "UPDATE stats SET received = 0, unique_processed = 0, duplicate_dropped = 0 WHERE id = 1"
+                "DELETE FROM colliding_keys WHERE topic = ? AND event_id = ?",
+                (topic, event_id),
+            )
+
+    def _expire_fingerprints_sync(self, now_epoch: int) -> int:
+        conn = self._writer
+        try:
+            cursor = conn.execute(
+                """
+                DELETE FROM dedup_keys WHERE fingerprint IN (
+                    SELECT fingerprint FROM dedup_keys
+                    WHERE expires_at <= ?
+                    LIMIT ?
+                )
+                """,
+                (now_epoch, self.retention_chunk_size),
             )
             conn.commit()
-            conn.close()
-            logger.info("All data cleared from dedup store")
+        except Exception:
+            conn.rollback()
+            raise
+        return cursor.rowcount
+
+    def _incremental_vacuum_sync(self) -> int:
+        conn = self._writer
+        # 2 = INCREMENTAL; database lama tanpa auto_vacuum dilewati
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            return 0
+        before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        conn.execute(f"PRAGMA incremental_vacuum({self.vacuum_pages})").fetchall()
+        after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return before - after
+
+    def get_retention_stats(self) -> Optional[dict]:
+        """
+        Get statistik retention/compaction.
+
+        Returns:
+            Dictionary statistik, atau None jika retention tidak aktif
+        """
+        if self.retention is None or not self.retention.enabled:
+            return None
+        return {
+            "payload_ttl": self.retention.payload_ttl,
+            "dedup_window": self.retention.dedup_window,
+            "topic_overrides": len(self.retention.topic_policies),
+            "compacted_rows": self.compacted_rows,
+            "expired_keys": self.expired_keys,
+            "vacuumed_pages": self.vacuumed_pages,
+            "last_run": self.last_compaction,
+        }
+
+    async def clear_all(self):
+        """
+        Clear semua data (untuk testing).
+        """
+        await self._run_write(self._clear_all_sync)
+        self._counters = dict.fromkeys(COUNTER_NAMES, 0)
+        self._flushed = dict.fromkeys(COUNTER_NAMES, 0)
+        if self._recent is not None:
+            self._recent.clear()
+
+    def _clear_all_sync(self):
+        conn = self._writer
+        conn.execute("DELETE FROM processed_events")
+        conn.execute("DELETE FROM topics")
+        conn.execute("DELETE FROM dedup_keys")
+        conn.execute("DELETE FROM event_keys")
+        conn.execute("DELETE FROM colliding_keys")
+        conn.execute("DELETE FROM payload_dictionaries")
+        conn.execute(
+            "UPDATE stats SET received = 0, unique_processed = 0, duplicate_dropped = 0 WHERE id = 1"
+        )
+        conn.commit()
+        self._topics.clear()
+        self.codec.reset()
+        self._compacted = False
+        if self._bloom is not None:
+            self._bloom.clear()
+        logger.info("All data cleared from dedup store")
 
     def close(self):
         """
         Cleanup resources.
+        Menunggu write yang masih antri selesai, flush counter terakhir,
+        lalu menutup writer connection dan semua reader connection di pool.
+        Aman dipanggil lebih dari sekali.
         """
+        self._write_executor.shutdown(wait=True)
+        self._read_executor.shutdown(wait=True)
+
+        if self._writer is not None:
+            deltas = self._take_counter_deltas()
+            if any(deltas.values()):
+                self._flush_stats_sync(deltas)
+            self._writer.close()
+            self._writer = None
+
+        for conn in self._reader_conns:
+            conn.close()
+        self._reader_conns = []
+        self._readers = queue.Queue()
+
         logger.info("DedupStore closed")
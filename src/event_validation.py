@@ -0,0 +1,203 @@
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from src.models import parse_timestamp_us
+
+VALIDATION_MODES = ("strict", "fast")
+
+# Field string Event: (nama, wajib tidak kosong setelah strip)
+STRING_FIELDS = (
+    ("topic", True),
+    ("event_id", True),
+    ("timestamp", False),
+    ("source", False),
+)
+_MISSING = object()
+
+
+class FastEvent(NamedTuple):
+    """
+    Event hasil validasi fast path. Atribut sama dengan Event (termasuk
+    timestamp_us), jadi kode downstream bisa memakai keduanya.
+    """
+
+    topic: str
+    event_id: str
+    timestamp: str
+    source: str
+    payload: Dict[str, Any]
+    timestamp_us: int
+
+
+class EventValidationError(ValueError):
+    """
+    Body /publish tidak valid. errors berformat sama dengan error pydantic
+    (type, loc, msg, input) agar response 422 tetap konsisten.
+    """
+
+    def __init__(self, errors: List[dict]):
+        super().__init__(f"{len(errors)} validation error(s)")
+        self.errors = errors
+
+
+def _error(error_type: str, loc: tuple, msg: str, value: Any) -> dict:
+    return {"type": error_type, "loc": loc, "msg": msg, "input": value}
+
+
+def _validate_event(data: Any) -> Optional[FastEvent]:
+    """
+    Happy path: validasi satu event dengan aturan yang sama dengan model
+    Event, tanpa membentuk pesan error.
+
+    Returns:
+        FastEvent, atau None jika event tidak valid (lihat _event_errors)
+    """
+    if type(data) is not dict:
+        return None
+    topic = data.get("topic")
+    event_id = data.get("event_id")
+    timestamp = data.get("timestamp")
+    source = data.get("source")
+    payload = data.get("payload")
+    if payload is None and "payload" not in data:
+        payload = {}
+    if not (
+        type(topic) is str
+        and type(event_id) is str
+        and type(timestamp) is str
+        and type(source) is str
+        and type(payload) is dict
+        and topic.strip()
+        and event_id.strip()
+    ):
+        return None
+    try:
+        timestamp_us = parse_timestamp_us(timestamp)
+    except ValueError:
+        return None
+    return FastEvent(topic, event_id, timestamp, source, payload, timestamp_us)
+
+
+def _event_errors(index: int, data: Any) -> List[dict]:
+    """
+    Bentuk error (format pydantic) untuk event yang ditolak _validate_event.
+
+    Args:
+        index: Posisi event di batch
+        data: Event mentah
+
+    Returns:
+        List error
+    """
+    loc = ("events", index)
+    if type(data) is not dict:
+        return [
+            _error(
+                "model_type",
+                loc,
+                "Input should be a valid dictionary or instance of Event",
+                data,
+            )
+        ]
+
+    errors = []
+    for name, required in STRING_FIELDS:
+        value = data.get(name, _MISSING)
+        if value is _MISSING:
+            errors.append(_error("missing", (*loc, name), "Field required", data))
+        elif type(value) is not str:
+            errors.append(
+                _error(
+                    "string_type", (*loc, name), "Input should be a valid string", value
+                )
+            )
+        elif required and not value.strip():
+            errors.append(
+                _error(
+                    "value_error",
+                    (*loc, name),
+                    f"Value error, {name} tidak boleh kosong",
+                    value,
+                )
+            )
+
+    payload = data.get("payload", {})
+    if type(payload) is not dict:
+        errors.append(
+            _error(
+                "dict_type",
+                (*loc, "payload"),
+                "Input should be a valid dictionary",
+                payload,
+            )
+        )
+    if errors:
+        return errors
+
+    # Semua field bertipe benar: yang tersisa hanya format timestamp
+    timestamp = data["timestamp"]
+    return [
+        _error(
+            "value_error",
+            (*loc, "timestamp"),
+            f"Value error, timestamp harus dalam format ISO8601: {timestamp}",
+            timestamp,
+        )
+    ]
+
+
+def validate_publish_body(data: Any) -> List[FastEvent]:
+    """
+    Validasi body /publish (hasil decode JSON) tanpa pydantic.
+
+    Aturannya sama dengan PublishRequest/Event: field string wajib bertipe
+    string, topic dan event_id tidak boleh kosong, timestamp ISO8601,
+    payload object (default {}), field lain diabaikan. Timestamp di-parse
+    sekali dan hasilnya disimpan sebagai timestamp_us.
+
+    Args:
+        data: Body request yang sudah di-decode
+
+    Returns:
+        List FastEvent
+
+    Raises:
+        EventValidationError: Jika ada event yang tidak valid (semua error
+            dikumpulkan, seperti pydantic)
+    """
+    if type(data) is not dict:
+        raise EventValidationError(
+            [
+                _error(
+                    "model_attributes_type",
+                    (),
+                    "Input should be a valid dictionary or object to extract "
+                    "fields from",
+                    data,
+                )
+            ]
+        )
+    if "events" not in data:
+        raise EventValidationError(
+            [_error("missing", ("events",), "Field required", data)]
+        )
+    raw_events = data["events"]
+    if type(raw_events) is not list:
+        raise EventValidationError(
+            [
+                _error(
+                    "list_type", ("events",), "Input should be a valid list", raw_events
+                )
+            ]
+        )
+
+    events = [_validate_event(event) for event in raw_events]
+    if None in events:
+        raise EventValidationError(
+            [
+                error
+                for i, event in enumerate(raw_events)
+                if events[i] is None
+                for error in _event_errors(i, event)
+            ]
+        )
+    return events
@@ -0,0 +1,401 @@
+import asyncio
+import logging
+import mmap
+import os
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Satu record: panjang data (4 byte) + CRC32 data (4 byte) + data
+RECORD_HEADER = struct.Struct(">II")
+SEGMENT_SUFFIX = ".seg"
+CHECKPOINT_FILE = "checkpoint"
+
+
+def segment_name(first_lsn: int) -> str:
+    """Nama file segment; diurutkan leksikografis = diurutkan berdasarkan LSN."""
+    return f"{first_lsn:020d}{SEGMENT_SUFFIX}"
+
+
+class IngestLog:
+    """
+    Write-ahead log append-only untuk event yang sudah diterima /publish.
+
+    Setiap record mendapat LSN (log sequence number) berurutan dan ditulis ke
+    file segment aktif; segment baru dibuka setelah segment_bytes. Durability
+    memakai group commit: append hanya menyalin record ke buffer, lalu semua
+    append yang menunggu commit() ditulis dan di-fsync bersama di thread
+    terpisah dari event loop.
+
+    Consumer meng-ack LSN setelah event tersimpan di dedup store. checkpoint()
+    menyimpan LSN tertinggi yang semua LSN di bawahnya sudah di-ack, lalu
+    menghapus segment yang seluruh record-nya sudah di-checkpoint. Saat start,
+    record setelah checkpoint dibaca ulang (lewat mmap) untuk di-replay ke
+    consumer; tail record yang terpotong (crash di tengah write) dibuang.
+
+    Hanya diakses dari thread event loop, kecuali fsync dan checkpoint I/O.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = 64 * 1024 * 1024,
+        group_commit_delay: float = 0.002,
+        fsync: bool = True,
+    ):
+        """
+        Buka (atau buat) ingest log dan pulihkan state dari disk.
+
+        Args:
+            directory: Direktori segment dan file checkpoint
+            segment_bytes: Ukuran segment sebelum rotasi
+            group_commit_delay: Waktu tunggu (detik) sebelum fsync agar append
+                lain ikut dalam fsync yang sama
+            fsync: False = tanpa fsync (hanya selamat dari crash proses)
+        """
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.group_commit_delay = group_commit_delay
+        self.fsync_enabled = fsync
+        self.fsync_count = 0
+        self.appended = 0
+        self.replayed = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._checkpoint = self._read_checkpoint()
+        # LSN terkecil yang belum di-ack; LSN di atasnya yang sudah di-ack
+        self._next_unacked = self._checkpoint + 1
+        self._acked: Set[int] = set()
+        self._pending: List[Tuple[int, bytes]] = []
+
+        # first_lsn -> path, untuk semua segment yang masih ada di disk
+        self._segments: List[Tuple[int, str]] = []
+        next_lsn = self._recover()
+
+        self._next_lsn = next_lsn
+        self._written_lsn = next_lsn - 1
+        self._synced_lsn = next_lsn - 1
+        self._fd: Optional[int] = None
+        self._segment_size = 0
+        self._retired_fds: List[int] = []
+        # (fd, data) yang sudah mendapat LSN tapi belum ditulis, urut LSN
+        self._unwritten: List[Tuple[int, bytearray]] = []
+        self._syncing: Optional[asyncio.Future] = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="ingest-log"
+        )
+        self._open_segment(next_lsn)
+
+        logger.info(
+            f"IngestLog opened at {directory}: checkpoint={self._checkpoint}, "
+            f"next_lsn={next_lsn}, pending_replay={len(self._pending)}, "
+            f"segments={len(self._segments)}"
+        )
+
+    # ------------------------------------------------------------------
+    # Recovery
+    # ------------------------------------------------------------------
+
+    def _read_checkpoint(self) -> int:
+        path = os.path.join(self.directory, CHECKPOINT_FILE)
+        try:
+            with open(path) as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def _recover(self) -> int:
+        """
+        Scan semua segment: kumpulkan record setelah checkpoint untuk replay
+        dan potong record terakhir yang tidak utuh.
+
+        Returns:
+            LSN untuk record berikutnya
+        """
+        names = sorted(
+            name for name in os.listdir(self.directory) if name.endswith(SEGMENT_SUFFIX)
+        )
+        expected = self._checkpoint + 1
+        for name in names:
+            first_lsn = int(name[: -len(SEGMENT_SUFFIX)])
+            path = os.path.join(self.directory, name)
+            self._segments.append((first_lsn, path))
+
+            if first_lsn > expected:
+                # Record yang hilang (segment rusak): jangan tahan checkpoint
+                logger.warning(
+                    f"Ingest log gap: LSN {expected}-{first_lsn - 1} missing"
+                )
+                self.ack(range(expected, first_lsn))
+            count = self._scan_segment(path, first_lsn)
+            expected = max(expected, first_lsn + count)
+
+        self.replayed = len(self._pending)
+        return expected
+
+    def _scan_segment(self, path: str, first_lsn: int) -> int:
+        """
+        Baca satu segment lewat mmap.
+
+        Returns:
+            Jumlah record utuh di segment
+        """
+        size = os.path.getsize(path)
+        if size == 0:
+            return 0
+
+        offset = 0
+        lsn = first_lsn
+        with open(path, "rb") as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as view:
+            while offset + RECORD_HEADER.size <= size:
+                length, crc = RECORD_HEADER.unpack_from(view, offset)
+                start = offset + RECORD_HEADER.size
+                end = start + length
+                if end > size:
+                    break
+                data = view[start:end]
+                if zlib.crc32(data) != crc:
+                    break
+                if lsn > self._checkpoint:
+                    self._pending.append((lsn, data))
+                lsn += 1
+                offset = end
+
+        if offset < size:
+            logger.warning(
+                f"Truncating torn ingest log tail: {path} at offset {offset} "
+                f"({size - offset} byte(s) dropped)"
+            )
+            os.truncate(path, offset)
+        return lsn - first_lsn
+
+    def replay(self) -> List[Tuple[int, bytes]]:
+        """
+        Ambil record yang belum di-checkpoint saat log dibuka (sekali saja).
+
+        Returns:
+            List tuple (lsn, data), urut berdasarkan LSN
+        """
+        pending, self._pending = self._pending, []
+        return pending
+
+    # ------------------------------------------------------------------
+    # Append dan group commit
+    # ------------------------------------------------------------------
+
+    def _open_segment(self, first_lsn: int):
+        path = os.path.join(self.directory, segment_name(first_lsn))
+        if self._fd is not None:
+            # fsync yang sedang berjalan mungkin masih memakai fd lama
+            self._retired_fds.append(self._fd)
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self._segment_size = os.fstat(self._fd).st_size
+        if not self._segments or self._segments[-1][0] != first_lsn:
+            self._segments.append((first_lsn, path))
+
+    def append(self, records: Sequence[bytes]) -> List[int]:
+        """
+        Beri LSN ke record dan buffer untuk segment aktif (tanpa I/O di event
+        loop; ditulis oleh group commit berikutnya, lihat commit()).
+
+        Args:
+            records: Data record
+
+        Returns:
+            LSN setiap record, sesuai urutan input
+        """
+        if not records:
+            return []
+        if self._segment_size >= self.segment_bytes:
+            self._open_segment(self._next_lsn)
+
+        buffer = bytearray()
+        for data in records:
+            buffer += RECORD_HEADER.pack(len(data), zlib.crc32(data))
+            buffer += data
+        if self._unwritten and self._unwritten[-1][0] == self._fd:
+            self._unwritten[-1][1].extend(buffer)
+        else:
+            self._unwritten.append((self._fd, buffer))
+        self._segment_size += len(buffer)
+
+        first = self._next_lsn
+        self._next_lsn += len(records)
+        self._written_lsn = self._next_lsn - 1
+        self.appended += len(records)
+        return list(range(first, self._next_lsn))
+
+    async def commit(self, lsn: int):
+        """
+        Tunggu sampai record dengan LSN ini ditulis dan durable (group commit).
+
+        Args:
+            lsn: LSN record terakhir yang harus durable
+        """
+        while self._synced_lsn < lsn:
+            if self._syncing is None:
+                self._syncing = asyncio.ensure_future(self._sync())
+            await asyncio.shield(self._syncing)
+
+    async def _sync(self):
+        try:
+            if self.group_commit_delay > 0:
+                await asyncio.sleep(self.group_commit_delay)
+            target = self._written_lsn
+            writes, self._unwritten = self._unwritten, []
+            retired, self._retired_fds = self._retired_fds, []
+            try:
+                await asyncio.get_running_loop().run_in_executor(
+                    self._executor, self._flush_sync, writes, retired, self._fd
+                )
+            except BaseException:
+                # Sisa yang belum ditulis dicoba lagi oleh commit berikutnya
+                self._unwritten[:0] = [(fd, data) for fd, data in writes if data]
+                self._retired_fds[:0] = [fd for fd in retired if fd >= 0]
+                raise
+            if self.fsync_enabled:
+                self.fsync_count += 1
+            self._synced_lsn = max(self._synced_lsn, target)
+        finally:
+            self._syncing = None
+
+    def _flush_sync(
+        self,
+        writes: List[Tuple[int, bytearray]],
+        retired: List[int],
+        active: Optional[int],
+    ):
+        """
+        Tulis buffer (urut LSN), lalu fsync; fd segment lama ditutup.
+        Buffer dan list retired dikosongkan sejauh yang berhasil, agar sisanya
+        bisa diulang tanpa menulis record dua kali.
+        """
+        for fd, data in writes:
+            while data:
+                del data[: os.write(fd, data)]
+        for i, fd in enumerate(retired):
+            if self.fsync_enabled:
+                os.fsync(fd)
+            os.close(fd)
+            retired[i] = -1
+        if self.fsync_enabled and active is not None:
+            os.fsync(active)
+
+    # ------------------------------------------------------------------
+    # Ack dan checkpoint
+    # ------------------------------------------------------------------
+
+    def ack(self, lsns: Iterable[int]):
+        """
+        Tandai record sudah tersimpan di dedup store (atau tidak perlu lagi).
+
+        Args:
+            lsns: LSN yang di-ack (boleh tidak berurutan)
+        """
+        for lsn in lsns:
+            if lsn >= self._next_unacked:
+                self._acked.add(lsn)
+        while self._next_unacked in self._acked:
+            self._acked.remove(self._next_unacked)
+            self._next_unacked += 1
+
+    @property
+    def ackable_lsn(self) -> int:
+        """LSN tertinggi yang semua LSN di bawahnya sudah di-ack."""
+        return self._next_unacked - 1
+
+    @property
+    def unacked(self) -> int:
+        """Jumlah record yang ditulis tapi belum di-ack."""
+        return self._written_lsn - self.ackable_lsn - len(self._acked)
+
+    async def checkpoint(self, lsn: Optional[int] = None) -> int:
+        """
+        Simpan checkpoint dan hapus segment yang sudah tidak dibutuhkan.
+
+        Pemanggil harus memastikan event sampai LSN ini sudah durable di
+        dedup store (lihat DedupStore.checkpoint) sebelum memanggil ini.
+
+        Args:
+            lsn: LSN checkpoint (default ackable_lsn)
+
+        Returns:
+            Jumlah segment yang dihapus
+        """
+        lsn = min(self.ackable_lsn if lsn is None else lsn, self.ackable_lsn)
+        if lsn <= self._checkpoint:
+            return 0
+
+        # Segment bisa dihapus jika record terakhirnya (first_lsn segment
+        # berikutnya - 1) <= checkpoint; segment aktif tidak pernah dihapus
+        removable = [
+            path
+            for (_, path), (next_first, _) in zip(self._segments, self._segments[1:])
+            if next_first - 1 <= lsn
+        ]
+        await asyncio.get_running_loop().run_in_executor(
+            self._executor, self._write_checkpoint_sync, lsn, removable
+        )
+        self._checkpoint = lsn
+        self._segments = self._segments[len(removable) :]
+        if removable:
+            logger.info(
+                f"Ingest log checkpoint at LSN {lsn}, "
+                f"removed {len(removable)} segment(s)"
+            )
+        return len(removable)
+
+    def _write_checkpoint_sync(self, lsn: int, removable: List[str]):
+        path = os.path.join(self.directory, CHECKPOINT_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(str(lsn))
+            f.flush()
+            if self.fsync_enabled:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        for segment in removable:
+            os.remove(segment)
+        if self.fsync_enabled:
+            dir_fd = os.open(self.directory, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+    def stats(self) -> dict:
+        """
+        Get statistik ingest log.
+
+        Returns:
+            Dictionary next_lsn, checkpoint, unacked, segments, fsyncs,
+            appended, replayed
+        """
+        return {
+            "next_lsn": self._next_lsn,
+            "checkpoint": self._checkpoint,
+            "unacked": self.unacked,
+            "segments": len(self._segments),
+            "fsyncs": self.fsync_count,
+            "appended": self.appended,
+            "replayed": self.replayed,
+        }
+
+    def close(self):
+        """
+        Tulis record yang masih di buffer, fsync dan tutup segment (tanpa
+        checkpoint).
+        """
+        self._executor.shutdown(wait=True)
+        writes, self._unwritten = self._unwritten, []
+        self._flush_sync(writes, self._retired_fds, self._fd)
+        if self._fd is not None:
+            os.close(self._fd)
+        self._retired_fds = []
+        self._fd = None
+        logger.info("IngestLog closed")
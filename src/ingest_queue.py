@@ -0,0 +1,315 @@
+import asyncio
+import math
+import time
+import zlib
+from collections import deque
+from typing import Callable, Deque, List, Optional, Sequence, Any, Tuple
+
+# Perilaku /publish saat queue penuh (lihat Config.ADMISSION_MODE)
+ADMISSION_MODES = ("block", "reject", "partial")
+
+
+class IngestQueue:
+    """
+    Queue internal antara endpoint /publish dan consumer.
+
+    Berbeda dengan asyncio.Queue yang menyimpan event satu per satu, queue ini
+    menyimpan satu batch request sebagai satu unit sehingga admission batch
+    adalah satu operasi. Kapasitas dan qsize() tetap dihitung dalam event.
+
+    Admission control non-blocking (try_put_batch) memakai high/low watermark
+    dengan histeresis: begitu depth mencapai high watermark, queue menolak
+    event baru sampai depth turun ke low watermark. Seperti put_batch, batch
+    yang lebih besar dari high watermark tetap diterima saat queue kosong.
+
+    Queue bisa dibagi menjadi beberapa shard, satu per consumer. Event
+    di-assign ke shard berdasarkan hash shard_key(event), sehingga semua event
+    dengan key sama (misalnya topic) diproses berurutan oleh consumer yang sama.
+    Kapasitas dan watermark tetap dihitung untuk seluruh queue.
+    """
+
+    # Window (detik) untuk menghitung drain rate
+    RATE_WINDOW = 10.0
+
+    def __init__(
+        self,
+        maxsize: int = 0,
+        high_watermark: Optional[int] = None,
+        low_watermark: Optional[int] = None,
+        shards: int = 1,
+        shard_key: Optional[Callable[[Any], str]] = None,
+    ):
+        """
+        Inisialisasi queue.
+
+        Args:
+            maxsize: Kapasitas maksimal dalam jumlah event (0 = tanpa batas)
+            high_watermark: Depth saat queue mulai menolak event (default maxsize)
+            low_watermark: Depth saat queue kembali menerima event
+                (default sama dengan high_watermark, tanpa histeresis)
+            shards: Jumlah shard (satu per consumer)
+            shard_key: Fungsi yang mengembalikan key shard sebuah event
+                (wajib jika shards > 1)
+        """
+        if shards < 1:
+            raise ValueError("shards harus minimal 1")
+        if shards > 1 and shard_key is None:
+            raise ValueError("shard_key wajib diisi jika shards > 1")
+
+        self.maxsize = maxsize
+        self.shards = shards
+        self._shard_key = shard_key
+        self.high_watermark = high_watermark or maxsize
+        self.low_watermark = (
+            low_watermark if low_watermark is not None else self.high_watermark
+        )
+        self.shedding = False
+        self.rejected = 0
+        self._drained: List[Deque[Tuple[float, int]]] = [
+            deque() for _ in range(shards)
+        ]
+        self._processed = [0] * shards
+        self._batches: List[Deque[Sequence[Any]]] = [deque() for _ in range(shards)]
+        self._sizes = [0] * shards
+        self._size = 0
+        self._unfinished = 0
+        self._cond = asyncio.Condition()
+        self._finished = asyncio.Event()
+        self._finished.set()
+
+    def qsize(self) -> int:
+        """Jumlah event yang menunggu di queue."""
+        return self._size
+
+    def processed(self) -> int:
+        """Jumlah event yang sudah selesai diproses (task_done) sejak start."""
+        return sum(self._processed)
+
+    def empty(self) -> bool:
+        return self._size == 0
+
+    def shard_for(self, event: Any) -> int:
+        """
+        Tentukan shard sebuah event.
+
+        Memakai CRC32 (bukan hash() bawaan) agar assignment stabil
+        antar proses dan restart.
+
+        Args:
+            event: Event yang akan di-assign
+
+        Returns:
+            Index shard
+        """
+        if self.shards == 1:
+            return 0
+        key = self._shard_key(event).encode("utf-8")
+        return zlib.crc32(key) % self.shards
+
+    def _enqueue(self, events: Sequence[Any]):
+        count = len(events)
+        if self.shards == 1:
+            self._batches[0].append(events)
+            self._sizes[0] += count
+        else:
+            # Pecah batch per shard dengan urutan event tetap terjaga
+            parts: List[List[Any]] = [[] for _ in range(self.shards)]
+            for event in events:
+                parts[self.shard_for(event)].append(event)
+            for shard, part in enumerate(parts):
+                if part:
+                    self._batches[shard].append(part)
+                    self._sizes[shard] += len(part)
+
+        self._size += count
+        self._unfinished += count
+        self._finished.clear()
+
+    def _has_room(self, count: int) -> bool:
+        if self.maxsize <= 0:
+            return True
+        # Batch yang lebih besar dari maxsize tetap diterima saat queue kosong
+        return self._size + count <= self.maxsize or self._size == 0
+
+    async def put_batch(self, events: Sequence[Any]):
+        """
+        Masukkan satu batch event sebagai satu unit.
+        Menunggu sampai ada ruang untuk seluruh batch.
+
+        Args:
+            events: Batch event
+        """
+        if not events:
+            return
+
+        count = len(events)
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._has_room(count))
+            self._enqueue(events)
+            self._cond.notify_all()
+
+    def _admission_room(self) -> float:
+        """Jumlah event yang masih boleh masuk lewat try_put_batch."""
+        if self.high_watermark <= 0:
+            return math.inf
+        if self.shedding:
+            if self._size > self.low_watermark:
+                return 0
+            self.shedding = False
+        return max(0, self.high_watermark - self._size)
+
+    async def try_put_batch(self, events: Sequence[Any], allow_partial: bool = False) -> int:
+        """
+        Coba masukkan batch tanpa menunggu (admission control).
+
+        Args:
+            events: Batch event
+            allow_partial: Jika True, terima bagian awal batch yang muat;
+                jika False, batch diterima utuh atau ditolak seluruhnya
+
+        Returns:
+            Jumlah event yang diterima (0 jika ditolak)
+        """
+        if not events:
+            return 0
+
+        async with self._cond:
+            room = self._admission_room()
+            count = len(events)
+            # Batch yang lebih besar dari high watermark tidak akan pernah
+            # muat: terima utuh saat queue kosong agar retry tidak sia-sia
+            if count > room and self._size > 0:
+                if not allow_partial or room <= 0:
+                    self._reject(count)
+                    return 0
+                self._reject(count - room)
+                events = events[:room]
+                count = room
+
+            self._enqueue(events)
+            if self.high_watermark > 0 and self._size >= self.high_watermark:
+                self.shedding = True
+            self._cond.notify_all()
+            return count
+
+    def _reject(self, count: int):
+        self.rejected += count
+        self.shedding = True
+
+    def _expire_drained(self, shard: int, now: float):
+        drained = self._drained[shard]
+        while drained and now - drained[0][0] > self.RATE_WINDOW:
+            drained.popleft()
+
+    def drain_rate(self, shard: Optional[int] = None) -> float:
+        """
+        Laju event selesai diproses (event/detik) dalam RATE_WINDOW terakhir.
+
+        Args:
+            shard: Index shard, atau None untuk seluruh queue
+
+        Returns:
+            Drain rate, 0.0 jika belum ada data
+        """
+        now = time.monotonic()
+        shards = range(self.shards) if shard is None else [shard]
+        oldest = None
+        total = 0
+        for i in shards:
+            self._expire_drained(i, now)
+            drained = self._drained[i]
+            if drained:
+                total += sum(count for _, count in drained)
+                if oldest is None or drained[0][0] < oldest:
+                    oldest = drained[0][0]
+        if oldest is None:
+            return 0.0
+        return total / max(now - oldest, 1.0)
+
+    def shard_stats(self) -> List[dict]:
+        """
+        Get statistik per shard (per consumer).
+
+        Returns:
+            List dictionary worker, queue_depth, processed, throughput
+        """
+        return [
+            {
+                "worker": shard,
+                "queue_depth": self._sizes[shard],
+                "processed": self._processed[shard],
+                "throughput": self.drain_rate(shard),
+            }
+            for shard in range(self.shards)
+        ]
+
+    def retry_after(self, max_seconds: int = 60) -> int:
+        """
+        Estimasi waktu (detik) sampai queue turun ke low watermark.
+
+        Args:
+            max_seconds: Batas atas estimasi
+
+        Returns:
+            Detik untuk header Retry-After (minimal 1)
+        """
+        rate = self.drain_rate()
+        backlog = max(0, self._size - self.low_watermark)
+        if rate <= 0:
+            return 1 if backlog == 0 else max_seconds
+        return int(min(max_seconds, max(1, math.ceil(backlog / rate))))
+
+    def _take(self, max_events: int, shard: int) -> List[Any]:
+        batches = self._batches[shard]
+        taken: List[Any] = []
+        while batches and len(taken) < max_events:
+            head = batches[0]
+            need = max_events - len(taken)
+            if len(head) <= need:
+                taken.extend(batches.popleft())
+            else:
+                taken.extend(head[:need])
+                batches[0] = head[need:]
+
+        self._sizes[shard] -= len(taken)
+        self._size -= len(taken)
+        return taken
+
+    async def get(self, max_events: int, shard: int = 0) -> List[Any]:
+        """
+        Tunggu sampai shard tidak kosong, lalu ambil sampai max_events event.
+
+        Args:
+            max_events: Jumlah event maksimal yang diambil
+            shard: Index shard yang dibaca
+
+        Returns:
+            List event (minimal satu)
+        """
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._sizes[shard] > 0)
+            taken = self._take(max_events, shard)
+            self._cond.notify_all()
+            return taken
+
+    def task_done(self, count: int = 1, shard: int = 0):
+        """
+        Tandai sejumlah event sudah selesai diproses.
+
+        Args:
+            count: Jumlah event yang selesai
+            shard: Index shard asal event
+        """
+        if count > self._unfinished:
+            raise ValueError("task_done() called too many times")
+        self._unfinished -= count
+        self._processed[shard] += count
+        now = time.monotonic()
+        self._drained[shard].append((now, count))
+        self._expire_drained(shard, now)
+        if self._unfinished == 0:
+            self._finished.set()
+
+    async def join(self):
+        """Tunggu sampai semua event yang masuk selesai diproses."""
+        await self._finished.wait()
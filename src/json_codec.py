@@ -0,0 +1,161 @@
+import json
+import math
+import re
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependency opsional
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - dependency opsional
+    msgspec = None
+
+# "auto" memilih backend tercepat yang ter-install (urutan di AUTO_ORDER)
+JSON_CODECS = ("auto", "stdlib", "orjson", "msgspec")
+AUTO_ORDER = ("orjson", "msgspec", "stdlib")
+
+# orjson/msgspec men-decode integer di luar 64-bit menjadi float (presisi
+# hilang tanpa error). Angka dengan 19+ digit berurutan mungkin di luar
+# 64-bit, jadi data seperti itu di-decode dengan stdlib
+_LONG_NUMBER = re.compile(r"\d{19}")
+_LONG_NUMBER_BYTES = re.compile(rb"\d{19}")
+
+
+def _has_nonfinite(obj: Any) -> bool:
+    """True jika obj berisi float NaN/Infinity (di-encode null oleh orjson/msgspec)."""
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    if isinstance(obj, dict):
+        return any(_has_nonfinite(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return any(_has_nonfinite(value) for value in obj)
+    return False
+
+
+def available_codecs() -> tuple:
+    """Backend JSON yang bisa dipakai di environment ini, urut AUTO_ORDER."""
+    installed = {"orjson": orjson, "msgspec": msgspec, "stdlib": json}
+    return tuple(name for name in AUTO_ORDER if installed[name] is not None)
+
+
+class JsonCodec:
+    """
+    Encode/decode JSON dengan backend yang bisa diganti (stdlib, orjson,
+    msgspec).
+
+    Output selalu JSON compact UTF-8 (tanpa spasi, tanpa escape non-ASCII),
+    jadi hasil encode bisa disimpan dan dikirim ulang apa adanya tanpa
+    decode lagi. Hasil decode dan encode sama dengan stdlib untuk semua
+    input: nilai yang tidak didukung backend cepat (integer di luar 64-bit,
+    NaN/Infinity, surrogate tunggal) di-decode / di-encode dengan stdlib.
+    """
+
+    def __init__(self, name: str = "auto"):
+        """
+        Inisialisasi codec.
+
+        Args:
+            name: Backend (lihat JSON_CODECS)
+
+        Raises:
+            ValueError: Jika backend tidak dikenal atau tidak ter-install
+        """
+        if name not in JSON_CODECS:
+            raise ValueError(
+                f"Unknown JSON codec: {name} (available: {', '.join(JSON_CODECS)})"
+            )
+        if name == "auto":
+            name = available_codecs()[0]
+        elif name not in available_codecs():
+            raise ValueError(f"JSON codec {name} is not installed")
+        self.name = name
+
+        # Error backend cepat yang membuat encode / decode diulang dengan stdlib
+        self._encode_errors: tuple = (TypeError, OverflowError, UnicodeEncodeError)
+        self._decode_errors: tuple = (ValueError,)
+        if name == "orjson":
+            self._encode = orjson.dumps
+            self._decode = orjson.loads
+        elif name == "msgspec":
+            self._encode = msgspec.json.Encoder().encode
+            self._decode = msgspec.json.Decoder().decode
+            self._encode_errors += (msgspec.EncodeError,)
+            self._decode_errors += (msgspec.DecodeError,)
+        else:
+            self._encode = self._stdlib_encode
+            self._decode = json.loads
+
+    @staticmethod
+    def _stdlib_encode(obj: Any) -> bytes:
+        text = json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+        try:
+            return text.encode("utf-8")
+        except UnicodeEncodeError:
+            # Surrogate tunggal tidak bisa ditulis sebagai UTF-8; escape \uXXXX
+            return json.dumps(obj, separators=(",", ":")).encode("ascii")
+
+    def encode(self, obj: Any) -> bytes:
+        """
+        Encode object ke JSON.
+
+        Args:
+            obj: Object yang bisa di-serialisasi JSON
+
+        Returns:
+            JSON compact dalam bytes UTF-8
+        """
+        try:
+            data = self._encode(obj)
+        except self._encode_errors:
+            if self._encode is self._stdlib_encode:
+                raise
+            return self._stdlib_encode(obj)
+        if (
+            self._encode is not self._stdlib_encode
+            and b"null" in data
+            and _has_nonfinite(obj)
+        ):
+            # orjson/msgspec menulis NaN/Infinity sebagai null
+            return self._stdlib_encode(obj)
+        return data
+
+    def dumps(self, obj: Any) -> str:
+        """
+        Encode object ke JSON text (untuk kolom TEXT dan response).
+
+        Args:
+            obj: Object yang bisa di-serialisasi JSON
+
+        Returns:
+            JSON compact
+        """
+        return self.encode(obj).decode("utf-8")
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        """
+        Decode JSON.
+
+        Args:
+            data: JSON text atau bytes
+
+        Returns:
+            Object hasil decode
+
+        Raises:
+            ValueError: Jika data bukan JSON valid (json.JSONDecodeError,
+                atau UnicodeDecodeError untuk bytes yang bukan UTF-8)
+        """
+        if self._decode is json.loads:
+            return json.loads(data)
+        long_number = _LONG_NUMBER_BYTES if isinstance(data, bytes) else _LONG_NUMBER
+        if long_number.search(data):
+            return json.loads(data)
+        try:
+            return self._decode(data)
+        except self._decode_errors:
+            # NaN/Infinity, surrogate tunggal dan angka di luar double diterima
+            # stdlib; JSON yang memang tidak valid tetap JSONDecodeError
+            return json.loads(data)
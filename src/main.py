@@ -1,16 +1,37 @@
 import asyncio
 import logging
-import json
+import os
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Tuple, Union
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, Query
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import ValidationError
 import uvicorn
 
-from src.models import Event, PublishRequest, PublishResponse, Stats, EventsResponse
+from src.models import (
+    Event,
+    PublishRequest,
+    PublishResponse,
+    Stats,
+    EventsResponse,
+    TopicsResponse,
+    format_timestamp_us,
+    parse_timestamp_us,
+)
 from src.dedup_store import DedupStore
+from src.partitioned_store import PartialClaimError, PartitionedDedupStore
+from src.retention import RetentionPolicy
+from src.ingest_queue import ADMISSION_MODES, IngestQueue
+from src.ingest_log import IngestLog
+from src.json_codec import JsonCodec
+from src.event_validation import (
+    VALIDATION_MODES,
+    EventValidationError,
+    validate_publish_body,
+)
 from src.config import Config
 
 # Setup logging
@@ -18,72 +39,387 @@ logging.basicConfig(level=Config.get_log_level(), format=Config.LOG_FORMAT)
 logger = logging.getLogger(__name__)
 
 # Global variables
-dedup_store: Optional[DedupStore] = None
-event_queue: Optional[asyncio.Queue] = None
+dedup_store: Optional[Union[DedupStore, PartitionedDedupStore]] = None
+event_queue: Optional[IngestQueue] = None
 start_time: datetime = datetime.utcnow()
-consumer_task: Optional[asyncio.Task] = None
+consumer_tasks: List[asyncio.Task] = []
+stats_flush_task: Optional[asyncio.Task] = None
+retention_task: Optional[asyncio.Task] = None
+ingest_log: Optional[IngestLog] = None
+checkpoint_task: Optional[asyncio.Task] = None
+# True selama shutdown: /publish menolak event baru
+draining = False
+# Event yang ditulis ke DEAD_LETTER_PATH setelah retry habis
+dead_lettered = 0
+json_codec = JsonCodec(Config.JSON_CODEC)
+
+# Baris siap simpan: (topic, event_id, timestamp_us, source, payload_json).
+# Payload di-encode sekali di /publish lalu diteruskan apa adanya ke ingest
+# log, dedup store dan response GET /events; timestamp sudah dinormalisasi
+# ke epoch mikrodetik UTC
+EventRow = Tuple[str, str, int, str, str]
+# Item queue: (LSN di ingest log atau None jika log nonaktif, baris event)
+QueuedEvent = Tuple[Optional[int], EventRow]
+
+
+def event_to_row(event: Event) -> EventRow:
+    """
+    Bentuk baris siap simpan dari event yang sudah divalidasi.
 
+    Args:
+        event: Event dari request /publish
 
-async def event_consumer():
+    Returns:
+        Tuple (topic, event_id, timestamp_us, source, payload_json)
     """
-    Background consumer yang memproses event dari queue.
+    return (
+        event.topic,
+        event.event_id,
+        event.timestamp_us,
+        event.source,
+        json_codec.dumps(event.payload),
+    )
 
-    Consumer ini berjalan terus-menerus dan:
-    1. Mengambil event dari queue
-    2. Check apakah event duplikat
-    3. Jika tidak duplikat, mark sebagai processed
-    4. Update statistik
 
-    Implementasi idempotency dan deduplication.
+def encode_log_record(row: EventRow) -> bytes:
     """
-    logger.info("Event consumer started")
+    Serialisasi baris event untuk ingest log: field string sebagai JSON
+    array, newline, lalu payload JSON apa adanya (tanpa encode ulang).
 
-    while True:
+    Args:
+        row: Baris event
+
+    Returns:
+        Record ingest log
+    """
+    return json_codec.encode(row[:4]) + b"\n" + row[4].encode("utf-8")
+
+
+def decode_log_record(data: bytes) -> EventRow:
+    """
+    Kebalikan encode_log_record (untuk replay).
+
+    Args:
+        data: Record ingest log
+
+    Returns:
+        Baris event
+    """
+    # JSON compact tidak pernah berisi newline literal
+    header, payload = data.split(b"\n", 1)
+    topic, event_id, timestamp, source = json_codec.loads(header)
+    if isinstance(timestamp, str):
+        # Record yang ditulis sebelum timestamp disimpan sebagai epoch us
+        timestamp = parse_timestamp_us(timestamp)
+    return topic, event_id, timestamp, source, payload.decode("utf-8")
+
+
+async def collect_batch(batch: List[QueuedEvent], worker: int = 0):
+    """
+    Isi satu batch event dari shard queue milik worker.
+
+    Menunggu event pertama tanpa batas waktu, lalu mengumpulkan event
+    berikutnya sampai BATCH_PROCESS_SIZE tercapai atau PROCESS_INTERVAL habis.
+    Batch diisi in-place agar event yang sudah diambil tidak hilang jika
+    consumer di-cancel saat menunggu.
+
+    Args:
+        batch: List kosong yang akan diisi event
+        worker: Index consumer (= index shard queue)
+    """
+    loop = asyncio.get_running_loop()
+    batch.extend(await event_queue.get(Config.BATCH_PROCESS_SIZE, worker))
+    deadline = loop.time() + Config.PROCESS_INTERVAL
+
+    while len(batch) < Config.BATCH_PROCESS_SIZE:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
         try:
-            # Get event from queue
-            event: Event = await event_queue.get()
-
-            # Check if duplicate
-            is_dup = await dedup_store.is_duplicate(event.topic, event.event_id)
-
-            if is_dup:
-                # Event sudah pernah diproses, drop
-                await dedup_store.increment_duplicate_dropped()
-                logger.warning(
-                    f"DUPLICATE DROPPED - topic: {event.topic}, "
-                    f"event_id: {event.event_id}, source: {event.source}"
+            batch.extend(
+                await asyncio.wait_for(
+                    event_queue.get(Config.BATCH_PROCESS_SIZE - len(batch), worker),
+                    remaining,
                 )
-            else:
-                # Event baru, process
-                payload_json = json.dumps(event.payload)
-                success = await dedup_store.mark_processed(
-                    event.topic,
-                    event.event_id,
-                    event.timestamp,
-                    event.source,
-                    payload_json,
+            )
+        except asyncio.TimeoutError:
+            break
+
+
+async def claim_with_retry(batch: List[EventRow], worker: int = 0) -> List[bool]:
+    """
+    try_claim dengan retry dan exponential backoff untuk error sementara.
+
+    Jika hanya sebagian partisi yang gagal (PartialClaimError), hanya event di
+    partisi tersebut yang di-retry; event yang sudah ter-commit tidak di-claim
+    ulang (akan terhitung duplikat).
+
+    Args:
+        batch: Baris event
+        worker: Index consumer (untuk log)
+
+    Returns:
+        Hasil try_claim
+
+    Raises:
+        PartialClaimError: Jika semua PROCESS_RETRIES retry gagal; results
+            berisi None untuk event yang belum tersimpan
+    """
+    results: List[Optional[bool]] = [None] * len(batch)
+    pending = list(range(len(batch)))
+    backoff = Config.PROCESS_RETRY_BACKOFF
+    for attempt in range(Config.PROCESS_RETRIES + 1):
+        try:
+            claimed = await dedup_store.try_claim([batch[i] for i in pending])
+        except PartialClaimError as e:
+            for i, is_new in zip(pending, e.results):
+                results[i] = is_new
+            pending = [i for i in pending if results[i] is None]
+            error = e.error
+        except Exception as e:
+            error = e
+        else:
+            for i, is_new in zip(pending, claimed):
+                results[i] = is_new
+            return results
+
+        if attempt == Config.PROCESS_RETRIES:
+            raise PartialClaimError(results, error) from error
+        logger.warning(
+            f"Worker {worker} batch failed (attempt {attempt + 1}, "
+            f"{len(pending)} event(s) pending): {error}; "
+            f"retrying in {backoff:.2f}s"
+        )
+        await asyncio.sleep(backoff)
+        backoff = min(backoff * 2, Config.PROCESS_RETRY_BACKOFF_MAX)
+
+
+def write_dead_letter(batch: List[EventRow]):
+    """
+    Append batch ke DEAD_LETTER_PATH sebagai NDJSON event (bisa di-POST ulang
+    ke /publish), lalu fsync.
+
+    Args:
+        batch: Baris event yang gagal disimpan
+    """
+    with open(Config.DEAD_LETTER_PATH, "a", encoding="utf-8") as f:
+        f.writelines(ndjson_line(row) for row in batch)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+async def process_batch(batch: List[QueuedEvent], worker: int = 0):
+    """
+    Proses satu batch event: dedup, simpan, update statistik, lalu ack queue.
+
+    Setelah batch tersimpan, LSN-nya di-ack ke ingest log. Batch yang tetap
+    gagal setelah retry ditulis ke dead-letter lalu di-ack, agar checkpoint
+    ingest log tidak tertahan; jika dead-letter juga gagal, event-nya ditulis
+    ke log error (format NDJSON dead-letter) lalu tetap di-ack.
+
+    Args:
+        batch: List (lsn, event) yang akan diproses
+        worker: Index consumer (= index shard queue)
+    """
+    global dead_lettered
+
+    lsns = [lsn for lsn, _ in batch if lsn is not None]
+    batch = [row for _, row in batch]
+    try:
+        try:
+            results = await claim_with_retry(batch, worker)
+        except PartialClaimError as e:
+            # Event di partisi yang sudah ter-commit tidak ikut dead-letter
+            failed = [row for row, is_new in zip(batch, e.results) if is_new is None]
+            logger.error(
+                f"Worker {worker} batch failed after {Config.PROCESS_RETRIES} "
+                f"retries, writing {len(failed)} event(s) to dead letter "
+                f"{Config.DEAD_LETTER_PATH}: {e}",
+                exc_info=True,
+            )
+            try:
+                await asyncio.to_thread(write_dead_letter, failed)
+                dead_lettered += len(failed)
+            except Exception as dead_letter_error:
+                # Tanpa ack checkpoint ingest log tertahan selamanya; log error
+                # menjadi satu-satunya salinan event
+                logger.critical(
+                    f"Worker {worker} failed to write {len(failed)} event(s) to "
+                    f"dead letter {Config.DEAD_LETTER_PATH}: {dead_letter_error}; "
+                    f"dropping:\n" + "".join(ndjson_line(row) for row in failed),
+                    exc_info=True,
                 )
+            if ingest_log is not None and lsns:
+                ingest_log.ack(lsns)
+            return
+
+        if ingest_log is not None and lsns:
+            ingest_log.ack(lsns)
 
-                if success:
-                    await dedup_store.increment_unique_processed()
+        if Config.ENABLE_DETAILED_LOGGING:
+            for (topic, event_id, _, source, _), is_new in zip(batch, results):
+                if is_new:
                     logger.info(
-                        f"EVENT PROCESSED - topic: {event.topic}, "
-                        f"event_id: {event.event_id}, source: {event.source}"
+                        f"EVENT PROCESSED - topic: {topic}, "
+                        f"event_id: {event_id}, source: {source}"
                     )
                 else:
-                    # Race condition: event sudah diproses saat kita check
-                    await dedup_store.increment_duplicate_dropped()
                     logger.warning(
-                        f"DUPLICATE DETECTED (race) - topic: {event.topic}, "
-                        f"event_id: {event.event_id}"
+                        f"DUPLICATE DROPPED - topic: {topic}, "
+                        f"event_id: {event_id}, source: {source}"
                     )
 
-            # Mark task as done
-            event_queue.task_done()
+        unique_count = sum(results)
+        logger.info(
+            f"Worker {worker} batch processed: {len(batch)} event(s), "
+            f"{unique_count} unique, {len(batch) - unique_count} duplicate"
+        )
+
+    except Exception as e:
+        logger.error(f"Error in event consumer: {str(e)}", exc_info=True)
+        await asyncio.sleep(0.1)
+
+    finally:
+        # Ack seluruh batch
+        event_queue.task_done(len(batch), worker)
+
+
+async def event_consumer(worker: int = 0):
+    """
+    Background consumer yang memproses event dari satu shard queue.
+
+    Setiap worker berjalan terus-menerus dan:
+    1. Mengambil batch event dari shard-nya (BATCH_PROCESS_SIZE / PROCESS_INTERVAL)
+    2. Insert seluruh batch dalam satu transaksi (ON CONFLICT DO NOTHING)
+    3. Event yang konflik dihitung sebagai duplikat dan di-drop
+    4. Update statistik sekali per batch, lalu ack queue
+
+    Event di-shard berdasarkan hash topic, jadi satu topic selalu diproses
+    oleh worker yang sama: urutan per topic terjaga dan dua worker tidak
+    pernah memproses key (topic, event_id) yang sama bersamaan.
+
+    Args:
+        worker: Index consumer (= index shard queue)
+    """
+    logger.info(f"Event consumer {worker} started")
+
+    while True:
+        batch: List[QueuedEvent] = []
+        try:
+            await collect_batch(batch, worker)
+        except asyncio.CancelledError:
+            # Jangan buang event yang sudah diambil dari queue
+            if batch:
+                await process_batch(batch, worker)
+            raise
+
+        # Cancel (deadline drain) tidak memotong batch yang sedang diproses:
+        # ack LSN dan update counter tetap selesai sebelum consumer berhenti
+        processing = asyncio.create_task(process_batch(batch, worker))
+        try:
+            await asyncio.shield(processing)
+        except asyncio.CancelledError:
+            await processing
+            raise
+
+
+async def stats_flusher():
+    """
+    Background task yang flush counter in-memory ke database secara periodik.
+    """
+    while True:
+        await asyncio.sleep(Config.STATS_FLUSH_INTERVAL)
+        try:
+            await dedup_store.flush_stats()
+        except Exception as e:
+            logger.error(f"Error flushing stats: {str(e)}", exc_info=True)
+
+
+async def drain_queue(timeout: float) -> dict:
+    """
+    Stop admission lalu proses sisa queue lewat consumer sampai deadline,
+    kemudian hentikan consumer.
+
+    Args:
+        timeout: Batas waktu (detik) menunggu queue kosong
+
+    Returns:
+        Dictionary drained (event yang diproses selama drain), remaining
+        (event yang masih di queue) dan elapsed_seconds
+    """
+    global draining
+    draining = True
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    processed_before = event_queue.processed()
+    if event_queue.qsize():
+        logger.info(
+            f"Draining {event_queue.qsize()} queued event(s) "
+            f"(deadline {timeout}s)"
+        )
+    try:
+        await asyncio.wait_for(event_queue.join(), timeout)
+    except asyncio.TimeoutError:
+        logger.warning(
+            f"Drain deadline reached with {event_queue.qsize()} event(s) queued"
+        )
+
+    # Consumer yang idle di collect_batch langsung berhenti; consumer yang
+    # sedang memegang atau memproses batch menyelesaikannya dulu
+    for task in consumer_tasks:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    return {
+        "drained": event_queue.processed() - processed_before,
+        "remaining": event_queue.qsize(),
+        "elapsed_seconds": round(loop.time() - started, 3),
+    }
+
+
+async def ingest_log_checkpointer():
+    """
+    Background task yang memajukan checkpoint ingest log secara periodik.
+
+    LSN target diambil sebelum dedup store di-checkpoint, sehingga record
+    hanya dibuang setelah event-nya durable di database.
+    """
+    while True:
+        await asyncio.sleep(Config.INGEST_LOG_CHECKPOINT_INTERVAL)
+        try:
+            await checkpoint_ingest_log()
+        except Exception as e:
+            logger.error(f"Error checkpointing ingest log: {str(e)}", exc_info=True)
+
 
+async def checkpoint_ingest_log():
+    """
+    Checkpoint dedup store lalu ingest log sampai LSN yang sudah di-ack.
+    """
+    target = ingest_log.ackable_lsn
+    if target <= ingest_log.stats()["checkpoint"]:
+        return
+    await dedup_store.checkpoint()
+    await ingest_log.checkpoint(target)
+
+
+async def retention_worker():
+    """
+    Background task yang menjalankan compaction retention secara periodik.
+    Compaction berjalan per chunk di writer thread, jadi consumer tetap jalan.
+    """
+    while True:
+        await asyncio.sleep(Config.RETENTION_INTERVAL)
+        try:
+            await dedup_store.compact()
         except Exception as e:
-            logger.error(f"Error in event consumer: {str(e)}", exc_info=True)
-            await asyncio.sleep(0.1)
+            logger.error(
+                f"Error running retention compaction: {str(e)}", exc_info=True
+            )
 
 
 @asynccontextmanager
@@ -92,22 +428,104 @@ async def lifespan(app: FastAPI):
     Lifespan context manager untuk startup dan shutdown.
     """
     # Startup
-    global dedup_store, event_queue, consumer_task, start_time
+    global dedup_store, event_queue, consumer_tasks, stats_flush_task, start_time
+    global retention_task, ingest_log, checkpoint_task, draining
 
     logger.info("Starting Pub-Sub Log Aggregator...")
     Config.print_config()
-
-    # Initialize dedup store
-    dedup_store = DedupStore(db_path=Config.DB_PATH)
+    if Config.VALIDATION_MODE not in VALIDATION_MODES:
+        raise ValueError(
+            f"Unknown VALIDATION_MODE: {Config.VALIDATION_MODE} "
+            f"(available: {', '.join(VALIDATION_MODES)})"
+        )
+    if Config.ADMISSION_MODE not in ADMISSION_MODES:
+        raise ValueError(
+            f"Unknown ADMISSION_MODE: {Config.ADMISSION_MODE} "
+            f"(available: {', '.join(ADMISSION_MODES)})"
+        )
+    draining = False
+
+    # Initialize dedup store (satu file, atau beberapa partisi)
+    store_kwargs = dict(
+        reader_pool_size=Config.DB_READER_POOL_SIZE,
+        statement_cache_size=Config.DB_STATEMENT_CACHE_SIZE,
+        durability=Config.DB_DURABILITY,
+        bloom_filter=Config.BLOOM_FILTER_ENABLED,
+        bloom_initial_capacity=Config.BLOOM_INITIAL_CAPACITY,
+        bloom_error_rate=Config.BLOOM_ERROR_RATE,
+        recent_cache_size=Config.RECENT_CACHE_SIZE,
+        recent_cache_ttl=Config.RECENT_CACHE_TTL,
+        shared=Config.WORKERS > 1,
+        write_retries=Config.DB_WRITE_RETRIES,
+        retry_backoff=Config.DB_RETRY_BACKOFF,
+        retry_backoff_max=Config.DB_RETRY_BACKOFF_MAX,
+        retention=RetentionPolicy.from_config(
+            Config.RETENTION_PAYLOAD_TTL,
+            Config.RETENTION_DEDUP_WINDOW,
+            Config.RETENTION_TOPIC_POLICIES,
+        ),
+        retention_chunk_size=Config.RETENTION_CHUNK_SIZE,
+        vacuum_pages=Config.RETENTION_VACUUM_PAGES,
+        key_mode=Config.DB_KEY_MODE,
+        payload_compression=Config.PAYLOAD_COMPRESSION,
+        payload_compression_level=Config.PAYLOAD_COMPRESSION_LEVEL,
+        payload_min_size=Config.PAYLOAD_MIN_SIZE,
+        payload_dictionary_samples=Config.PAYLOAD_DICTIONARY_SAMPLES,
+    )
+    if Config.DB_PARTITIONS > 1:
+        dedup_store = PartitionedDedupStore(
+            db_path=Config.DB_PATH, partitions=Config.DB_PARTITIONS, **store_kwargs
+        )
+    else:
+        dedup_store = DedupStore(db_path=Config.DB_PATH, **store_kwargs)
     logger.info("Dedup store initialized")
 
     # Initialize event queue
-    event_queue = asyncio.Queue(maxsize=Config.QUEUE_MAX_SIZE)
+    event_queue = IngestQueue(
+        maxsize=Config.QUEUE_MAX_SIZE,
+        high_watermark=int(Config.QUEUE_MAX_SIZE * Config.QUEUE_HIGH_WATERMARK),
+        low_watermark=int(Config.QUEUE_MAX_SIZE * Config.QUEUE_LOW_WATERMARK),
+        shards=Config.CONSUMER_WORKERS,
+        shard_key=lambda item: item[1][0],
+    )
     logger.info(f"Event queue initialized with max size: {Config.QUEUE_MAX_SIZE}")
 
-    # Start consumer task
-    consumer_task = asyncio.create_task(event_consumer())
-    logger.info("Event consumer task started")
+    # Ingest log: replay event yang diterima tapi belum tersimpan sebelum crash.
+    # Log per proses, jadi hanya didukung dengan satu proses uvicorn
+    ingest_log = None
+    if Config.INGEST_LOG_DIR and Config.WORKERS > 1:
+        logger.warning("INGEST_LOG_DIR is ignored when WORKERS > 1")
+    elif Config.INGEST_LOG_DIR:
+        ingest_log = IngestLog(
+            Config.INGEST_LOG_DIR,
+            segment_bytes=Config.INGEST_LOG_SEGMENT_BYTES,
+            group_commit_delay=Config.INGEST_LOG_GROUP_COMMIT_DELAY,
+            fsync=Config.INGEST_LOG_FSYNC,
+        )
+        replay = [(lsn, decode_log_record(data)) for lsn, data in ingest_log.replay()]
+        if replay:
+            # Queue masih kosong, jadi batch sebesar apa pun langsung diterima
+            await event_queue.put_batch(replay)
+            logger.info(f"Replaying {len(replay)} event(s) from ingest log")
+
+    # Start consumer pool, satu worker per shard
+    consumer_tasks = [
+        asyncio.create_task(event_consumer(worker))
+        for worker in range(Config.CONSUMER_WORKERS)
+    ]
+    logger.info(f"{len(consumer_tasks)} event consumer task(s) started")
+
+    # Start stats flush task
+    stats_flush_task = asyncio.create_task(stats_flusher())
+
+    # Start retention task (hanya jika ada TTL yang diset)
+    retention_task = None
+    if dedup_store.get_retention_stats() is not None:
+        retention_task = asyncio.create_task(retention_worker())
+
+    checkpoint_task = None
+    if ingest_log is not None:
+        checkpoint_task = asyncio.create_task(ingest_log_checkpointer())
 
     # Record start time
     start_time = datetime.utcnow()
@@ -119,18 +537,45 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down application...")
 
-    # Cancel consumer task
-    if consumer_task:
-        consumer_task.cancel()
-        try:
-            await consumer_task
-        except asyncio.CancelledError:
-            pass
+    # Drain: tolak /publish baru dan proses sisa queue sampai deadline
+    report = await drain_queue(Config.SHUTDOWN_DRAIN_TIMEOUT)
+
+    # Cancel stats flush, retention dan checkpoint task
+    for task in (stats_flush_task, retention_task, checkpoint_task):
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
 
-    # Close dedup store
+    # Flush counter terakhir, checkpoint database dan ingest log lalu close.
+    # Event yang belum tersimpan tetap di ingest log dan di-replay saat start
     if dedup_store:
+        await dedup_store.flush_stats()
+        if ingest_log is not None:
+            target = ingest_log.ackable_lsn
+            await dedup_store.checkpoint()
+            await ingest_log.checkpoint(target)
+            spilled = ingest_log.unacked
+            ingest_log.close()
+        else:
+            await dedup_store.checkpoint()
+            spilled = 0
         dedup_store.close()
 
+        lost = report["remaining"] if ingest_log is None else 0
+        logger.info(
+            f"Drain complete in {report['elapsed_seconds']}s: "
+            f"{report['drained']} event(s) drained, "
+            f"{spilled} spilled to ingest log"
+        )
+        if lost:
+            logger.error(
+                f"{lost} queued event(s) lost on shutdown "
+                f"(set INGEST_LOG_DIR to keep them)"
+            )
+
     logger.info("✓ Application shutdown complete")
 
 
@@ -155,6 +600,8 @@ async def root():
         "endpoints": {
             "publish": "POST /publish",
             "events": "GET /events",
+            "events_stream": "GET /events/stream",
+            "topics": "GET /topics",
             "stats": "GET /stats",
             "health": "GET /health",
         },
@@ -169,15 +616,108 @@ async def health_check():
     uptime = (datetime.utcnow() - start_time).total_seconds()
 
     return {
-        "status": "healthy",
+        "status": "draining" if draining else "healthy",
         "uptime_seconds": uptime,
         "queue_size": event_queue.qsize() if event_queue else 0,
+        "workers": len(consumer_tasks),
+        "admission": {
+            "mode": Config.ADMISSION_MODE,
+            "shedding": event_queue.shedding if event_queue else False,
+            "rejected": event_queue.rejected if event_queue else 0,
+            "drain_rate": event_queue.drain_rate() if event_queue else 0.0,
+        },
+        "durability": {
+            "profile": dedup_store.durability if dedup_store else None,
+            "journal_mode": dedup_store.journal_mode if dedup_store else None,
+        },
+        "schema_version": dedup_store.schema_version if dedup_store else 0,
+        "ingest_log": ingest_log.stats() if ingest_log else None,
+        "dead_lettered": dead_lettered,
+        "process": {
+            "pid": os.getpid(),
+            "workers": Config.WORKERS,
+            "write_retries": dedup_store.write_retry_count if dedup_store else 0,
+        },
         "timestamp": datetime.utcnow().isoformat(),
     }
 
 
-@app.post("/publish", response_model=PublishResponse)
-async def publish_events(request: PublishRequest):
+# Schema body /publish untuk OpenAPI (body tidak dideklarasikan sebagai
+# parameter); Event sudah ada di components lewat EventsResponse
+PUBLISH_REQUEST_SCHEMA = {
+    key: value
+    for key, value in PublishRequest.model_json_schema(
+        ref_template="#/components/schemas/{model}"
+    ).items()
+    if key != "$defs"
+}
+
+
+def body_errors(errors: List[dict]) -> RequestValidationError:
+    """Error validasi dengan loc diawali "body", seperti validasi FastAPI."""
+    return RequestValidationError(
+        [{**error, "loc": ("body", *error["loc"])} for error in errors]
+    )
+
+
+async def parse_publish_request(request: Request) -> list:
+    """
+    Decode body /publish dengan json_codec lalu validasi sesuai
+    VALIDATION_MODE: strict (model pydantic PublishRequest) atau fast
+    (validate_publish_body, aturan sama tanpa pydantic).
+
+    Args:
+        request: Request /publish
+
+    Returns:
+        List Event (strict) atau FastEvent (fast); keduanya punya atribut
+        yang sama termasuk timestamp_us
+
+    Raises:
+        RequestValidationError: Jika body bukan JSON atau event tidak valid
+    """
+    body = await request.body()
+    if not body:
+        raise body_errors(
+            [{"type": "missing", "loc": (), "msg": "Field required", "input": None}]
+        )
+    try:
+        data = json_codec.loads(body)
+    except ValueError as e:
+        raise body_errors(
+            [
+                {
+                    "type": "json_invalid",
+                    "loc": (getattr(e, "pos", 0),),
+                    "msg": "JSON decode error",
+                    "input": {},
+                    "ctx": {"error": str(e)},
+                }
+            ]
+        )
+
+    if Config.VALIDATION_MODE == "fast":
+        try:
+            return validate_publish_body(data)
+        except EventValidationError as e:
+            raise body_errors(e.errors)
+    try:
+        return PublishRequest.model_validate(data).events
+    except ValidationError as e:
+        raise body_errors(e.errors(include_url=False))
+
+
+@app.post(
+    "/publish",
+    response_model=PublishResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": PUBLISH_REQUEST_SCHEMA}},
+        }
+    },
+)
+async def publish_events(request: Request, response: Response):
     """
     Endpoint untuk publish event (single atau batch).
 
@@ -188,84 +728,202 @@ async def publish_events(request: PublishRequest):
     - source: sumber event
     - payload: data event (dict)
 
+    Body di-parse sendiri (bukan oleh FastAPI) agar bisa memakai json_codec
+    dan validasi fast path (VALIDATION_MODE=fast).
+
     Sistem akan:
     1. Validasi semua event
-    2. Masukkan ke queue untuk diproses
+    2. Masukkan seluruh batch ke queue sebagai satu unit
     3. Consumer akan handle idempotency dan deduplication
 
+    Selama shutdown (drain) semua request ditolak 503.
+    Jika queue melewati high watermark (ADMISSION_MODE reject/partial),
+    request ditolak 503 dengan header Retry-After, atau pada mode partial
+    hanya bagian awal batch yang diterima (lihat field accepted).
+
     Returns:
         PublishResponse dengan status dan jumlah event yang diterima
     """
-    if not request.events:
+    events = await parse_publish_request(request)
+    if not events:
         raise HTTPException(status_code=400, detail="Event list tidak boleh kosong")
+    if draining:
+        raise HTTPException(
+            status_code=503,
+            detail="Service is shutting down, please retry",
+            headers={"Retry-After": "1"},
+        )
 
-    received_count = len(request.events)
+    received_count = len(events)
 
-    # Put events ke queue
-    for event in request.events:
-        try:
-            await event_queue.put(event)
-            await dedup_store.increment_received()
+    # Payload di-encode sekali di sini; ingest log dan consumer memakai hasilnya
+    rows = [event_to_row(event) for event in events]
 
-            if Config.ENABLE_DETAILED_LOGGING:
-                logger.debug(
-                    f"Event received - topic: {event.topic}, "
-                    f"event_id: {event.event_id}, source: {event.source}"
-                )
-        except asyncio.QueueFull:
-            logger.error("Event queue is full!")
+    # Catat di ingest log dulu agar setiap item queue membawa LSN-nya (ditulis
+    # ke disk oleh group commit di bawah, bukan di event loop)
+    if ingest_log is not None:
+        lsns = ingest_log.append([encode_log_record(row) for row in rows])
+    else:
+        lsns = [None] * received_count
+    items = list(zip(lsns, rows))
+
+    # Seluruh batch masuk queue sebagai satu unit dan dihitung sekali
+    queued = 0
+    try:
+        if Config.ADMISSION_MODE == "block":
+            await event_queue.put_batch(items)
+            accepted_count = received_count
+        else:
+            accepted_count = await event_queue.try_put_batch(
+                items, allow_partial=Config.ADMISSION_MODE == "partial"
+            )
+        queued = accepted_count
+        if ingest_log is not None:
+            # Event yang ditolak tidak perlu di-replay
+            ingest_log.ack(lsns[accepted_count:])
+            if accepted_count:
+                # Group commit: fsync dibagi dengan request lain yang bersamaan
+                await ingest_log.commit(lsns[accepted_count - 1])
+        await dedup_store.increment_received(accepted_count)
+    except BaseException as e:
+        # Error atau cancel (client putus saat menunggu queue): LSN yang tidak
+        # sampai ke queue tidak pernah di-ack consumer dan akan menahan
+        # checkpoint, lalu di-replay padahal client menerima error
+        if ingest_log is not None:
+            ingest_log.ack(lsns[queued:])
+        if not isinstance(e, Exception):
+            raise
+        logger.error(f"Error adding events to queue: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
+
+    if accepted_count < received_count:
+        retry_after = str(event_queue.retry_after(Config.RETRY_AFTER_MAX))
+        logger.warning(
+            f"Load shedding: accepted {accepted_count}/{received_count} event(s), "
+            f"queue size {event_queue.qsize()}, retry after {retry_after}s"
+        )
+        if accepted_count == 0:
             raise HTTPException(
-                status_code=503, detail="Event queue is full, please try again later"
+                status_code=503,
+                detail="Event queue is full, please try again later",
+                headers={"Retry-After": retry_after},
             )
-        except Exception as e:
-            logger.error(f"Error adding event to queue: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
+        response.headers["Retry-After"] = retry_after
 
-    logger.info(f"Received {received_count} event(s) for processing")
+    if Config.ENABLE_DETAILED_LOGGING and logger.isEnabledFor(logging.DEBUG):
+        for event in events[:accepted_count]:
+            logger.debug(
+                f"Event received - topic: {event.topic}, "
+                f"event_id: {event.event_id}, source: {event.source}"
+            )
+
+    logger.info(f"Received {accepted_count} event(s) for processing")
+
+    if accepted_count < received_count:
+        return PublishResponse(
+            status="partial",
+            received=received_count,
+            accepted=accepted_count,
+            message=(
+                f"Accepted {accepted_count} of {received_count} event(s); "
+                f"retry the remaining {received_count - accepted_count} event(s)"
+            ),
+        )
 
     return PublishResponse(
         status="accepted",
         received=received_count,
+        accepted=accepted_count,
         message=f"Successfully received {received_count} event(s) for processing",
     )
 
 
 @app.get("/events", response_model=EventsResponse)
-async def get_events(topic: Optional[str] = Query(None, description="Filter by topic")):
+async def get_events(
+    topic: Optional[str] = Query(None, description="Filter by topic"),
+    limit: int = Query(
+        Config.EVENTS_PAGE_SIZE,
+        ge=1,
+        le=Config.EVENTS_PAGE_MAX,
+        description="Jumlah event per halaman",
+    ),
+    cursor: Optional[str] = Query(
+        None, description="next_cursor dari halaman sebelumnya"
+    ),
+    since: Optional[str] = Query(
+        None, description="Hanya event yang diproses sejak waktu ini (ISO8601)"
+    ),
+    until: Optional[str] = Query(
+        None, description="Hanya event yang diproses sebelum waktu ini (ISO8601)"
+    ),
+    time_from: Optional[str] = Query(
+        None,
+        alias="from",
+        description="Hanya event dengan timestamp >= waktu ini (ISO8601)",
+    ),
+    time_to: Optional[str] = Query(
+        None,
+        alias="to",
+        description="Hanya event dengan timestamp < waktu ini (ISO8601)",
+    ),
+):
     """
     Endpoint untuk mendapatkan list event yang sudah diproses.
 
     Query parameters:
     - topic (optional): filter berdasarkan topic tertentu
+    - limit (optional): ukuran halaman (default EVENTS_PAGE_SIZE)
+    - cursor (optional): lanjutkan dari next_cursor halaman sebelumnya
+    - since / until (optional): filter waktu processed_at
+    - from / to (optional): filter waktu event (field timestamp, UTC); halaman
+      lalu diurutkan berdasarkan timestamp event, terbaru lebih dulu
+
+    Response dibentuk langsung sebagai JSON (format EventsResponse): payload
+    tersimpan disisipkan apa adanya tanpa json.loads, validasi pydantic dan
+    serialisasi ulang oleh FastAPI.
 
     Returns:
-        EventsResponse dengan list event yang sudah diproses
+        EventsResponse dengan satu halaman event (terbaru lebih dulu)
+        dan next_cursor untuk halaman berikutnya
     """
     try:
-        events_data = await dedup_store.get_events(topic=topic)
-
-        # Convert back to Event objects
-        events = []
-        for event_dict in events_data:
-            # Parse payload from JSON string
-            payload = json.loads(event_dict["payload"])
-
-            events.append(
-                Event(
-                    topic=event_dict["topic"],
-                    event_id=event_dict["event_id"],
-                    timestamp=event_dict["timestamp"],
-                    source=event_dict["source"],
-                    payload=payload,
+        events_data, next_cursor = await dedup_store.get_events_page(
+            topic=topic,
+            limit=limit,
+            cursor=cursor,
+            since=since,
+            until=until,
+            time_from=time_from,
+            time_to=time_to,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid query: {str(e)}")
+
+    try:
+        events = [
+            event_json(
+                (
+                    event["topic"],
+                    event["event_id"],
+                    event["timestamp"],
+                    event["source"],
+                    event["payload"],
                 )
             )
+            for event in events_data
+        ]
 
         logger.info(
             f"Retrieved {len(events)} event(s)"
             + (f" for topic: {topic}" if topic else "")
         )
 
-        return EventsResponse(topic=topic, total=len(events), events=events)
+        body = (
+            f'{{"topic":{json_codec.dumps(topic)},"total":{len(events)},'
+            f'"events":[{",".join(events)}],'
+            f'"next_cursor":{json_codec.dumps(next_cursor)}}}'
+        )
+        return Response(content=body, media_type="application/json")
 
     except Exception as e:
         logger.error(f"Error retrieving events: {str(e)}")
@@ -274,6 +932,107 @@ async def get_events(topic: Optional[str] = Query(None, description="Filter by t
         )
 
 
+def event_json(row: tuple) -> str:
+    """
+    Bentuk satu event JSON dari row tersimpan.
+    Payload sudah berupa JSON text di database, jadi ditulis apa adanya.
+
+    Args:
+        row: Tuple (topic, event_id, timestamp, source, payload_json),
+            timestamp sudah berupa ISO8601
+
+    Returns:
+        Object JSON event
+    """
+    topic, event_id, timestamp, source, payload = row
+    dumps = json_codec.dumps
+    return (
+        f'{{"topic":{dumps(topic)},"event_id":{dumps(event_id)},'
+        f'"timestamp":{dumps(timestamp)},"source":{dumps(source)},'
+        f'"payload":{payload}}}'
+    )
+
+
+def ndjson_line(row: tuple) -> str:
+    """
+    Bentuk satu baris NDJSON dari row tersimpan (lihat event_json).
+
+    Args:
+        row: Tuple (topic, event_id, timestamp_us, source, payload_json)
+
+    Returns:
+        Satu baris JSON diakhiri newline
+    """
+    topic, event_id, timestamp, source, payload = row
+    return (
+        event_json((topic, event_id, format_timestamp_us(timestamp), source, payload))
+        + "\n"
+    )
+
+
+@app.get("/events/stream")
+async def stream_events(
+    topic: Optional[str] = Query(None, description="Filter by topic"),
+    since: Optional[str] = Query(
+        None, description="Hanya event yang diproses sejak waktu ini (ISO8601)"
+    ),
+    until: Optional[str] = Query(
+        None, description="Hanya event yang diproses sebelum waktu ini (ISO8601)"
+    ),
+):
+    """
+    Endpoint untuk export seluruh event sebagai NDJSON (satu event per baris).
+
+    Event dibaca dari database per chunk (STREAM_CHUNK_SIZE) dan payload
+    ditulis apa adanya tanpa json.loads / validasi pydantic, sehingga memori
+    tetap konstan berapapun ukuran tabel. Urutan: terlama lebih dulu.
+
+    Returns:
+        StreamingResponse application/x-ndjson
+    """
+    try:
+        if since:
+            dedup_store.normalize_time(since)
+        if until:
+            dedup_store.normalize_time(until)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid query: {str(e)}")
+
+    async def generate():
+        count = 0
+        async for rows in dedup_store.iter_events_raw(
+            topic=topic, since=since, until=until, chunk_size=Config.STREAM_CHUNK_SIZE
+        ):
+            count += len(rows)
+            yield "".join(ndjson_line(row) for row in rows).encode("utf-8")
+        logger.info(
+            f"Streamed {count} event(s)" + (f" for topic: {topic}" if topic else "")
+        )
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+@app.get("/topics", response_model=TopicsResponse)
+async def get_topics():
+    """
+    Endpoint untuk mendapatkan breakdown per topic.
+
+    Data dibaca dari katalog topics yang di-maintain inkremental saat
+    event diproses, bukan dari scan tabel processed_events.
+
+    Returns:
+        TopicsResponse dengan event_count, duplicate_count, first_seen
+        dan last_seen per topic
+    """
+    try:
+        topics = await dedup_store.get_topics()
+        return TopicsResponse(total=len(topics), topics=topics)
+
+    except Exception as e:
+        logger.error(f"Error retrieving topics: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error retrieving topics: {str(e)}")
+
+
 @app.get("/stats", response_model=Stats)
 async def get_stats():
     """
@@ -286,6 +1045,11 @@ async def get_stats():
         - duplicate_dropped: total duplikat yang di-drop
         - topics: jumlah topic unik
         - uptime: uptime sistem dalam detik
+        - bloom_filter: statistik Bloom filter (jika aktif)
+        - recent_cache: statistik cache key yang baru diproses (jika aktif)
+        - retention: statistik compaction retention (jika aktif)
+        - payload_compression: rasio kompresi payload (jika aktif)
+        - workers: queue depth dan throughput per consumer worker
     """
     try:
         # Get stats from dedup store
@@ -299,6 +1063,11 @@ async def get_stats():
             duplicate_dropped=duplicate_dropped,
             topics=topics_count,
             uptime=uptime,
+            bloom_filter=dedup_store.get_bloom_stats(),
+            recent_cache=dedup_store.get_recent_cache_stats(),
+            retention=dedup_store.get_retention_stats(),
+            payload_compression=dedup_store.get_payload_stats(),
+            workers=event_queue.shard_stats() if event_queue else None,
         )
 
         logger.debug(f"Stats retrieved: {stats.model_dump()}")
@@ -313,8 +1082,20 @@ async def get_stats():
 def main():
     """
     Entry point untuk menjalankan aplikasi.
+
+    Dengan WORKERS > 1, uvicorn menjalankan beberapa proses yang berbagi
+    socket dan file database. Setiap proses punya queue dan consumer sendiri;
+    dedup tetap benar karena UNIQUE(topic, event_id) ditegakkan SQLite.
     """
-    logger.info(f"Starting server on {Config.HOST}:{Config.PORT}")
+    logger.info(
+        f"Starting server on {Config.HOST}:{Config.PORT} "
+        f"with {Config.WORKERS} worker process(es)"
+    )
+    if Config.WORKERS > 1 and Config.DB_DURABILITY == "strict":
+        logger.warning(
+            "DB_DURABILITY=strict uses a rollback journal; writers and readers "
+            "in different processes will block each other. Prefer balanced/fast."
+        )
 
     uvicorn.run(
         "src.main:app",
@@ -322,6 +1103,7 @@ def main():
         port=Config.PORT,
         log_level=Config.LOG_LEVEL.lower(),
         access_log=True,
+        workers=Config.WORKERS,
     )
 
 
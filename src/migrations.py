@@ -0,0 +1,537 @@
+import logging
+import sqlite3
+from datetime import datetime
+from typing import Any, Callable, List, Tuple, Union
+
+from src.models import parse_timestamp_us
+
+logger = logging.getLogger(__name__)
+
+# Satu langkah migration: SQL string atau fungsi yang menerima koneksi
+MigrationStep = Union[str, Callable[[sqlite3.Connection], None]]
+
+
+def _epoch_us(value: Any) -> Any:
+    """Konversi nilai waktu lama (ISO8601 TEXT, tanpa zona = UTC) ke epoch us."""
+    if value is None or isinstance(value, int):
+        return value
+    return parse_timestamp_us(value)
+
+
+def _migrate_epoch_us(conn: sqlite3.Connection):
+    """
+    Migration 7: bangun ulang processed_events (sesuai key mode yang aktif)
+    dan topics dengan kolom waktu INTEGER epoch mikrodetik UTC.
+
+    Kolom TEXT tidak bisa diubah in-place: affinity TEXT akan menyimpan
+    integer sebagai string lagi. id baris dan high-water mark AUTOINCREMENT
+    dipertahankan sehingga dedup key dan cursor pagination tetap valid.
+    """
+    conn.create_function("epoch_us", 1, _epoch_us, deterministic=True)
+
+    mode = get_key_mode(conn)
+    create_table, key_indexes = EPOCH_US_SCHEMAS["text" if mode == "text" else "hash"]
+    columns = EVENT_COLUMNS + ("" if mode == "text" else ", key_hash")
+    converted = columns.replace("timestamp,", "epoch_us(timestamp),").replace(
+        "processed_at,", "epoch_us(processed_at),"
+    )
+    _replace_events_table(
+        conn, create_table, columns, converted, EVENT_INDEXES + key_indexes
+    )
+
+    conn.execute(TOPICS_SCHEMA)
+    conn.execute("""
+        INSERT INTO topics_new
+        (topic, event_count, duplicate_count, first_seen, last_seen)
+        SELECT topic, event_count, duplicate_count,
+            epoch_us(first_seen), epoch_us(last_seen)
+        FROM topics
+    """)
+    conn.execute("DROP TABLE topics")
+    conn.execute("ALTER TABLE topics_new RENAME TO topics")
+
+
+def _migrate_event_keys(conn: sqlite3.Connection):
+    """
+    Migration 8: database key mode hash64/hash128 memindahkan fingerprint
+    dari kolom key_hash (index non-unique idx_key_hash) ke tabel event_keys,
+    lalu kolom dan index lama dihapus.
+    """
+    if get_key_mode(conn) == "text":
+        return
+    _fill_event_keys(conn, "e.key_hash")
+    conn.execute("DROP INDEX idx_key_hash")
+    conn.execute("ALTER TABLE processed_events DROP COLUMN key_hash")
+
+
+# Daftar migration schema dedup store, berurutan berdasarkan versi.
+# Migration yang sudah dirilis tidak boleh diubah; tambahkan versi baru.
+MIGRATIONS: List[Tuple[int, str, List[MigrationStep]]] = [
+    (
+        1,
+        "initial schema",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS processed_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                topic TEXT NOT NULL,
+                event_id TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                source TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                processed_at TEXT NOT NULL,
+                UNIQUE(topic, event_id)
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_topic_event
+            ON processed_events(topic, event_id)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_topic
+            ON processed_events(topic)
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS stats (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                received INTEGER DEFAULT 0,
+                unique_processed INTEGER DEFAULT 0,
+                duplicate_dropped INTEGER DEFAULT 0
+            )
+            """,
+            """
+            INSERT OR IGNORE INTO stats (id, received, unique_processed, duplicate_dropped)
+            VALUES (1, 0, 0, 0)
+            """,
+        ],
+    ),
+    (
+        2,
+        "processed_at indexes, drop redundant idx_topic_event",
+        [
+            # (topic, processed_at, rowid) melayani filter topic + ORDER BY
+            # processed_at + range waktu sekaligus; idx_topic jadi prefix-nya
+            """
+            CREATE INDEX IF NOT EXISTS idx_topic_processed_at
+            ON processed_events(topic, processed_at)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_processed_at
+            ON processed_events(processed_at)
+            """,
+            # Duplikat index implisit UNIQUE(topic, event_id)
+            "DROP INDEX IF EXISTS idx_topic_event",
+            "DROP INDEX IF EXISTS idx_topic",
+        ],
+    ),
+    (
+        3,
+        "topics catalog",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS topics (
+                topic TEXT PRIMARY KEY,
+                event_count INTEGER NOT NULL DEFAULT 0,
+                duplicate_count INTEGER NOT NULL DEFAULT 0,
+                first_seen TEXT NOT NULL,
+                last_seen TEXT NOT NULL
+            )
+            """,
+            # Backfill dari data yang sudah ada (duplikat lama tidak tercatat per topic)
+            """
+            INSERT OR IGNORE INTO topics
+            (topic, event_count, duplicate_count, first_seen, last_seen)
+            SELECT topic, COUNT(*), 0, MIN(processed_at), MAX(processed_at)
+            FROM processed_events
+            GROUP BY topic
+            """,
+        ],
+    ),
+    (
+        4,
+        "dedup key fingerprints for compacted events",
+        [
+            # Key event yang payload-nya sudah di-compact: hanya digest 128-bit
+            # (topic, event_id) + batas dedup window (epoch detik, NULL = selamanya)
+            """
+            CREATE TABLE IF NOT EXISTS dedup_keys (
+                fingerprint BLOB PRIMARY KEY,
+                expires_at INTEGER
+            ) WITHOUT ROWID
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_dedup_keys_expires_at
+            ON dedup_keys(expires_at)
+            """,
+        ],
+    ),
+    (
+        5,
+        "store metadata (dedup key mode)",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS store_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )
+            """,
+            "INSERT OR IGNORE INTO store_meta (key, value) VALUES ('key_mode', 'text')",
+        ],
+    ),
+    (
+        6,
+        "payload compression",
+        [
+            # Baris lama tetap plain (format 0); lihat src/payload_codec.py
+            """
+            ALTER TABLE processed_events
+            ADD COLUMN payload_format INTEGER NOT NULL DEFAULT 0
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS payload_dictionaries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                topic TEXT NOT NULL,
+                dictionary BLOB NOT NULL,
+                created_at TEXT NOT NULL
+            )
+            """,
+        ],
+    ),
+    (
+        7,
+        "timestamps as INTEGER epoch microseconds, event time indexes",
+        [_migrate_epoch_us],
+    ),
+    (
+        8,
+        "dedup key table for hash key modes",
+        [
+            # Key mode hash64/hash128: fingerprint (INTEGER 8 byte / BLOB 16
+            # byte) sebagai PRIMARY KEY, menunjuk id baris pemiliknya
+            """
+            CREATE TABLE IF NOT EXISTS event_keys (
+                key_hash NOT NULL PRIMARY KEY,
+                row_id INTEGER NOT NULL
+            ) WITHOUT ROWID
+            """,
+            # Event yang fingerprint-nya sudah dimiliki event lain (collision)
+            """
+            CREATE TABLE IF NOT EXISTS colliding_keys (
+                topic TEXT NOT NULL,
+                event_id TEXT NOT NULL,
+                row_id INTEGER NOT NULL,
+                PRIMARY KEY (topic, event_id)
+            ) WITHOUT ROWID
+            """,
+            _migrate_event_keys,
+        ],
+    ),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """
+    Get versi schema database.
+
+    Args:
+        conn: Koneksi SQLite
+
+    Returns:
+        Versi migration terakhir yang sudah diterapkan (0 jika belum ada)
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    """)
+    conn.commit()
+    row = conn.execute("SELECT MAX(version) FROM schema_migrations").fetchone()
+    return row[0] or 0
+
+
+def apply_migrations(conn: sqlite3.Connection) -> int:
+    """
+    Terapkan semua migration yang belum diterapkan.
+
+    Setiap migration berjalan dalam transaksi sendiri (BEGIN IMMEDIATE),
+    sehingga gagal di tengah tidak meninggalkan schema setengah jadi dan
+    beberapa proses yang start bersamaan tidak menerapkan migration dua kali.
+
+    Args:
+        conn: Koneksi SQLite (writer)
+
+    Returns:
+        Versi schema setelah migration
+    """
+    current = get_schema_version(conn)
+
+    for version, name, steps in MIGRATIONS:
+        if version <= current:
+            continue
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Cek ulang di dalam lock: proses lain mungkin sudah menerapkannya
+            applied = conn.execute(
+                "SELECT 1 FROM schema_migrations WHERE version = ?", (version,)
+            ).fetchone()
+            if not applied:
+                for step in steps:
+                    if callable(step):
+                        step(conn)
+                    else:
+                        conn.execute(step)
+                conn.execute(
+                    "INSERT INTO schema_migrations (version, name, applied_at) "
+                    "VALUES (?, ?, ?)",
+                    (version, name, datetime.utcnow().isoformat()),
+                )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        if not applied:
+            logger.info(f"Applied schema migration {version}: {name}")
+        current = version
+
+    return current
+
+
+# Kolom processed_events selain dedup key, urutan sama untuk semua key mode
+EVENT_COLUMNS = (
+    "id, topic, event_id, timestamp, source, payload, processed_at, payload_format"
+)
+
+# Definisi processed_events per key mode:
+# - text: UNIQUE(topic, event_id), index menyimpan kedua string penuh
+# - hash64/hash128: tanpa index key di processed_events; fingerprint
+#   (INTEGER 8 byte / BLOB 16 byte) adalah PRIMARY KEY tabel event_keys
+#   (WITHOUT ROWID) yang menunjuk id baris pemiliknya. Lookup yang menemukan
+#   fingerprint memverifikasi topic/event_id baris itu; event lain dengan
+#   fingerprint sama dicatat exact di colliding_keys (collision-safe)
+KEY_MODE_SCHEMAS = {
+    "text": """
+        CREATE TABLE processed_events_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            topic TEXT NOT NULL,
+            event_id TEXT NOT NULL,
+            timestamp INTEGER NOT NULL,
+            source TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            processed_at INTEGER NOT NULL,
+            payload_format INTEGER NOT NULL DEFAULT 0,
+            UNIQUE(topic, event_id)
+        )
+    """,
+    "hash": """
+        CREATE TABLE processed_events_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            topic TEXT NOT NULL,
+            event_id TEXT NOT NULL,
+            timestamp INTEGER NOT NULL,
+            source TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            processed_at INTEGER NOT NULL,
+            payload_format INTEGER NOT NULL DEFAULT 0
+        )
+    """,
+}
+
+# Layout processed_events yang dibangun migration 7 (CREATE TABLE, index
+# key). Mode hash saat itu masih menyimpan key_hash di processed_events;
+# migration 8 memindahkannya ke event_keys
+EPOCH_US_SCHEMAS = {
+    "text": (KEY_MODE_SCHEMAS["text"], []),
+    "hash": (
+        """
+        CREATE TABLE processed_events_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            topic TEXT NOT NULL,
+            event_id TEXT NOT NULL,
+            timestamp INTEGER NOT NULL,
+            source TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            processed_at INTEGER NOT NULL,
+            payload_format INTEGER NOT NULL DEFAULT 0,
+            key_hash NOT NULL
+        )
+        """,
+        ["CREATE INDEX idx_key_hash ON processed_events(key_hash)"],
+    ),
+}
+
+# Index yang tidak bergantung pada key mode (lihat migration 2 dan 7):
+# processed_at untuk pagination default dan retention, timestamp untuk
+# filter from/to pada waktu event
+EVENT_INDEXES = [
+    "CREATE INDEX idx_topic_processed_at ON processed_events(topic, processed_at)",
+    "CREATE INDEX idx_processed_at ON processed_events(processed_at)",
+    "CREATE INDEX idx_topic_timestamp ON processed_events(topic, timestamp)",
+    "CREATE INDEX idx_timestamp ON processed_events(timestamp)",
+]
+
+# Katalog topics dengan first_seen/last_seen epoch mikrodetik (migration 7)
+TOPICS_SCHEMA = """
+    CREATE TABLE topics_new (
+        topic TEXT PRIMARY KEY,
+        event_count INTEGER NOT NULL DEFAULT 0,
+        duplicate_count INTEGER NOT NULL DEFAULT 0,
+        first_seen INTEGER NOT NULL,
+        last_seen INTEGER NOT NULL
+    )
+"""
+
+
+def _replace_events_table(
+    conn: sqlite3.Connection,
+    create_table: str,
+    columns: str,
+    select: str,
+    indexes: List[str],
+):
+    """
+    Bangun ulang processed_events: buat processed_events_new (create_table),
+    salin baris dengan INSERT ... SELECT, ganti tabel lama, lalu buat index.
+
+    High-water mark AUTOINCREMENT di sqlite_sequence ikut dipindahkan. Tanpa
+    itu id baris yang sudah dihapus (retention) bisa dipakai lagi oleh event
+    baru, dan cursor keyset (..., id) yang sudah dibagikan melewatkan event
+    tersebut.
+
+    Args:
+        conn: Koneksi SQLite (di dalam transaksi)
+        create_table: CREATE TABLE processed_events_new
+        columns: Kolom tujuan INSERT
+        select: Ekspresi SELECT dari processed_events lama
+        indexes: CREATE INDEX untuk tabel baru
+    """
+    row = conn.execute(
+        "SELECT seq FROM sqlite_sequence WHERE name = 'processed_events'"
+    ).fetchone()
+    conn.execute(create_table)
+    conn.execute(
+        f"INSERT INTO processed_events_new ({columns}) "
+        f"SELECT {select} FROM processed_events"
+    )
+    conn.execute("DROP TABLE processed_events")
+    conn.execute("ALTER TABLE processed_events_new RENAME TO processed_events")
+    if row is not None:
+        # RENAME membawa entri tabel baru (seq = id terbesar yang disalin);
+        # tidak ada entri jika tabel kosong
+        updated = conn.execute(
+            "UPDATE sqlite_sequence SET seq = MAX(seq, ?) "
+            "WHERE name = 'processed_events'",
+            row,
+        ).rowcount
+        if not updated:
+            conn.execute(
+                "INSERT INTO sqlite_sequence (name, seq) "
+                "VALUES ('processed_events', ?)",
+                row,
+            )
+    for sql in indexes:
+        conn.execute(sql)
+
+
+def _fill_event_keys(conn: sqlite3.Connection, key_expr: str):
+    """
+    Isi ulang event_keys dan colliding_keys dari processed_events.
+
+    Baris dengan id terkecil menjadi pemilik fingerprint-nya; baris lain
+    dengan fingerprint yang sama (collision) dicatat di colliding_keys.
+
+    Args:
+        conn: Koneksi SQLite (di dalam transaksi)
+        key_expr: Ekspresi SQL fingerprint baris processed_events (alias e)
+    """
+    conn.execute("DELETE FROM event_keys")
+    conn.execute("DELETE FROM colliding_keys")
+    # WHERE true: tanpa itu ON CONFLICT dibaca sebagai bagian dari SELECT
+    conn.execute(
+        f"INSERT INTO event_keys (key_hash, row_id) "
+        f"SELECT {key_expr}, e.id FROM processed_events e WHERE true "
+        f"ORDER BY e.id ON CONFLICT(key_hash) DO NOTHING"
+    )
+    conn.execute(
+        f"INSERT INTO colliding_keys (topic, event_id, row_id) "
+        f"SELECT e.topic, e.event_id, e.id FROM processed_events e "
+        f"WHERE (SELECT k.row_id FROM event_keys k WHERE k.key_hash = {key_expr}) "
+        f"!= e.id ON CONFLICT(topic, event_id) DO NOTHING"
+    )
+
+
+def get_key_mode(conn: sqlite3.Connection) -> str:
+    """
+    Get dedup key mode yang tersimpan di database.
+
+    Args:
+        conn: Koneksi SQLite (schema sudah di-migrate)
+
+    Returns:
+        Key mode ("text", "hash64" atau "hash128")
+    """
+    row = conn.execute("SELECT value FROM store_meta WHERE key = 'key_mode'").fetchone()
+    return row[0] if row else "text"
+
+
+def set_key_mode(
+    conn: sqlite3.Connection, mode: str, key_hash: Callable[[str, str], Any]
+) -> bool:
+    """
+    Ubah dedup key mode.
+
+    Antara text dan hash64/hash128, tabel processed_events dibangun ulang
+    (UNIQUE(topic, event_id) ditambah / dihapus); antara hash64 dan hash128
+    hanya event_keys yang diisi ulang. Berjalan dalam satu transaksi
+    (BEGIN IMMEDIATE); id baris dipertahankan sehingga cursor pagination
+    tetap valid.
+
+    Args:
+        conn: Koneksi SQLite (writer)
+        mode: Key mode tujuan
+        key_hash: Fungsi (topic, event_id) -> fingerprint untuk mode tujuan
+
+    Returns:
+        True jika key mode diubah, False jika mode sudah sama
+    """
+    if get_key_mode(conn) == mode:
+        return False
+
+    conn.create_function("dedup_key_hash", 2, key_hash, deterministic=True)
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Cek ulang di dalam lock: proses lain mungkin sudah mengubahnya
+        current = get_key_mode(conn)
+        if current == mode:
+            conn.rollback()
+            return False
+
+        if mode == "text" or current == "text":
+            _replace_events_table(
+                conn,
+                KEY_MODE_SCHEMAS["text" if mode == "text" else "hash"],
+                EVENT_COLUMNS,
+                EVENT_COLUMNS,
+                EVENT_INDEXES,
+            )
+        if mode == "text":
+            conn.execute("DELETE FROM event_keys")
+            conn.execute("DELETE FROM colliding_keys")
+        else:
+            _fill_event_keys(conn, "dedup_key_hash(e.topic, e.event_id)")
+        conn.execute(
+            "UPDATE store_meta SET value = ? WHERE key = 'key_mode'", (mode,)
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    logger.info(f"Converted dedup store to key mode {mode}")
+    return True
@@ -1,8 +1,59 @@
 from pydantic import BaseModel, Field, field_validator, ConfigDict
 from typing import Dict, Any, Optional
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import uuid
 
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+ONE_MICROSECOND = timedelta(microseconds=1)
+NAIVE_EPOCH = EPOCH.replace(tzinfo=None)
+
+
+def parse_timestamp_us(value: str) -> int:
+    """
+    Parse timestamp ISO8601 menjadi epoch mikrodetik UTC.
+    Timestamp tanpa zona waktu dianggap UTC.
+
+    Args:
+        value: Timestamp ISO8601 (contoh: 2025-10-24T10:30:00Z)
+
+    Returns:
+        Mikrodetik sejak 1970-01-01T00:00:00Z
+
+    Raises:
+        ValueError: Jika bukan timestamp ISO8601
+    """
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return (parsed - EPOCH) // ONE_MICROSECOND
+
+
+def format_timestamp_us(value: int) -> str:
+    """
+    Format epoch mikrodetik UTC menjadi ISO8601 UTC dengan lebar tetap
+    (contoh: 2025-10-24T10:30:00.000000Z), sehingga urutan string sama
+    dengan urutan waktu.
+
+    Args:
+        value: Mikrodetik sejak 1970-01-01T00:00:00Z
+
+    Returns:
+        Timestamp ISO8601 UTC
+    """
+    return (NAIVE_EPOCH + value * ONE_MICROSECOND).isoformat(
+        timespec='microseconds'
+    ) + 'Z'
+
+
+class ParsedTimestamp(str):
+    """
+    String timestamp ISO8601 apa adanya, dengan hasil parse epoch mikrodetik
+    UTC (us) yang dibawa bersamanya. Dipakai validator Event agar timestamp
+    cukup di-parse sekali tanpa private attribute pydantic (yang membuat
+    validasi jauh lebih lambat).
+    """
+    __slots__ = ('us',)
+
 
 class Event(BaseModel):
     """
@@ -48,12 +99,26 @@ class Event(BaseModel):
     @classmethod
     def validate_timestamp(cls, v):
         try:
-            # Validasi format ISO8601
-            datetime.fromisoformat(v.replace('Z', '+00:00'))
+            # Validasi format ISO8601; hasil parse disimpan untuk timestamp_us
+            timestamp_us = parse_timestamp_us(v)
         except ValueError:
             raise ValueError(f"timestamp harus dalam format ISO8601: {v}")
+        v = ParsedTimestamp(v)
+        v.us = timestamp_us
         return v
 
+    @property
+    def timestamp_us(self) -> int:
+        """
+        Timestamp event dalam epoch mikrodetik UTC, hasil parse saat validasi
+        (di-parse ulang hanya jika timestamp tidak melewati validator, misalnya
+        model_construct).
+        """
+        timestamp = self.timestamp
+        if type(timestamp) is ParsedTimestamp:
+            return timestamp.us
+        return parse_timestamp_us(timestamp)
+
 
 class PublishRequest(BaseModel):
     """
@@ -83,11 +148,69 @@ class PublishResponse(BaseModel):
     """
     Response model untuk endpoint /publish
     """
-    status: str = Field(..., description="Status operasi")
-    received: int = Field(..., description="Jumlah event yang diterima")
+    status: str = Field(..., description="Status operasi (accepted / partial)")
+    received: int = Field(..., description="Jumlah event di request")
+    accepted: int = Field(..., description="Jumlah event yang masuk queue; sisanya harus di-retry")
     message: str = Field(..., description="Pesan detail")
 
 
+class BloomFilterStats(BaseModel):
+    """
+    Statistik Bloom filter di depan lookup duplikat
+    """
+    items: int = Field(..., description="Jumlah key di filter")
+    false_positive_rate: float = Field(..., description="Estimasi false positive rate saat ini")
+    memory_bytes: int = Field(..., description="Memori bit array filter (byte)")
+    skipped_lookups: int = Field(..., description="Lookup yang dijawab filter tanpa query SQLite")
+    false_positives: int = Field(..., description="Lookup yang lolos filter tapi ternyata bukan duplikat")
+
+
+class RecentCacheStats(BaseModel):
+    """
+    Statistik cache LRU key (topic, event_id) yang baru diproses
+    """
+    capacity: int = Field(..., description="Jumlah key maksimal di cache")
+    size: int = Field(..., description="Jumlah key di cache saat ini")
+    hits: int = Field(..., description="Lookup yang ditemukan di cache")
+    misses: int = Field(..., description="Lookup yang tidak ditemukan di cache")
+    evictions: int = Field(..., description="Key yang di-evict karena cache penuh")
+    expirations: int = Field(..., description="Key yang dibuang karena melewati TTL")
+
+
+class PayloadCompressionStats(BaseModel):
+    """
+    Statistik kompresi payload sejak start
+    """
+    codec: str = Field(..., description="Codec kompresi payload")
+    raw_bytes: int = Field(..., description="Total byte payload sebelum kompresi")
+    stored_bytes: int = Field(..., description="Total byte payload yang disimpan")
+    ratio: float = Field(..., description="stored_bytes / raw_bytes (< 1 = lebih kecil)")
+    dictionaries: int = Field(..., description="Jumlah topic dengan preset dictionary aktif")
+
+
+class WorkerStats(BaseModel):
+    """
+    Statistik satu consumer worker (satu shard queue)
+    """
+    worker: int = Field(..., description="Index worker / shard")
+    queue_depth: int = Field(..., description="Jumlah event yang menunggu di shard")
+    processed: int = Field(..., description="Total event yang sudah diproses worker")
+    throughput: float = Field(..., description="Event/detik dalam window terakhir")
+
+
+class RetentionStats(BaseModel):
+    """
+    Statistik retention dan compaction processed_events
+    """
+    payload_ttl: float = Field(..., description="TTL payload global (detik, 0 = selamanya)")
+    dedup_window: float = Field(..., description="Dedup window global (detik, 0 = selamanya)")
+    topic_overrides: int = Field(..., description="Jumlah topic dengan policy sendiri")
+    compacted_rows: int = Field(..., description="Baris yang sudah di-compact menjadi fingerprint")
+    expired_keys: int = Field(..., description="Fingerprint yang dihapus karena dedup window habis")
+    vacuumed_pages: int = Field(..., description="Page yang dikembalikan lewat incremental vacuum")
+    last_run: Optional[str] = Field(None, description="Waktu compaction terakhir")
+
+
 class Stats(BaseModel):
     """
     Model untuk statistik sistem
@@ -110,6 +233,11 @@ class Stats(BaseModel):
     duplicate_dropped: int = Field(default=0, description="Total duplikat yang di-drop")
     topics: int = Field(default=0, description="Jumlah topic unik")
     uptime: float = Field(default=0.0, description="Uptime sistem dalam detik")
+    bloom_filter: Optional[BloomFilterStats] = Field(None, description="Statistik Bloom filter (jika aktif)")
+    recent_cache: Optional[RecentCacheStats] = Field(None, description="Statistik cache key yang baru diproses (jika aktif)")
+    retention: Optional[RetentionStats] = Field(None, description="Statistik retention (jika aktif)")
+    payload_compression: Optional[PayloadCompressionStats] = Field(None, description="Statistik kompresi payload (jika aktif)")
+    workers: Optional[list[WorkerStats]] = Field(None, description="Statistik per consumer worker")
 
 
 class EventsResponse(BaseModel):
@@ -119,3 +247,23 @@ class EventsResponse(BaseModel):
     topic: Optional[str] = Field(None, description="Topic filter yang digunakan")
     total: int = Field(..., description="Total event yang dikembalikan")
     events: list[Event] = Field(..., description="List event")
+    next_cursor: Optional[str] = Field(None, description="Cursor untuk halaman berikutnya (None jika halaman terakhir)")
+
+
+class TopicStats(BaseModel):
+    """
+    Statistik satu topic dari katalog topics
+    """
+    topic: str = Field(..., description="Nama topic")
+    event_count: int = Field(..., description="Jumlah event unik yang diproses")
+    duplicate_count: int = Field(..., description="Jumlah duplikat yang di-drop")
+    first_seen: str = Field(..., description="Waktu event pertama diproses")
+    last_seen: str = Field(..., description="Waktu event unik terakhir diproses")
+
+
+class TopicsResponse(BaseModel):
+    """
+    Response model untuk endpoint GET /topics
+    """
+    total: int = Field(..., description="Jumlah topic")
+    topics: list[TopicStats] = Field(..., description="Breakdown per topic")
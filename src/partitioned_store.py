@@ -0,0 +1,667 @@
+import asyncio
+import base64
+import glob
+import logging
+import os
+import re
+import zlib
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple, Union
+
+from src.dedup_store import COUNTER_NAMES, DedupStore
+
+logger = logging.getLogger(__name__)
+
+# Sentinel id untuk batas keyset per partisi (id SQLite selalu 1..2^63-1)
+MIN_ROW_ID = 0
+MAX_ROW_ID = 2**63 - 1
+
+
+def partition_paths(db_path: str, partitions: int) -> List[str]:
+    """
+    Path file database untuk setiap partisi.
+
+    Jumlah partisi ikut tertulis di nama file (dedup_store.0-of-4.db), jadi
+    membuka database dengan jumlah partisi berbeda terdeteksi, bukan diam-diam
+    membaca hash yang salah.
+
+    Args:
+        db_path: Path database dasar (DB_PATH)
+        partitions: Jumlah partisi
+
+    Returns:
+        List path, satu per partisi (db_path itu sendiri jika partitions == 1)
+    """
+    if partitions == 1:
+        return [db_path]
+    root, ext = os.path.splitext(db_path)
+    return [f"{root}.{i}-of-{partitions}{ext}" for i in range(partitions)]
+
+
+def existing_partition_counts(db_path: str) -> Set[int]:
+    """
+    Cari jumlah partisi dari file partisi yang sudah ada di disk.
+
+    Args:
+        db_path: Path database dasar
+
+    Returns:
+        Set jumlah partisi (1 jika file db_path tanpa partisi ada)
+    """
+    root, ext = os.path.splitext(db_path)
+    pattern = re.compile(re.escape(root) + r"\.\d+-of-(\d+)" + re.escape(ext) + "$")
+    counts = {
+        int(match.group(1))
+        for path in glob.glob(f"{glob.escape(root)}.*-of-*{ext}")
+        if (match := pattern.match(path))
+    }
+    if os.path.exists(db_path):
+        counts.add(1)
+    return counts
+
+
+def partition_for(topic: str, event_id: str, partitions: int) -> int:
+    """
+    Tentukan partisi untuk key (topic, event_id).
+
+    Memakai CRC32 agar stabil antar proses, restart, dan versi Python.
+
+    Args:
+        topic: Topic event
+        event_id: ID event
+        partitions: Jumlah partisi
+
+    Returns:
+        Index partisi
+    """
+    if partitions == 1:
+        return 0
+    return zlib.crc32(f"{topic}\x00{event_id}".encode("utf-8")) % partitions
+
+
+class PartialClaimError(Exception):
+    """
+    Claim batch gagal di sebagian partisi; partisi lain sudah di-commit.
+
+    Hanya event dengan hasil None yang perlu di-claim ulang: event lain sudah
+    tersimpan (atau sudah dihitung duplikat) dan akan terbaca sebagai
+    duplikat jika di-claim lagi.
+    """
+
+    def __init__(self, results: List[Optional[bool]], error: Exception):
+        """
+        Args:
+            results: Hasil per event sesuai urutan input, None jika partisi
+                event tersebut gagal
+            error: Error pertama dari partisi yang gagal
+        """
+        super().__init__(str(error))
+        self.results = results
+        self.error = error
+
+
+class PartitionedDedupStore:
+    """
+    Dedup store yang membagi processed_events ke beberapa file SQLite.
+
+    Setiap partisi adalah DedupStore lengkap (writer thread, reader pool,
+    Bloom filter, cache, migration sendiri), sehingga batch untuk partisi
+    berbeda di-commit paralel tanpa berebut satu write lock. Interface-nya
+    sama dengan DedupStore: write diarahkan ke partisi berdasarkan hash
+    (topic, event_id), read di-fan-out lalu di-merge.
+
+    Catatan: satu batch yang tersebar ke beberapa partisi di-commit per
+    partisi, bukan dalam satu transaksi global.
+    """
+
+    def __init__(self, db_path: str = "dedup_store.db", partitions: int = 2, **kwargs):
+        """
+        Inisialisasi partitioned dedup store.
+
+        Args:
+            db_path: Path database dasar
+            partitions: Jumlah partisi (file database)
+            **kwargs: Argumen DedupStore untuk setiap partisi
+
+        Raises:
+            ValueError: Jika partitions < 1 atau file di disk dibuat dengan
+                jumlah partisi lain (jalankan src.reshard terlebih dahulu)
+        """
+        if partitions < 1:
+            raise ValueError("partitions harus minimal 1")
+
+        other = existing_partition_counts(db_path) - {partitions}
+        if other:
+            raise ValueError(
+                f"Database {db_path} already partitioned into "
+                f"{', '.join(str(k) for k in sorted(other))} file(s); "
+                f"run 'python -m src.reshard' to change to {partitions}"
+            )
+
+        self.db_path = db_path
+        self.partitions = partitions
+        self.shards = [
+            DedupStore(db_path=path, **kwargs)
+            for path in partition_paths(db_path, partitions)
+        ]
+        self.shared = self.shards[0].shared
+        self.durability = self.shards[0].durability
+        self.journal_mode = self.shards[0].journal_mode
+        self.schema_version = min(shard.schema_version for shard in self.shards)
+
+        # received yang belum diarahkan ke partisi: event masih di queue.
+        # Dipindah ke partisi saat batch-nya diproses, agar setiap partisi
+        # tetap memenuhi received >= unique_processed + duplicate_dropped
+        self._pending_received = 0
+
+        logger.info(
+            f"PartitionedDedupStore initialized with {partitions} partition(s) "
+            f"at {db_path}"
+        )
+
+    def _shard(self, topic: str, event_id: str) -> DedupStore:
+        return self.shards[partition_for(topic, event_id, self.partitions)]
+
+    @property
+    def write_retry_count(self) -> int:
+        return sum(shard.write_retry_count for shard in self.shards)
+
+    def get_bloom_stats(self) -> Optional[dict]:
+        """
+        Get statistik Bloom filter gabungan semua partisi.
+
+        Returns:
+            Dictionary statistik, atau None jika Bloom filter tidak aktif
+        """
+        stats = [shard.get_bloom_stats() for shard in self.shards]
+        if stats[0] is None:
+            return None
+        merged = {
+            name: sum(s[name] for s in stats)
+            for name in ("items", "memory_bytes", "skipped_lookups", "false_positives")
+        }
+        merged["false_positive_rate"] = max(s["false_positive_rate"] for s in stats)
+        return merged
+
+    def get_recent_cache_stats(self) -> Optional[dict]:
+        """
+        Get statistik cache key yang baru diproses, dijumlah semua partisi.
+
+        Returns:
+            Dictionary statistik, atau None jika cache tidak aktif
+        """
+        stats = [shard.get_recent_cache_stats() for shard in self.shards]
+        if stats[0] is None:
+            return None
+        return {name: sum(s[name] for s in stats) for name in stats[0]}
+
+    def get_payload_stats(self) -> Optional[dict]:
+        """
+        Get statistik kompresi payload gabungan semua partisi.
+
+        Returns:
+            Dictionary statistik, atau None jika kompresi payload tidak aktif
+        """
+        stats = [shard.get_payload_stats() for shard in self.shards]
+        if stats[0] is None:
+            return None
+        merged = {
+            name: sum(s[name] for s in stats)
+            for name in ("raw_bytes", "stored_bytes", "dictionaries")
+        }
+        merged["codec"] = stats[0]["codec"]
+        merged["ratio"] = (
+            round(merged["stored_bytes"] / merged["raw_bytes"], 4)
+            if merged["raw_bytes"]
+            else 1.0
+        )
+        return merged
+
+    async def is_duplicate(self, topic: str, event_id: str) -> bool:
+        """
+        Check apakah event sudah pernah diproses (di partisi key tersebut).
+
+        Args:
+            topic: Topic event
+            event_id: ID event
+
+        Returns:
+            True jika duplicate, False jika belum pernah diproses
+        """
+        return await self._shard(topic, event_id).is_duplicate(topic, event_id)
+
+    async def mark_processed(
+        self,
+        topic: str,
+        event_id: str,
+        timestamp: Union[int, str],
+        source: str,
+        payload: str,
+    ) -> bool:
+        """
+        Mark event sebagai sudah diproses di partisi key tersebut.
+
+        Returns:
+            True jika event baru, False jika duplicate
+        """
+        return await self._shard(topic, event_id).mark_processed(
+            topic, event_id, timestamp, source, payload
+        )
+
+    async def try_claim(
+        self, events: List[Tuple[str, str, str, str, str]]
+    ) -> List[bool]:
+        """
+        Claim sekumpulan event secara atomik per partisi (lihat
+        DedupStore.try_claim).
+
+        Batch dipecah per partisi dan setiap bagian di-commit paralel oleh
+        writer partisinya masing-masing. Jika sebagian partisi gagal, partisi
+        lain tetap ter-commit dan PartialClaimError membawa hasilnya, agar
+        pemanggil hanya me-retry event di partisi yang gagal.
+
+        Args:
+            events: List tuple (topic, event_id, timestamp, source, payload)
+
+        Returns:
+            List boolean sesuai urutan input: True jika event baru,
+            False jika duplicate
+
+        Raises:
+            PartialClaimError: Jika claim gagal di satu partisi atau lebih
+        """
+        if not events:
+            return []
+
+        parts: Dict[int, List[int]] = {}
+        for i, event in enumerate(events):
+            index = partition_for(event[0], event[1], self.partitions)
+            parts.setdefault(index, []).append(i)
+
+        part_results = await asyncio.gather(
+            *(
+                self._claim_partition(index, [events[i] for i in positions])
+                for index, positions in parts.items()
+            ),
+            return_exceptions=True,
+        )
+
+        results: List[Optional[bool]] = [None] * len(events)
+        error = None
+        for positions, shard_results in zip(parts.values(), part_results):
+            if isinstance(shard_results, BaseException):
+                if not isinstance(shard_results, Exception):
+                    raise shard_results
+                error = error or shard_results
+                continue
+            for i, is_new in zip(positions, shard_results):
+                results[i] = is_new
+        if error is not None:
+            raise PartialClaimError(results, error)
+        return results
+
+    async def _claim_partition(
+        self, index: int, events: List[Tuple[str, str, str, str, str]]
+    ) -> List[bool]:
+        """
+        Claim bagian batch milik satu partisi.
+
+        received untuk event tersebut dipindah ke partisi sebelum claim (ikut
+        ter-commit di transaksi batch) dan dikembalikan jika claim gagal, agar
+        retry tidak memindahkannya dua kali.
+        """
+        shard = self.shards[index]
+        moved = min(self._pending_received, len(events))
+        self._pending_received -= moved
+        await shard.increment_received(moved)
+        try:
+            return await shard.try_claim(events)
+        except Exception:
+            await shard.increment_received(-moved)
+            self._pending_received += moved
+            raise
+
+    async def increment_received(self, count: int = 1):
+        """Increment counter untuk total event yang diterima (in-memory)."""
+        self._pending_received += count
+
+    async def increment_unique_processed(self, count: int = 1):
+        """Increment counter untuk event unik yang diproses (in-memory)."""
+        await self.shards[0].increment_unique_processed(count)
+
+    async def increment_duplicate_dropped(self, count: int = 1):
+        """Increment counter untuk duplikat yang di-drop (in-memory)."""
+        await self.shards[0].increment_duplicate_dropped(count)
+
+    async def flush_stats(self):
+        """
+        Flush counter in-memory semua partisi ke database.
+        """
+        await asyncio.gather(*(shard.flush_stats() for shard in self.shards))
+
+    async def checkpoint(self):
+        """
+        Checkpoint semua partisi (lihat DedupStore.checkpoint).
+        """
+        await asyncio.gather(*(shard.checkpoint() for shard in self.shards))
+
+    async def get_stats(self) -> Tuple[int, int, int]:
+        """
+        Get statistik sistem, dijumlah dari semua partisi.
+
+        Returns:
+            Tuple (received, unique_processed, duplicate_dropped)
+        """
+        per_shard = await asyncio.gather(*(shard.get_stats() for shard in self.shards))
+        totals = [sum(values) for values in zip(*per_shard)]
+        totals[COUNTER_NAMES.index("received")] += self._pending_received
+        return tuple(totals)
+
+    async def get_unique_topics_count(self) -> int:
+        """
+        Get jumlah topic unik (gabungan katalog semua partisi).
+
+        Returns:
+            Jumlah topic unik
+        """
+        names = await asyncio.gather(
+            *(shard.get_topic_names() for shard in self.shards)
+        )
+        return len(set().union(*names))
+
+    async def get_topics(self) -> List[dict]:
+        """
+        Get breakdown per topic, di-merge dari katalog semua partisi.
+
+        Returns:
+            List dictionary (topic, event_count, duplicate_count,
+            first_seen, last_seen), urut berdasarkan nama topic
+        """
+        merged: Dict[str, dict] = {}
+        for topics in await asyncio.gather(
+            *(shard.get_topics() for shard in self.shards)
+        ):
+            for item in topics:
+                current = merged.get(item["topic"])
+                if current is None:
+                    merged[item["topic"]] = dict(item)
+                    continue
+                current["event_count"] += item["event_count"]
+                current["duplicate_count"] += item["duplicate_count"]
+                current["first_seen"] = min(current["first_seen"], item["first_seen"])
+                current["last_seen"] = max(current["last_seen"], item["last_seen"])
+        return [merged[topic] for topic in sorted(merged)]
+
+    normalize_time = staticmethod(DedupStore.normalize_time)
+    normalize_window = staticmethod(DedupStore.normalize_window)
+
+    @staticmethod
+    def encode_cursor(key: int, partition: int, row_id: int) -> str:
+        """
+        Encode posisi global (key, partisi, id) menjadi cursor opaque.
+
+        Args:
+            key: Kolom urutan baris terakhir halaman (processed_at, atau
+                timestamp jika memakai filter from/to)
+            partition: Partisi baris terakhir halaman
+            row_id: id baris terakhir halaman (di partisinya)
+
+        Returns:
+            Cursor string (URL-safe)
+        """
+        raw = f"{key}|{partition}|{row_id}".encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    def parse_cursor(self, cursor: str) -> Tuple[int, int, int]:
+        """
+        Parse cursor pagination.
+
+        Args:
+            cursor: Cursor dari next_cursor halaman sebelumnya
+
+        Returns:
+            Tuple (key, partisi, id) baris terakhir halaman sebelumnya
+
+        Raises:
+            ValueError: Jika cursor tidak valid
+        """
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+            key, partition, row_id = raw.rsplit("|", 2)
+            position = (int(key), int(partition), int(row_id))
+        except (ValueError, UnicodeError) as e:
+            raise ValueError(f"invalid cursor: {cursor}") from e
+        if not 0 <= position[1] < self.partitions:
+            raise ValueError(f"invalid cursor: {cursor}")
+        return position
+
+    @staticmethod
+    def _shard_bound(
+        position: Tuple[int, int, int], partition: int, descending: bool
+    ) -> Tuple[int, int]:
+        """
+        Terjemahkan posisi global (key, partisi, id) menjadi batas keyset
+        (key, id) untuk satu partisi; key adalah processed_at atau timestamp.
+
+        Urutan global adalah (key, partisi, id). Partisi sebelum partisi
+        posisi masih boleh berisi key yang sama (id dianggap tak hingga),
+        partisi sesudahnya tidak (id dianggap nol), atau sebaliknya untuk
+        urutan menaik.
+        """
+        key, at_partition, row_id = position
+        if partition == at_partition:
+            return key, row_id
+        earlier = partition < at_partition
+        if descending:
+            return key, MAX_ROW_ID if earlier else MIN_ROW_ID
+        return key, MIN_ROW_ID if earlier else MAX_ROW_ID
+
+    async def get_events(
+        self,
+        topic: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        time_from: Optional[str] = None,
+        time_to: Optional[str] = None,
+    ) -> List[dict]:
+        """
+        Get list event yang sudah diproses dari semua partisi.
+
+        Returns:
+            List dictionary event
+        """
+        events, _ = await self.get_events_page(
+            topic, limit, cursor, since, until, time_from, time_to
+        )
+        return events
+
+    async def get_events_page(
+        self,
+        topic: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        time_from: Optional[str] = None,
+        time_to: Optional[str] = None,
+    ) -> Tuple[List[dict], Optional[str]]:
+        """
+        Get satu halaman event terbaru lebih dulu, di-merge dari semua partisi.
+
+        Setiap partisi mengembalikan paling banyak limit + 1 baris setelah
+        batas keyset-nya; hasilnya di-merge berdasarkan (processed_at,
+        partisi, id), atau (timestamp, partisi, id) dengan filter
+        time_from/time_to, sehingga urutan dan cursor konsisten antar halaman.
+
+        Args:
+            topic: Filter berdasarkan topic (optional)
+            limit: Ukuran halaman (optional, default semua)
+            cursor: next_cursor dari halaman sebelumnya (optional)
+            since: Hanya event dengan processed_at >= since (optional, ISO8601)
+            until: Hanya event dengan processed_at < until (optional, ISO8601)
+            time_from: Hanya event dengan timestamp >= time_from (optional,
+                ISO8601)
+            time_to: Hanya event dengan timestamp < time_to (optional, ISO8601)
+
+        Returns:
+            Tuple (list event, next_cursor atau None jika halaman terakhir)
+
+        Raises:
+            ValueError: Jika cursor atau filter waktu tidak valid
+        """
+        position = self.parse_cursor(cursor) if cursor else None
+        window = self.normalize_window(since, until, time_from, time_to)
+        fetch = None if limit is None else limit + 1
+
+        per_shard = await asyncio.gather(
+            *(
+                shard.query_events(
+                    topic,
+                    fetch,
+                    self._shard_bound(position, index, True) if position else None,
+                    window,
+                )
+                for index, shard in enumerate(self.shards)
+            )
+        )
+
+        rows = [
+            (row[window.key_index], index, row)
+            for index, shard_rows in enumerate(per_shard)
+            for row in shard_rows
+        ]
+        rows.sort(key=lambda item: (item[0], item[1], item[2][0]), reverse=True)
+
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            key, index, row = rows[-1]
+            next_cursor = self.encode_cursor(key, index, row[0])
+
+        # Decompress hanya baris yang lolos merge, per partisi (dictionary lokal)
+        by_shard: Dict[int, List[tuple]] = {}
+        for _, index, row in rows:
+            by_shard.setdefault(index, []).append(row)
+        decoded = await asyncio.gather(
+            *(
+                self.shards[index].decode_rows(shard_rows)
+                for index, shard_rows in by_shard.items()
+            )
+        )
+        iterators = {index: iter(rows) for index, rows in zip(by_shard, decoded)}
+        events = [
+            DedupStore.row_to_event(next(iterators[index])) for _, index, _ in rows
+        ]
+        return events, next_cursor
+
+    async def iter_events_raw(
+        self,
+        topic: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        chunk_size: int = 1000,
+    ) -> AsyncIterator[List[Tuple[str, str, int, str, str]]]:
+        """
+        Iterasi semua event (terlama lebih dulu) dari semua partisi, dalam chunk.
+
+        K-way merge: setiap partisi dibaca per chunk dengan keyset sendiri dan
+        hanya di-refill saat buffer-nya habis, jadi memori tetap
+        O(partisi x chunk_size).
+
+        Yields:
+            List tuple (topic, event_id, timestamp, source, payload_json),
+            timestamp dalam epoch mikrodetik UTC
+
+        Raises:
+            ValueError: Jika since/until tidak valid
+        """
+        since = self.normalize_time(since) if since else None
+        until = self.normalize_time(until) if until else None
+        buffers: List[List[tuple]] = [[] for _ in self.shards]
+        after: List[Optional[Tuple[int, int]]] = [None] * len(self.shards)
+        exhausted = [False] * len(self.shards)
+
+        while True:
+            refill = [
+                i
+                for i in range(len(self.shards))
+                if not buffers[i] and not exhausted[i]
+            ]
+            chunks = await asyncio.gather(
+                *(
+                    self.shards[i].get_raw_chunk(
+                        topic, since, until, after[i], chunk_size
+                    )
+                    for i in refill
+                )
+            )
+            for i, rows in zip(refill, chunks):
+                # Buffer dibalik agar pop() mengambil baris terlama
+                buffers[i] = rows[::-1]
+                exhausted[i] = len(rows) < chunk_size
+
+            chunk = []
+            while len(chunk) < chunk_size:
+                candidates = [i for i in range(len(self.shards)) if buffers[i]]
+                if not candidates:
+                    break
+                i = min(candidates, key=lambda k: (buffers[k][-1][6], k))
+                row = buffers[i].pop()
+                after[i] = (row[6], row[0])
+                chunk.append(row[1:6])
+                if not buffers[i] and not exhausted[i]:
+                    # Partisi ini perlu di-refill sebelum merge bisa lanjut
+                    break
+
+            if chunk:
+                yield chunk
+            if all(exhausted) and not any(buffers):
+                return
+
+    async def compact(self) -> Dict[str, int]:
+        """
+        Jalankan retention compaction di semua partisi secara paralel.
+
+        Returns:
+            Dictionary jumlah compacted, expired_keys, vacuumed_pages (total)
+        """
+        results = await asyncio.gather(*(shard.compact() for shard in self.shards))
+        return {name: sum(r[name] for r in results) for name in results[0]}
+
+    def get_retention_stats(self) -> Optional[dict]:
+        """
+        Get statistik retention, counter dijumlah dari semua partisi.
+
+        Returns:
+            Dictionary statistik, atau None jika retention tidak aktif
+        """
+        stats = [shard.get_retention_stats() for shard in self.shards]
+        if stats[0] is None:
+            return None
+        merged = dict(stats[0])
+        for name in ("compacted_rows", "expired_keys", "vacuumed_pages"):
+            merged[name] = sum(s[name] for s in stats)
+        runs = [s["last_run"] for s in stats if s["last_run"]]
+        merged["last_run"] = max(runs) if runs else None
+        return merged
+
+    async def clear_all(self):
+        """
+        Clear semua data di semua partisi (untuk testing).
+        """
+        await asyncio.gather(*(shard.clear_all() for shard in self.shards))
+        self._pending_received = 0
+
+    def close(self):
+        """
+        Close semua partisi. received yang belum terarah ke partisi mana pun
+        ditulis ke partisi 0.
+        """
+        if self._pending_received:
+            # Ikut final flush di DedupStore.close() partisi 0
+            self.shards[0]._counters["received"] += self._pending_received
+            self._pending_received = 0
+        for shard in self.shards:
+            shard.close()
@@ -0,0 +1,262 @@
+import lzma
+import sqlite3
+import zlib
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union
+
+# Nilai kolom processed_events.payload_format
+FORMAT_PLAIN = 0  # JSON text apa adanya (semua baris lama)
+FORMAT_ZLIB = 1  # raw deflate
+FORMAT_LZMA = 2  # lzma "alone" (header 13 byte)
+FORMAT_ZLIB_DICT = 3  # id dictionary 4 byte + raw deflate dengan preset dictionary
+
+CODECS = ("none", "zlib", "lzma")
+
+# Window deflate maksimal; isi dictionary di luar window tidak terpakai.
+# Dictionary di-prime ulang per baris, jadi default lebih kecil: untuk JSON log
+# 4 KiB memberi rasio hampir sama dengan 32 KiB dengan encode jauh lebih cepat
+MAX_DICTIONARY_SIZE = 32768
+DEFAULT_DICTIONARY_SIZE = 4096
+
+SQL_INSERT_DICTIONARY = """
+    INSERT INTO payload_dictionaries (topic, dictionary, created_at)
+    VALUES (?, ?, ?)
+"""
+
+
+class PayloadCodec:
+    """
+    Kompresi payload event at rest (stdlib zlib/lzma).
+
+    Payload pendek atau yang tidak mengecil disimpan plain, jadi format
+    ditentukan per baris. Dengan dictionary aktif, payload per topic
+    dikumpulkan sebagai sample dan, setelah cukup, dijadikan preset
+    dictionary zlib untuk topic itu; JSON log yang mirip antar event
+    (key, nilai enum, prefix) lalu terkompresi jauh lebih baik daripada
+    per baris saja.
+
+    Encode hanya dipanggil dari writer thread; decode boleh dari thread mana
+    pun (dictionary hanya ditambah, tidak pernah diubah).
+    """
+
+    def __init__(
+        self,
+        codec: str = "none",
+        level: int = 6,
+        min_size: int = 64,
+        dictionary_samples: int = 0,
+        dictionary_size: int = DEFAULT_DICTIONARY_SIZE,
+    ):
+        """
+        Inisialisasi codec.
+
+        Args:
+            codec: Algoritma kompresi (lihat CODECS)
+            level: Level kompresi (zlib 1-9, lzma 0-9)
+            min_size: Payload lebih pendek dari ini (byte) disimpan plain
+            dictionary_samples: Jumlah payload per topic sebelum dictionary
+                dibuat (0 = tanpa dictionary, hanya untuk zlib)
+            dictionary_size: Ukuran dictionary maksimal dalam byte
+
+        Raises:
+            ValueError: Jika codec tidak dikenal atau kombinasi tidak didukung
+        """
+        if codec not in CODECS:
+            raise ValueError(
+                f"Unknown payload codec: {codec} (available: {', '.join(CODECS)})"
+            )
+        if dictionary_samples and codec != "zlib":
+            raise ValueError("Payload dictionary hanya didukung codec zlib")
+        if not 0 < dictionary_size <= MAX_DICTIONARY_SIZE:
+            raise ValueError(f"dictionary_size harus 1-{MAX_DICTIONARY_SIZE}")
+
+        self.codec = codec
+        self.level = level
+        self.min_size = min_size
+        self.dictionary_samples = dictionary_samples
+        self.dictionary_size = dictionary_size
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+        # id -> dictionary (semua yang pernah dibuat) dan topic -> id aktif
+        self._dictionaries: Dict[int, bytes] = {}
+        self._topic_dictionaries: Dict[str, int] = {}
+        self._samples: Dict[str, List[bytes]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.codec != "none"
+
+    def load_dictionaries(self, conn: sqlite3.Connection):
+        """
+        Muat dictionary tersimpan; yang terbaru per topic menjadi aktif.
+
+        Args:
+            conn: Koneksi SQLite
+        """
+        for dict_id, topic, dictionary in conn.execute(
+            "SELECT id, topic, dictionary FROM payload_dictionaries ORDER BY id"
+        ):
+            self._dictionaries[dict_id] = dictionary
+            self._topic_dictionaries[topic] = dict_id
+
+    def train(self, conn: sqlite3.Connection, topic: str, payload: str) -> bool:
+        """
+        Kumpulkan sample payload topic dan buat dictionary jika sudah cukup.
+
+        Dictionary disimpan dan di-commit segera, sebelum ada baris yang
+        memakainya, sehingga baris terkompresi tidak pernah menunjuk
+        dictionary yang hilang karena rollback.
+
+        Args:
+            conn: Koneksi writer (tidak sedang dalam transaksi)
+            topic: Topic event
+            payload: Payload JSON
+
+        Returns:
+            True jika dictionary baru dibuat
+        """
+        if not self.dictionary_samples or topic in self._topic_dictionaries:
+            return False
+
+        samples = self._samples.setdefault(topic, [])
+        samples.append(payload.encode("utf-8"))
+        if len(samples) < self.dictionary_samples:
+            return False
+
+        # Deflate paling murah mereferensikan isi di akhir dictionary, jadi
+        # sample unik diurutkan dari yang paling jarang ke yang paling sering
+        counts: Dict[bytes, int] = {}
+        for sample in samples:
+            counts[sample] = counts.get(sample, 0) + 1
+        ordered = sorted(counts, key=counts.__getitem__)
+        dictionary = b"".join(ordered)[-self.dictionary_size :]
+
+        cursor = conn.execute(
+            SQL_INSERT_DICTIONARY, (topic, dictionary, datetime.utcnow().isoformat())
+        )
+        conn.commit()
+        self._dictionaries[cursor.lastrowid] = dictionary
+        self._topic_dictionaries[topic] = cursor.lastrowid
+        del self._samples[topic]
+        return True
+
+    def encode(self, topic: str, payload: str) -> Tuple[Union[str, bytes], int]:
+        """
+        Encode payload untuk disimpan.
+
+        Args:
+            topic: Topic event (menentukan dictionary)
+            payload: Payload JSON
+
+        Returns:
+            Tuple (nilai kolom payload, payload_format)
+        """
+        raw = payload.encode("utf-8")
+        self.raw_bytes += len(raw)
+        if not self.enabled or len(raw) < self.min_size:
+            self.stored_bytes += len(raw)
+            return payload, FORMAT_PLAIN
+
+        dict_id = self._topic_dictionaries.get(topic)
+        if self.codec == "lzma":
+            data = lzma.compress(raw, format=lzma.FORMAT_ALONE, preset=self.level)
+            fmt = FORMAT_LZMA
+        elif dict_id is not None:
+            compressor = zlib.compressobj(
+                self.level, wbits=-15, zdict=self._dictionaries[dict_id]
+            )
+            data = dict_id.to_bytes(4, "big") + compressor.compress(raw)
+            data += compressor.flush()
+            fmt = FORMAT_ZLIB_DICT
+        else:
+            compressor = zlib.compressobj(self.level, wbits=-15)
+            data = compressor.compress(raw) + compressor.flush()
+            fmt = FORMAT_ZLIB
+
+        if len(data) >= len(raw):
+            self.stored_bytes += len(raw)
+            return payload, FORMAT_PLAIN
+        self.stored_bytes += len(data)
+        return data, fmt
+
+    def discard(self, payload: str, value: Union[str, bytes]):
+        """
+        Batalkan hitungan encode untuk baris yang tidak jadi disimpan
+        (duplikat yang di-skip ON CONFLICT).
+
+        Args:
+            payload: Payload JSON yang di-encode
+            value: Hasil encode (nilai kolom payload)
+        """
+        raw = len(payload.encode("utf-8"))
+        self.raw_bytes -= raw
+        self.stored_bytes -= raw if isinstance(value, str) else len(value)
+
+    def decode(
+        self,
+        value: Union[str, bytes],
+        fmt: int,
+        conn: Optional[sqlite3.Connection] = None,
+    ) -> str:
+        """
+        Decode nilai kolom payload kembali ke JSON text.
+
+        Args:
+            value: Nilai kolom payload
+            fmt: Nilai kolom payload_format
+            conn: Koneksi untuk memuat dictionary yang belum dikenal, misalnya
+                yang dibuat proses lain (optional)
+
+        Returns:
+            Payload JSON
+
+        Raises:
+            ValueError: Jika format atau dictionary tidak dikenal
+        """
+        if fmt == FORMAT_PLAIN:
+            return value
+        if fmt == FORMAT_ZLIB:
+            return zlib.decompress(value, wbits=-15).decode("utf-8")
+        if fmt == FORMAT_LZMA:
+            return lzma.decompress(value, format=lzma.FORMAT_ALONE).decode("utf-8")
+        if fmt == FORMAT_ZLIB_DICT:
+            dict_id = int.from_bytes(value[:4], "big")
+            dictionary = self._dictionaries.get(dict_id)
+            if dictionary is None and conn is not None:
+                row = conn.execute(
+                    "SELECT dictionary FROM payload_dictionaries WHERE id = ?",
+                    (dict_id,),
+                ).fetchone()
+                if row is not None:
+                    dictionary = self._dictionaries[dict_id] = row[0]
+            if dictionary is None:
+                raise ValueError(f"Unknown payload dictionary: {dict_id}")
+            decompressor = zlib.decompressobj(wbits=-15, zdict=dictionary)
+            return (decompressor.decompress(value[4:]) + decompressor.flush()).decode(
+                "utf-8"
+            )
+        raise ValueError(f"Unknown payload format: {fmt}")
+
+    def reset(self):
+        """Lupakan dictionary dan sample (setelah semua data dihapus)."""
+        self._dictionaries.clear()
+        self._topic_dictionaries.clear()
+        self._samples.clear()
+        self.raw_bytes = self.stored_bytes = 0
+
+    def stats(self) -> dict:
+        """
+        Get statistik kompresi sejak start.
+
+        Returns:
+            Dictionary codec, raw_bytes, stored_bytes, ratio, dictionaries
+        """
+        return {
+            "codec": self.codec,
+            "raw_bytes": self.raw_bytes,
+            "stored_bytes": self.stored_bytes,
+            "ratio": (
+                round(self.stored_bytes / self.raw_bytes, 4) if self.raw_bytes else 1.0
+            ),
+            "dictionaries": len(self._topic_dictionaries),
+        }
@@ -0,0 +1,96 @@
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+
+class RecentKeyCache:
+    """
+    Cache LRU + TTL untuk key (topic, event_id) yang baru saja diproses.
+
+    Publisher at-least-once biasanya retry dalam hitungan detik, jadi duplikat
+    hampir selalu key yang masih ada di cache ini. Cache ini exact (tanpa false
+    positive) dan dibatasi jumlah key maupun umur key.
+
+    Tidak thread-safe: hanya diakses dari thread event loop.
+    """
+
+    def __init__(self, capacity: int = 100000, ttl: Optional[float] = 300.0):
+        """
+        Inisialisasi cache.
+
+        Args:
+            capacity: Jumlah key maksimal; key paling lama tidak dipakai di-evict
+            ttl: Umur maksimal key dalam detik (None atau 0 = tanpa TTL)
+        """
+        if capacity <= 0:
+            raise ValueError("capacity harus lebih dari 0")
+
+        self.capacity = capacity
+        self.ttl = ttl or None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries: "OrderedDict[Hashable, float]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def contains(self, key: Hashable) -> bool:
+        """
+        Check apakah key ada di cache (dan belum expired).
+        Hit memindahkan key ke posisi paling baru.
+
+        Args:
+            key: Key yang dicari
+
+        Returns:
+            True jika key ada di cache
+        """
+        added_at = self._entries.get(key)
+        if added_at is None:
+            self.misses += 1
+            return False
+
+        if self.ttl is not None and time.monotonic() - added_at > self.ttl:
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return False
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True
+
+    def add(self, key: Hashable):
+        """
+        Tambahkan key ke cache, evict key paling lama jika penuh.
+
+        Args:
+            key: Key yang ditambahkan
+        """
+        self._entries[key] = time.monotonic()
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Hapus semua key dari cache."""
+        self._entries.clear()
+
+    def get_stats(self) -> dict:
+        """
+        Get statistik cache.
+
+        Returns:
+            Dictionary capacity, size, hits, misses, evictions, expirations
+        """
+        return {
+            "capacity": self.capacity,
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
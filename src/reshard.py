@@ -0,0 +1,292 @@
+"""
+Tool offline untuk mengubah jumlah partisi dedup store.
+
+Membaca semua event dari file database lama (satu file atau K partisi),
+menulis ulang ke partisi baru berdasarkan hash (topic, event_id), lalu
+membangun ulang katalog topics dan tabel stats per partisi. Payload
+terkompresi di-decode dan ditulis plain (dictionary bersifat lokal per
+file); event baru dikompresi lagi sesuai PAYLOAD_COMPRESSION. Fingerprint
+key yang sudah di-compact retention (dedup_keys) ikut disalin.
+
+Jalankan saat aplikasi berhenti:
+
+    python -m src.reshard --db-path data/dedup_store.db --from 1 --to 4
+"""
+
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+from typing import List, Optional
+
+from src.config import Config
+from src.dedup_store import SQL_SELECT_STATS, SQL_UPSERT_TOPIC
+from src.migrations import apply_migrations
+from src.partitioned_store import partition_for, partition_paths
+from src.payload_codec import PayloadCodec
+
+logger = logging.getLogger(__name__)
+
+SQL_COPY_EVENT = """
+    INSERT OR IGNORE INTO processed_events
+    (topic, event_id, timestamp, source, payload, processed_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+SQL_COPY_FINGERPRINT = """
+    INSERT INTO dedup_keys (fingerprint, expires_at) VALUES (?, ?)
+    ON CONFLICT(fingerprint) DO UPDATE SET expires_at = CASE
+        WHEN expires_at IS NULL OR excluded.expires_at IS NULL THEN NULL
+        ELSE MAX(expires_at, excluded.expires_at) END
+"""
+
+
+def _open(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    apply_migrations(conn)
+    return conn
+
+
+def reshard(
+    db_path: str,
+    source_partitions: int,
+    target_partitions: int,
+    output: Optional[str] = None,
+    batch_size: int = 10000,
+    remove_source: bool = False,
+) -> dict:
+    """
+    Tulis ulang dedup store ke jumlah partisi baru.
+
+    Statistik tetap sama totalnya: setiap partisi baru mendapat
+    unique_processed = received = jumlah barisnya, sedangkan
+    duplicate_dropped, sisa received dan sisa unique_processed (event yang
+    payload-nya sudah di-compact retention), serta sisa event_count dan
+    duplicate_count per topic, ditaruh di partisi 0, sehingga rekonsiliasi
+    saat startup tidak mengubah apa pun.
+
+    Fingerprint di dedup_keys hanya berisi digest, bukan (topic, event_id),
+    jadi partisi tujuannya tidak bisa dihitung: fingerprint disalin ke semua
+    partisi baru. Setiap partisi hanya mengecek fingerprint key yang
+    di-route ke partisi itu, jadi salinan di partisi lain tidak berpengaruh
+    selain ±40 byte per key sampai dedup window-nya habis.
+
+    Args:
+        db_path: Path database dasar (DB_PATH) sumber
+        source_partitions: Jumlah partisi sumber
+        target_partitions: Jumlah partisi tujuan
+        output: Path database dasar tujuan (default sama dengan db_path)
+        batch_size: Jumlah baris per transaksi
+        remove_source: Hapus file sumber setelah berhasil
+
+    Returns:
+        Dictionary ringkasan (rows, fingerprints, partitions: jumlah baris
+        per partisi baru)
+
+    Raises:
+        FileNotFoundError: Jika file sumber tidak ada
+        FileExistsError: Jika file tujuan sudah ada
+    """
+    if source_partitions < 1 or target_partitions < 1:
+        raise ValueError("Jumlah partisi harus minimal 1")
+
+    source_paths = partition_paths(db_path, source_partitions)
+    target_paths = partition_paths(output or db_path, target_partitions)
+    for path in source_paths:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Source partition not found: {path}")
+    for path in target_paths:
+        if os.path.exists(path):
+            raise FileExistsError(f"Target partition already exists: {path}")
+
+    targets = [_open(path) for path in target_paths]
+    for conn in targets:
+        conn.execute("PRAGMA synchronous = OFF")
+
+    received = unique = dropped = 0
+    source_topics = {}
+    copied = fingerprints = 0
+
+    for path in source_paths:
+        source = _open(path)
+        codec = PayloadCodec()
+        codec.load_dictionaries(source)
+        r, u, d = source.execute(SQL_SELECT_STATS).fetchone()
+        received, unique, dropped = received + r, unique + u, dropped + d
+        for topic, events, duplicates, first_seen, last_seen in source.execute(
+            "SELECT topic, event_count, duplicate_count, first_seen, last_seen "
+            "FROM topics"
+        ):
+            current = source_topics.get(topic)
+            if current is None:
+                source_topics[topic] = [events, duplicates, first_seen, last_seen]
+            else:
+                current[0] += events
+                current[1] += duplicates
+                current[2] = min(current[2], first_seen)
+                current[3] = max(current[3], last_seen)
+
+        keys = source.execute("SELECT fingerprint, expires_at FROM dedup_keys")
+        while True:
+            rows = keys.fetchmany(batch_size)
+            if not rows:
+                break
+            for conn in targets:
+                conn.executemany(SQL_COPY_FINGERPRINT, rows)
+                conn.commit()
+            fingerprints += len(rows)
+
+        cursor = source.execute("""
+            SELECT topic, event_id, timestamp, source, payload, processed_at,
+                payload_format
+            FROM processed_events
+            ORDER BY processed_at, id
+        """)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            parts: List[list] = [[] for _ in targets]
+            for *row, payload_format in rows:
+                row[4] = codec.decode(row[4], payload_format)
+                parts[partition_for(row[0], row[1], target_partitions)].append(row)
+            for conn, part in zip(targets, parts):
+                if part:
+                    conn.executemany(SQL_COPY_EVENT, part)
+                    conn.commit()
+            copied += len(rows)
+        source.close()
+        logger.info(f"Copied events from {path}")
+
+    partition_rows = []
+    topic_rows = {}
+    for conn in targets:
+        conn.execute("""
+            INSERT INTO topics
+            (topic, event_count, duplicate_count, first_seen, last_seen)
+            SELECT topic, COUNT(*), 0, MIN(processed_at), MAX(processed_at)
+            FROM processed_events
+            GROUP BY topic
+        """)
+        for topic, count in conn.execute("SELECT topic, event_count FROM topics"):
+            topic_rows[topic] = topic_rows.get(topic, 0) + count
+        rows = conn.execute("SELECT COUNT(*) FROM processed_events").fetchone()[0]
+        partition_rows.append(rows)
+        conn.execute(
+            "UPDATE stats SET received = ?, unique_processed = ?, "
+            "duplicate_dropped = 0 WHERE id = 1",
+            (rows, rows),
+        )
+        conn.commit()
+
+    total_rows = sum(partition_rows)
+    # Event yang sudah di-compact tidak punya baris lagi, tapi tetap dihitung
+    compacted = max(unique - total_rows, 0)
+    first = targets[0]
+    first.executemany(
+        SQL_UPSERT_TOPIC,
+        [
+            (
+                topic,
+                max(events - topic_rows.get(topic, 0), 0),
+                duplicates,
+                first_seen,
+                last_seen,
+            )
+            for topic, (events, duplicates, first_seen, last_seen) in (
+                source_topics.items()
+            )
+            if duplicates or events > topic_rows.get(topic, 0)
+        ],
+    )
+    first.execute(
+        "UPDATE stats SET received = received + ?, "
+        "unique_processed = unique_processed + ?, "
+        "duplicate_dropped = duplicate_dropped + ? WHERE id = 1",
+        (
+            compacted + max(received - total_rows - compacted, dropped),
+            compacted,
+            dropped,
+        ),
+    )
+    first.commit()
+    for conn in targets:
+        conn.close()
+
+    if total_rows > unique:
+        logger.warning(
+            f"Source unique_processed ({unique}) is below stored rows "
+            f"({total_rows}); target stats use the stored rows"
+        )
+
+    if remove_source:
+        for path in source_paths:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+        logger.info(f"Removed {len(source_paths)} source file(s)")
+
+    return {"rows": copied, "fingerprints": fingerprints, "partitions": partition_rows}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Entry point command line.
+
+    Args:
+        argv: Argumen command line (default sys.argv)
+
+    Returns:
+        Exit code
+    """
+    parser = argparse.ArgumentParser(
+        description="Reshard dedup store ke jumlah partisi baru (offline)"
+    )
+    parser.add_argument("--db-path", default=Config.DB_PATH, help="DB_PATH sumber")
+    parser.add_argument(
+        "--from",
+        dest="source",
+        type=int,
+        default=Config.DB_PARTITIONS,
+        help="Jumlah partisi sumber (default DB_PARTITIONS)",
+    )
+    parser.add_argument(
+        "--to", dest="target", type=int, required=True, help="Jumlah partisi tujuan"
+    )
+    parser.add_argument(
+        "--output", default=None, help="DB_PATH tujuan (default sama dengan sumber)"
+    )
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument(
+        "--remove-source",
+        action="store_true",
+        help="Hapus file sumber setelah reshard berhasil",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=Config.get_log_level(), format=Config.LOG_FORMAT)
+    try:
+        summary = reshard(
+            args.db_path,
+            args.source,
+            args.target,
+            output=args.output,
+            batch_size=args.batch_size,
+            remove_source=args.remove_source,
+        )
+    except (OSError, ValueError) as e:
+        logger.error(f"Reshard failed: {str(e)}")
+        return 1
+
+    print(
+        f"Resharded {summary['rows']} event(s) and {summary['fingerprints']} "
+        f"compacted key(s) from {args.source} to {args.target} partition(s): "
+        f"{summary['partitions']}"
+    )
+    if not args.remove_source and (args.output or args.db_path) == args.db_path:
+        print("Source files left in place; remove them before starting the app")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+import json
+from typing import Dict, Optional, Tuple
+
+
+class RetentionPolicy:
+    """
+    Kebijakan retensi processed_events.
+
+    Dua batas waktu (detik, 0 = selamanya):
+    - payload_ttl: setelah ini baris lengkap (payload, source, dst.) dihapus
+      dan hanya fingerprint key yang disimpan
+    - dedup_window: selama ini key tetap dikenali sebagai duplikat;
+      setelahnya fingerprint juga dihapus dan event yang sama akan
+      diproses ulang jika dikirim lagi
+
+    dedup_window hanya berlaku untuk key yang sudah di-compact: dengan
+    payload_ttl 0 baris lengkap (dan key-nya) disimpan selamanya, berapa pun
+    dedup_window-nya. Nilai global bisa di-override per topic.
+    """
+
+    def __init__(
+        self,
+        payload_ttl: float = 0,
+        dedup_window: float = 0,
+        topic_policies: Optional[Dict[str, Dict[str, float]]] = None,
+    ):
+        """
+        Inisialisasi retention policy.
+
+        Args:
+            payload_ttl: TTL payload global dalam detik (0 = selamanya)
+            dedup_window: Dedup window global dalam detik (0 = selamanya)
+            topic_policies: Override per topic, contoh
+                {"audit": {"payload_ttl": 0, "dedup_window": 0}}
+
+        Raises:
+            ValueError: Jika ada nilai negatif atau key override tidak dikenal
+        """
+        self.payload_ttl = payload_ttl
+        self.dedup_window = dedup_window
+        self.topic_policies: Dict[str, Tuple[float, float]] = {}
+
+        for topic, policy in (topic_policies or {}).items():
+            unknown = set(policy) - {"payload_ttl", "dedup_window"}
+            if unknown:
+                raise ValueError(
+                    f"Unknown retention key(s) for topic {topic}: "
+                    f"{', '.join(sorted(unknown))}"
+                )
+            self.topic_policies[topic] = (
+                policy.get("payload_ttl", payload_ttl),
+                policy.get("dedup_window", dedup_window),
+            )
+
+        values = [payload_ttl, dedup_window]
+        for ttl, window in self.topic_policies.values():
+            values.extend((ttl, window))
+        if any(value < 0 for value in values):
+            raise ValueError("Retention TTL tidak boleh negatif")
+
+    @classmethod
+    def from_config(
+        cls, payload_ttl: float, dedup_window: float, topic_policies_json: str
+    ) -> "RetentionPolicy":
+        """
+        Buat policy dari nilai Config (override per topic dalam JSON).
+
+        Args:
+            payload_ttl: RETENTION_PAYLOAD_TTL
+            dedup_window: RETENTION_DEDUP_WINDOW
+            topic_policies_json: RETENTION_TOPIC_POLICIES
+
+        Returns:
+            RetentionPolicy
+
+        Raises:
+            ValueError: Jika JSON tidak valid
+        """
+        try:
+            topic_policies = json.loads(topic_policies_json or "{}")
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid RETENTION_TOPIC_POLICIES: {str(e)}") from e
+        return cls(payload_ttl, dedup_window, topic_policies)
+
+    def for_topic(self, topic: Optional[str]) -> Tuple[float, float]:
+        """
+        Get (payload_ttl, dedup_window) untuk satu topic.
+
+        Args:
+            topic: Nama topic, atau None untuk policy global
+
+        Returns:
+            Tuple (payload_ttl, dedup_window) dalam detik
+        """
+        if topic is not None and topic in self.topic_policies:
+            return self.topic_policies[topic]
+        return self.payload_ttl, self.dedup_window
+
+    @property
+    def enabled(self) -> bool:
+        """
+        True jika payload_ttl global atau salah satu override topic bukan 0,
+        yaitu ada baris yang akan di-compact (dedup_window saja tidak cukup).
+        """
+        return any(
+            ttl for ttl, _ in [self.for_topic(None), *self.topic_policies.values()]
+        )
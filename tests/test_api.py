@@ -1,6 +1,8 @@
 import pytest
 import asyncio
+import logging
 import os
+import sqlite3
 import sys
 from pathlib import Path
 from httpx import AsyncClient
@@ -55,6 +57,8 @@ async def test_health_endpoint(client):
     assert "queue_size" in data
     assert "timestamp" in data
     assert isinstance(data["uptime_seconds"], (int, float))
+    assert data["durability"]["profile"] in ("strict", "balanced", "fast")
+    assert data["durability"]["journal_mode"] in ("delete", "wal")
 
 
 @pytest.mark.asyncio
@@ -312,6 +316,15 @@ async def test_get_stats(client):
     assert data["duplicate_dropped"] >= 0
     assert data["uptime"] >= 0
 
+    # Bloom filter dan kompresi payload nonaktif secara default
+    assert data["bloom_filter"] is None
+    assert data["payload_compression"] is None
+    assert data["recent_cache"]["capacity"] > 0
+    assert len(data["workers"]) >= 1
+    assert {"worker", "queue_depth", "processed", "throughput"} <= set(
+        data["workers"][0]
+    )
+
 
 @pytest.mark.asyncio
 async def test_stats_consistency(client):
@@ -358,10 +371,15 @@ async def test_stats_consistency(client):
 
 
 @pytest.mark.asyncio
-async def test_event_schema_validation(client):
+@pytest.mark.parametrize("validation_mode", ["strict", "fast"])
+async def test_event_schema_validation(client, monkeypatch, validation_mode):
     """
-    Test event schema validation dengan berbagai invalid inputs.
+    Test event schema validation dengan berbagai invalid inputs,
+    untuk validasi pydantic maupun fast path.
     """
+    import main
+
+    monkeypatch.setattr(main.Config, "VALIDATION_MODE", validation_mode)
     # Test empty topic
     invalid_events = [
         {
@@ -395,6 +413,21 @@ async def test_event_schema_validation(client):
             f"Should reject invalid event: {invalid_event}"
         )
 
+    response = await client.post(
+        "/publish", content=b"{not json", headers={"content-type": "application/json"}
+    )
+    assert response.status_code == 422
+
+    valid = {
+        "topic": "test.validation",
+        "event_id": f"evt-valid-{validation_mode}",
+        "timestamp": "2025-10-24T10:00:00Z",
+        "source": "test",
+    }
+    response = await client.post("/publish", json={"events": [valid]})
+    assert response.status_code == 200
+    assert response.json()["accepted"] == 1
+
 
 @pytest.mark.asyncio
 async def test_large_batch_performance(client):
@@ -437,3 +470,630 @@ async def test_large_batch_performance(client):
 
     # Should have processed all events
     assert stats["unique_processed"] >= 1000
+
+
+@pytest.mark.asyncio
+async def test_publish_load_shedding(monkeypatch, tmp_path):
+    """
+    Test admission control: queue penuh -> 503 + Retry-After,
+    mode partial -> sebagian batch diterima.
+    """
+    import main
+    from ingest_queue import IngestQueue
+
+    # Event yang diterima tidak pernah diproses (received > unique +
+    # duplicate), jadi jangan memakai database bersama test lain
+    monkeypatch.setattr(main.Config, "DB_PATH", str(tmp_path / "shedding.db"))
+
+    def make_events(prefix, count):
+        return {
+            "events": [
+                {
+                    "topic": "test.shedding",
+                    "event_id": f"{prefix}-{i}",
+                    "timestamp": "2025-10-24T10:00:00Z",
+                    "source": "test-client",
+                    "payload": {},
+                }
+                for i in range(count)
+            ]
+        }
+
+    async with lifespan(app):
+        # Queue kecil yang tidak dikonsumsi untuk mensimulasikan consumer
+        # tertinggal; queue asli dikembalikan sebelum shutdown (drain)
+        consumed_queue = main.event_queue
+        main.event_queue = IngestQueue(maxsize=4, high_watermark=4, low_watermark=2)
+        try:
+            async with AsyncClient(app=app, base_url="http://test") as client:
+                monkeypatch.setattr(main.Config, "ADMISSION_MODE", "reject")
+                response = await client.post(
+                    "/publish", json=make_events("evt-shed-a", 3)
+                )
+                assert response.status_code == 200
+                assert response.json()["accepted"] == 3
+
+                response = await client.post(
+                    "/publish", json=make_events("evt-shed-b", 3)
+                )
+                assert response.status_code == 503
+                assert int(response.headers["Retry-After"]) >= 1
+
+                monkeypatch.setattr(main.Config, "ADMISSION_MODE", "partial")
+                main.event_queue.shedding = False
+                response = await client.post(
+                    "/publish", json=make_events("evt-shed-c", 3)
+                )
+                assert response.status_code == 200
+                data = response.json()
+                assert data["status"] == "partial"
+                assert data["received"] == 3
+                assert data["accepted"] == 1
+                assert "Retry-After" in response.headers
+        finally:
+            main.event_queue = consumed_queue
+
+
+@pytest.mark.asyncio
+async def test_unknown_admission_mode_rejected(monkeypatch):
+    """
+    Test ADMISSION_MODE yang tidak dikenal ditolak saat startup.
+    """
+    import main
+
+    monkeypatch.setattr(main.Config, "ADMISSION_MODE", "drop")
+    with pytest.raises(ValueError, match="ADMISSION_MODE"):
+        async with lifespan(app):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_get_events_pagination(client):
+    """
+    Test pagination GET /events dengan limit dan cursor.
+    """
+    event_data = {
+        "events": [
+            {
+                "topic": "test.page",
+                "event_id": f"evt-page-{i:03d}",
+                "timestamp": "2025-10-24T10:00:00Z",
+                "source": "test-client",
+                "payload": {"index": i},
+            }
+            for i in range(5)
+        ]
+    }
+    await client.post("/publish", json=event_data)
+    await asyncio.sleep(0.5)
+
+    response = await client.get("/events?topic=test.page&limit=2")
+    assert response.status_code == 200
+    first = response.json()
+    assert first["total"] == 2
+    assert first["next_cursor"] is not None
+
+    response = await client.get(
+        f"/events?topic=test.page&limit=10&cursor={first['next_cursor']}"
+    )
+    rest = response.json()
+    ids = [e["event_id"] for e in first["events"] + rest["events"]]
+    assert len(ids) == len(set(ids)) == 5
+    assert rest["next_cursor"] is None
+
+    response = await client.get("/events?cursor=not-a-cursor")
+    assert response.status_code == 400
+    response = await client.get("/events?limit=0")
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_get_events_time_range(client):
+    """
+    Test filter from/to GET /events pada timestamp event (dinormalisasi ke
+    UTC), diurutkan berdasarkan timestamp event.
+    """
+    event_data = {
+        "events": [
+            {
+                "topic": "test.range",
+                "event_id": f"evt-range-{i:03d}",
+                # Jam lokal +07:00: 17:00 + i menit = 10:00 + i menit UTC
+                "timestamp": f"2025-10-24T17:{i:02d}:00+07:00",
+                "source": "test-client",
+                "payload": {"index": i},
+            }
+            for i in reversed(range(6))
+        ]
+    }
+    await client.post("/publish", json=event_data)
+    await asyncio.sleep(0.5)
+
+    response = await client.get(
+        "/events",
+        params={
+            "topic": "test.range",
+            "from": "2025-10-24T10:01:00Z",
+            "to": "2025-10-24T10:04:00Z",
+            "limit": 2,
+        },
+    )
+    assert response.status_code == 200
+    first = response.json()
+    assert [(e["event_id"], e["timestamp"]) for e in first["events"]] == [
+        ("evt-range-003", "2025-10-24T10:03:00.000000Z"),
+        ("evt-range-002", "2025-10-24T10:02:00.000000Z"),
+    ]
+
+    response = await client.get(
+        "/events",
+        params={
+            "topic": "test.range",
+            "from": "2025-10-24T10:01:00Z",
+            "to": "2025-10-24T10:04:00Z",
+            "cursor": first["next_cursor"],
+        },
+    )
+    rest = response.json()
+    assert [e["event_id"] for e in rest["events"]] == ["evt-range-001"]
+    assert rest["next_cursor"] is None
+
+    response = await client.get("/events?from=not-a-time")
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_stream_events_ndjson(client):
+    """
+    Test export NDJSON GET /events/stream.
+    """
+    import json
+
+    event_data = {
+        "events": [
+            {
+                "topic": "test.stream",
+                "event_id": f"evt-stream-{i:03d}",
+                "timestamp": "2025-10-24T10:00:00Z",
+                "source": "test-client",
+                "payload": {"index": i, "nested": {"ok": True}},
+            }
+            for i in range(3)
+        ]
+    }
+    await client.post("/publish", json=event_data)
+    await asyncio.sleep(0.5)
+
+    response = await client.get("/events/stream?topic=test.stream")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["event_id"] for line in lines] == [
+        f"evt-stream-{i:03d}" for i in range(3)
+    ]
+    assert lines[0]["payload"] == {"index": 0, "nested": {"ok": True}}
+    assert lines[0]["timestamp"] == "2025-10-24T10:00:00.000000Z"
+
+    response = await client.get("/events/stream?since=not-a-time")
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_publish_payload_preserved_exactly(client):
+    """
+    Test payload yang tidak didukung backend JSON cepat (integer di luar
+    64-bit, NaN/Infinity, surrogate tunggal) diterima dan dikembalikan
+    GET /events apa adanya, sama seperti stdlib json.
+    """
+    import json
+    import math
+
+    body = (
+        '{"events":[{"topic":"test.exact","event_id":"evt-exact-001",'
+        '"timestamp":"2025-10-24T10:00:00Z","source":"test-client",'
+        '"payload":{"big":123456789012345678901234567890,'
+        '"neg":-98765432109876543210987654321,"nan":NaN,"inf":-Infinity,'
+        '"text":"\\ud800 andr\\u00e9"}}]}'
+    )
+    response = await client.post(
+        "/publish", content=body, headers={"content-type": "application/json"}
+    )
+    assert response.status_code == 200
+    await asyncio.sleep(0.5)
+
+    response = await client.get("/events?topic=test.exact")
+    assert response.status_code == 200
+    payload = json.loads(response.text)["events"][0]["payload"]
+    assert payload["big"] == 123456789012345678901234567890
+    assert payload["neg"] == -98765432109876543210987654321
+    assert math.isnan(payload["nan"])
+    assert payload["inf"] == float("-inf")
+    assert payload["text"] == "\ud800 andré"
+
+
+@pytest.mark.asyncio
+async def test_get_topics(client):
+    """
+    Test GET /topics mengembalikan breakdown per topic.
+    """
+    event = {
+        "topic": "test.topics",
+        "event_id": "evt-topics-001",
+        "timestamp": "2025-10-24T10:00:00Z",
+        "source": "test-client",
+        "payload": {},
+    }
+    await client.post("/publish", json={"events": [event, event]})
+    await asyncio.sleep(0.5)
+
+    response = await client.get("/topics")
+    assert response.status_code == 200
+
+    data = response.json()
+    assert data["total"] == len(data["topics"])
+    topics = {t["topic"]: t for t in data["topics"]}
+    assert topics["test.topics"]["event_count"] == 1
+    assert topics["test.topics"]["duplicate_count"] >= 1
+
+    stats = (await client.get("/stats")).json()
+    assert stats["topics"] == data["total"]
+
+
+@pytest.mark.asyncio
+async def test_ingest_log_replay_on_startup(monkeypatch, tmp_path):
+    """
+    Test event yang ada di ingest log tapi belum di-checkpoint (crash sebelum
+    tersimpan) di-replay saat start, dan /publish menulis ke ingest log.
+    """
+    import main
+    from ingest_log import IngestLog
+
+    log_dir = str(tmp_path / "ingest_log")
+    log = IngestLog(log_dir)
+    lsns = log.append(
+        [
+            main.encode_log_record(
+                main.event_to_row(
+                    Event(
+                        topic="test.ingest_log",
+                        event_id=f"evt-replay-{i}",
+                        timestamp="2025-10-24T10:00:00Z",
+                        source="test-client",
+                        payload={"index": i},
+                    )
+                )
+            )
+            for i in range(3)
+        ]
+    )
+    await log.commit(lsns[-1])
+    log.close()
+
+    # Event replay tidak pernah dihitung received di database ini, jadi
+    # jangan memakai database bersama test lain
+    monkeypatch.setattr(main.Config, "DB_PATH", str(tmp_path / "replay.db"))
+    monkeypatch.setattr(main.Config, "INGEST_LOG_DIR", log_dir)
+    monkeypatch.setattr(main.Config, "INGEST_LOG_CHECKPOINT_INTERVAL", 0.1)
+    async with lifespan(app):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            event = {
+                "topic": "test.ingest_log",
+                "event_id": "evt-replay-live",
+                "timestamp": "2025-10-24T10:00:00Z",
+                "source": "test-client",
+                "payload": {},
+            }
+            response = await client.post("/publish", json={"events": [event]})
+            assert response.status_code == 200
+            await asyncio.sleep(0.5)
+
+            response = await client.get("/events?topic=test.ingest_log")
+            events = {e["event_id"]: e for e in response.json()["events"]}
+            assert set(events) == {
+                "evt-replay-0",
+                "evt-replay-1",
+                "evt-replay-2",
+                "evt-replay-live",
+            }
+            assert events["evt-replay-2"]["payload"] == {"index": 2}
+
+            stats = (await client.get("/health")).json()["ingest_log"]
+            assert stats["replayed"] == 3
+            assert stats["appended"] == 1
+            assert stats["unacked"] == 0
+            assert stats["checkpoint"] == 4
+
+    # Setelah shutdown bersih tidak ada yang perlu di-replay
+    log = IngestLog(log_dir)
+    assert log.replay() == []
+    log.close()
+
+
+@pytest.mark.asyncio
+async def test_publish_failure_acks_ingest_log(monkeypatch, tmp_path):
+    """
+    Test event yang sudah dicatat di ingest log tapi gagal masuk queue
+    langsung di-ack: checkpoint tetap maju dan event tidak di-replay.
+    """
+    import main
+
+    monkeypatch.setattr(main.Config, "INGEST_LOG_DIR", str(tmp_path / "ingest_log"))
+    monkeypatch.setattr(main.Config, "INGEST_LOG_CHECKPOINT_INTERVAL", 0.1)
+    monkeypatch.setattr(main.Config, "ADMISSION_MODE", "block")
+    events = [
+        {
+            "topic": "test.publish_failure",
+            "event_id": f"evt-{i}",
+            "timestamp": "2025-10-24T10:00:00Z",
+            "source": "test-client",
+            "payload": {},
+        }
+        for i in range(3)
+    ]
+
+    async with lifespan(app):
+
+        async def failing_put_batch(items):
+            raise RuntimeError("queue broken")
+
+        monkeypatch.setattr(main.event_queue, "put_batch", failing_put_batch)
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.post("/publish", json={"events": events})
+            assert response.status_code == 500
+            await asyncio.sleep(0.3)
+
+            ingest_log = (await client.get("/health")).json()["ingest_log"]
+            assert ingest_log["unacked"] == 0
+            assert ingest_log["checkpoint"] == 3
+
+    async with lifespan(app):
+        assert main.ingest_log.stats()["replayed"] == 0
+
+
+@pytest.mark.asyncio
+async def test_graceful_drain_on_shutdown(monkeypatch, tmp_path):
+    """
+    Test shutdown memproses sisa queue sebelum berhenti, /publish ditolak
+    503 selama drain, dan event yang tidak sempat diproses sebelum deadline
+    tetap di ingest log lalu di-replay saat start berikutnya.
+    """
+    import main
+    from ingest_log import IngestLog
+
+    # Consumer lambat: batch kecil dengan interval panjang agar event
+    # masih di queue saat shutdown dimulai
+    monkeypatch.setattr(main.Config, "BATCH_PROCESS_SIZE", 5)
+    monkeypatch.setattr(main.Config, "CONSUMER_WORKERS", 1)
+    events = [
+        {
+            "topic": "test.drain",
+            "event_id": f"evt-drain-{i:03d}",
+            "timestamp": "2025-10-24T10:00:00Z",
+            "source": "test-client",
+            "payload": {},
+        }
+        for i in range(200)
+    ]
+    async with lifespan(app):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.post("/publish", json={"events": events})
+            assert response.status_code == 200
+
+            monkeypatch.setattr(main, "draining", True)
+            response = await client.post("/publish", json={"events": events[:1]})
+            assert response.status_code == 503
+            assert response.headers["Retry-After"] == "1"
+            assert (await client.get("/health")).json()["status"] == "draining"
+            monkeypatch.setattr(main, "draining", False)
+
+    assert main.event_queue.qsize() == 0
+
+    async with lifespan(app):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.get("/events?topic=test.drain&limit=1000")
+            assert len(response.json()["events"]) == 200
+
+    # Deadline 0: sisa queue di-spill ke ingest log
+    monkeypatch.setattr(main.Config, "INGEST_LOG_DIR", str(tmp_path / "ingest_log"))
+    monkeypatch.setattr(main.Config, "SHUTDOWN_DRAIN_TIMEOUT", 0)
+    for event in events:
+        event["topic"] = "test.drain.spill"
+    async with lifespan(app):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.post("/publish", json={"events": events})
+            assert response.status_code == 200
+    assert main.event_queue.qsize() > 0
+
+    # Batch yang sedang ditulis saat deadline diselesaikan dan di-ack, jadi
+    # yang di-replay persis sisa queue
+    log = IngestLog(str(tmp_path / "ingest_log"))
+    assert len(log.replay()) == main.event_queue.qsize()
+    log.close()
+
+    async with lifespan(app):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            await asyncio.sleep(0.5)
+            response = await client.get("/events?topic=test.drain.spill&limit=1000")
+            assert len(response.json()["events"]) == 200
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_retried_then_dead_lettered(monkeypatch, tmp_path, caplog):
+    """
+    Test batch yang gagal disimpan: error sementara di-retry, error permanen
+    ditulis ke dead-letter lalu di-ack sehingga checkpoint ingest log maju,
+    juga saat dead-letter sendiri gagal ditulis.
+    """
+    import json
+    import main
+
+    dead_letter_path = tmp_path / "dead_letter.ndjson"
+    # Event dead-letter terhitung received tapi tidak pernah diproses
+    monkeypatch.setattr(main.Config, "DB_PATH", str(tmp_path / "dead_letter.db"))
+    monkeypatch.setattr(main.Config, "INGEST_LOG_DIR", str(tmp_path / "ingest_log"))
+    monkeypatch.setattr(main.Config, "INGEST_LOG_CHECKPOINT_INTERVAL", 0.1)
+    monkeypatch.setattr(main.Config, "CONSUMER_WORKERS", 1)
+    monkeypatch.setattr(main.Config, "PROCESS_RETRIES", 2)
+    monkeypatch.setattr(main.Config, "PROCESS_RETRY_BACKOFF", 0.01)
+    monkeypatch.setattr(main.Config, "DEAD_LETTER_PATH", str(dead_letter_path))
+
+    def make_events(topic, count):
+        return [
+            {
+                "topic": topic,
+                "event_id": f"evt-{i}",
+                "timestamp": "2025-10-24T10:00:00Z",
+                "source": "test-client",
+                "payload": {"index": i},
+            }
+            for i in range(count)
+        ]
+
+    async with lifespan(app):
+        try_claim = main.dedup_store.try_claim
+        failures = {"left": 1}
+
+        async def flaky_try_claim(events):
+            if failures["left"] > 0:
+                failures["left"] -= 1
+                raise sqlite3.OperationalError("disk I/O error")
+            return await try_claim(events)
+
+        monkeypatch.setattr(main.dedup_store, "try_claim", flaky_try_claim)
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            events = make_events("test.retry", 3)
+            response = await client.post("/publish", json={"events": events})
+            assert response.status_code == 200
+            await asyncio.sleep(0.5)
+
+            response = await client.get("/events?topic=test.retry")
+            assert len(response.json()["events"]) == 3
+            assert not dead_letter_path.exists()
+
+            # Error permanen: setelah retry habis batch masuk dead-letter
+            failures["left"] = 1000
+            events = make_events("test.dead", 2)
+            response = await client.post("/publish", json={"events": events})
+            assert response.status_code == 200
+            await asyncio.sleep(0.5)
+
+            health = (await client.get("/health")).json()
+            assert health["dead_lettered"] == 2
+            assert health["ingest_log"]["unacked"] == 0
+            assert health["ingest_log"]["checkpoint"] == 5
+
+            lines = dead_letter_path.read_text().splitlines()
+            assert [json.loads(line) for line in lines] == [
+                {**event, "timestamp": "2025-10-24T10:00:00.000000Z"}
+                for event in events
+            ]
+
+            # Isi dead-letter bisa di-publish ulang setelah error teratasi
+            failures["left"] = 0
+            response = await client.post(
+                "/publish", json={"events": [json.loads(line) for line in lines]}
+            )
+            assert response.status_code == 200
+            await asyncio.sleep(0.5)
+            response = await client.get("/events?topic=test.dead")
+            assert len(response.json()["events"]) == 2
+
+            # Dead-letter gagal ditulis: event ke log error, LSN tetap di-ack
+            failures["left"] = 1000
+            monkeypatch.setattr(main.Config, "DEAD_LETTER_PATH", str(tmp_path))
+            events = make_events("test.lost", 2)
+            with caplog.at_level(logging.CRITICAL, logger="main"):
+                response = await client.post("/publish", json={"events": events})
+                assert response.status_code == 200
+                await asyncio.sleep(0.5)
+
+            health = (await client.get("/health")).json()
+            assert health["dead_lettered"] == 2
+            assert health["ingest_log"]["unacked"] == 0
+            assert health["ingest_log"]["checkpoint"] == 9
+            [record] = [r for r in caplog.records if r.levelno == logging.CRITICAL]
+            assert record.getMessage().count('"topic":"test.lost"') == 2
+
+
+@pytest.mark.asyncio
+async def test_claim_retry_only_failed_partition(monkeypatch, tmp_path):
+    """
+    Test retry batch di partitioned store hanya meng-claim ulang event di
+    partisi yang gagal: event yang sudah ter-commit tidak menjadi duplikat
+    dan tidak ikut dead-letter.
+    """
+    import main
+    from partitioned_store import partition_for
+
+    store = main.PartitionedDedupStore(db_path=str(tmp_path / "dedup.db"), partitions=3)
+    monkeypatch.setattr(main, "dedup_store", store)
+    monkeypatch.setattr(main.Config, "PROCESS_RETRIES", 2)
+    monkeypatch.setattr(main.Config, "PROCESS_RETRY_BACKOFF", 0.01)
+
+    shard = store.shards[1]
+    try_claim = shard.try_claim
+    failures = {"left": 1}
+
+    async def flaky_try_claim(events):
+        if failures["left"] > 0:
+            failures["left"] -= 1
+            raise sqlite3.OperationalError("disk I/O error")
+        return await try_claim(events)
+
+    monkeypatch.setattr(shard, "try_claim", flaky_try_claim)
+    try:
+        batch = [
+            ("test.partial", f"evt-{i}", 0, "test-client", "{}") for i in range(30)
+        ]
+        assert await main.claim_with_retry(batch) == [True] * 30
+        assert (await store.get_stats())[1:] == (30, 0)
+
+        # Error permanen: hanya event partisi yang gagal belum tersimpan
+        failures["left"] = 1000
+        batch = [
+            ("test.partial", f"evt-{i}", 0, "test-client", "{}")
+            for i in range(30, 60)
+        ]
+        with pytest.raises(main.PartialClaimError) as exc_info:
+            await main.claim_with_retry(batch)
+        results = exc_info.value.results
+        failed = [row for row, is_new in zip(batch, results) if is_new is None]
+        assert failed == [
+            row for row in batch if partition_for(row[0], row[1], 3) == 1
+        ]
+        assert (await store.get_stats())[1:] == (60 - len(failed), 0)
+    finally:
+        store.close()
+
+
+@pytest.mark.asyncio
+async def test_stats_payload_compression(monkeypatch, tmp_path):
+    """
+    Test rasio kompresi payload dilaporkan di /stats saat kompresi aktif.
+    """
+    import main
+
+    monkeypatch.setattr(main.Config, "PAYLOAD_COMPRESSION", "zlib")
+    # Database baru: di database bersama event ini sudah duplikat pada run kedua
+    monkeypatch.setattr(main.Config, "DB_PATH", str(tmp_path / "compression.db"))
+    events = [
+        {
+            "topic": "test.compression",
+            "event_id": f"evt-zlib-{i}",
+            "timestamp": "2025-10-24T10:00:00Z",
+            "source": "test-client",
+            "payload": {"message": "request completed " * 8, "index": i},
+        }
+        for i in range(10)
+    ]
+    async with lifespan(app):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.post("/publish", json={"events": events})
+            assert response.status_code == 200
+            await asyncio.sleep(0.5)
+
+            stats = (await client.get("/stats")).json()["payload_compression"]
+            assert stats["codec"] == "zlib"
+            assert stats["raw_bytes"] > stats["stored_bytes"] > 0
+            assert 0 < stats["ratio"] < 1
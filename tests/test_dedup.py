@@ -1,6 +1,8 @@
 import pytest
 import asyncio
+import json
 import os
+import sqlite3
 import sys
 from pathlib import Path
 
@@ -8,7 +10,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
 from dedup_store import DedupStore
-from models import Event
+from models import Event, parse_timestamp_us
 
 
 @pytest.fixture
@@ -285,3 +287,1065 @@ async def test_concurrent_dedup(dedup_store):
     # All others should fail
     fail_count = sum(1 for r in results if r == False)
     assert fail_count == 9, "Nine concurrent marks should fail"
+
+
+@pytest.mark.asyncio
+async def test_connections_reused_and_released(dedup_store):
+    """
+    Test connection pool.
+    Writer dan reader connection dibuka sekali dan dilepas saat close().
+    """
+    writer = dedup_store._writer
+    readers = list(dedup_store._reader_conns)
+    assert len(readers) == dedup_store.reader_pool_size
+
+    await dedup_store.mark_processed(
+        "topic1", "evt-001", "2025-10-24T10:00:00Z", "source", "{}"
+    )
+    await dedup_store.is_duplicate("topic1", "evt-001")
+    await dedup_store.get_stats()
+
+    # Koneksi yang sama tetap dipakai
+    assert dedup_store._writer is writer
+    assert dedup_store._reader_conns == readers
+
+    dedup_store.close()
+    assert dedup_store._writer is None
+    with pytest.raises(sqlite3.ProgrammingError):
+        readers[0].execute("SELECT 1")
+
+    # close() kedua kali tidak boleh error
+    dedup_store.close()
+
+
+@pytest.mark.asyncio
+async def test_durability_profiles(tmp_path):
+    """
+    Test durability profile diterapkan ke database.
+    """
+    wal_store = DedupStore(db_path=str(tmp_path / "wal.db"), durability="fast")
+    assert wal_store.journal_mode == "wal"
+    with wal_store._reader() as conn:
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 0  # OFF
+        assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+    wal_store.close()
+
+    strict_store = DedupStore(db_path=str(tmp_path / "strict.db"), durability="strict")
+    assert strict_store.journal_mode == "delete"
+    with strict_store._reader() as conn:
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 2  # FULL
+    strict_store.close()
+
+    with pytest.raises(ValueError):
+        DedupStore(db_path=str(tmp_path / "bad.db"), durability="yolo")
+
+
+@pytest.mark.asyncio
+async def test_try_claim_batch(dedup_store):
+    """
+    Test batch insert dalam satu transaksi.
+    Duplikat di dalam batch dan duplikat dari batch sebelumnya harus di-drop.
+    """
+    timestamp = "2025-10-24T10:00:00Z"
+    await dedup_store.mark_processed("topic1", "evt-001", timestamp, "source", "{}")
+
+    results = await dedup_store.try_claim(
+        [
+            ("topic1", "evt-001", timestamp, "source", "{}"),  # sudah ada
+            ("topic1", "evt-002", timestamp, "source", "{}"),
+            ("topic1", "evt-002", timestamp, "source", "{}"),  # duplikat dalam batch
+            ("topic2", "evt-001", timestamp, "source", "{}"),
+        ]
+    )
+    assert results == [False, True, False, True]
+
+    _, unique, dropped = await dedup_store.get_stats()
+    assert unique == 2
+    assert dropped == 2
+
+    assert await dedup_store.try_claim([]) == []
+
+
+@pytest.mark.asyncio
+async def test_topics_catalog_maintained(dedup_store):
+    """
+    Test katalog topics di-update saat event diproses (tanpa scan tabel).
+    """
+    timestamp = "2025-10-24T10:00:00Z"
+    await dedup_store.mark_processed("topic1", "evt-001", timestamp, "source", "{}")
+    await dedup_store.try_claim(
+        [
+            ("topic1", "evt-001", timestamp, "source", "{}"),  # sudah ada
+            ("topic1", "evt-002", timestamp, "source", "{}"),
+            ("topic2", "evt-001", timestamp, "source", "{}"),
+        ]
+    )
+
+    assert await dedup_store.get_unique_topics_count() == 2
+    topics = {t["topic"]: t for t in await dedup_store.get_topics()}
+    assert topics["topic1"]["event_count"] == 2
+    assert topics["topic1"]["duplicate_count"] == 1
+    assert topics["topic2"]["event_count"] == 1
+    assert topics["topic2"]["duplicate_count"] == 0
+    assert topics["topic1"]["first_seen"] <= topics["topic1"]["last_seen"]
+
+    # Katalog dimuat ulang saat restart
+    db_path = dedup_store.db_path
+    dedup_store.close()
+    reopened = DedupStore(db_path=db_path)
+    assert await reopened.get_unique_topics_count() == 2
+    await reopened.clear_all()
+    assert await reopened.get_unique_topics_count() == 0
+    assert await reopened.get_topics() == []
+    reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_runs_off_event_loop(dedup_store, monkeypatch):
+    """
+    Test query SQLite dijalankan di writer/reader thread,
+    bukan di thread event loop.
+    """
+    import threading
+
+    thread_names = []
+    original_write = dedup_store._mark_processed_sync
+    original_read = dedup_store._is_duplicate_sync
+
+    def record_write(*args):
+        thread_names.append(threading.current_thread().name)
+        return original_write(*args)
+
+    def record_read(*args):
+        thread_names.append(threading.current_thread().name)
+        return original_read(*args)
+
+    monkeypatch.setattr(dedup_store, "_mark_processed_sync", record_write)
+    monkeypatch.setattr(dedup_store, "_is_duplicate_sync", record_read)
+
+    await dedup_store.mark_processed(
+        "topic1", "evt-001", "2025-10-24T10:00:00Z", "source", "{}"
+    )
+    dedup_store._recent.clear()  # paksa lookup ke SQLite
+    assert await dedup_store.is_duplicate("topic1", "evt-001") == True
+
+    assert thread_names[0].startswith("dedup-writer")
+    assert thread_names[1].startswith("dedup-reader")
+
+
+@pytest.mark.asyncio
+async def test_bloom_filter_front(tmp_path):
+    """
+    Test Bloom filter di depan is_duplicate.
+    Event baru dijawab filter tanpa query, false positive terhitung, dan
+    filter di-rebuild saat restart.
+    """
+    db_path = str(tmp_path / "bloom.db")
+    dedup_store = DedupStore(db_path=db_path, bloom_filter=True)
+    timestamp = "2025-10-24T10:00:00Z"
+    await dedup_store.mark_processed("topic1", "evt-001", timestamp, "source", "{}")
+    await dedup_store.try_claim(
+        [("topic1", "evt-002", timestamp, "source", "{}")]
+    )
+
+    assert await dedup_store.is_duplicate("topic1", "evt-999") == False
+    assert dedup_store.bloom_skipped_lookups == 1
+    assert await dedup_store.is_duplicate("topic1", "evt-001") == True
+    assert await dedup_store.is_duplicate("topic1", "evt-002") == True
+
+    stats = dedup_store.get_bloom_stats()
+    assert stats["items"] == 2
+    assert stats["memory_bytes"] > 0
+    assert 0 <= stats["false_positive_rate"] < 0.001
+    assert stats["false_positives"] == 0
+
+    # Key di filter yang tidak ada di database: SELECT tetap jalan
+    dedup_store._bloom.add(dedup_store._bloom_key("topic1", "evt-fp"))
+    assert await dedup_store.is_duplicate("topic1", "evt-fp") == False
+    assert dedup_store.get_bloom_stats()["false_positives"] == 1
+    assert dedup_store.get_bloom_stats()["skipped_lookups"] == 1
+
+    # Restart: filter diisi ulang dari tabel
+    dedup_store.close()
+    new_store = DedupStore(db_path=db_path, bloom_filter=True)
+    assert new_store.get_bloom_stats()["items"] == 2
+    assert await new_store.is_duplicate("topic1", "evt-002") == True
+    new_store.close()
+
+    # Default nonaktif, sama dengan BLOOM_FILTER_ENABLED
+    no_bloom = DedupStore(db_path=db_path)
+    assert no_bloom.get_bloom_stats() is None
+    assert await no_bloom.is_duplicate("topic1", "evt-001") == True
+    no_bloom.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("key_mode", ["text", "hash64", "hash128"])
+async def test_bloom_filter_skips_claim_lookups(tmp_path, key_mode):
+    """
+    Test Bloom filter di jalur try_claim setelah compaction: key baru tidak
+    di-SELECT di dedup_keys, key yang sudah di-compact dan retry tetap
+    terdeteksi, dan setiap lookup dihitung tepat sekali.
+    """
+    from retention import RetentionPolicy
+
+    store = DedupStore(
+        db_path=str(tmp_path / "bloom_claim.db"),
+        key_mode=key_mode,
+        bloom_filter=True,
+        recent_cache_size=0,
+        retention=RetentionPolicy(payload_ttl=60, dedup_window=3600),
+    )
+    timestamp = "2025-10-24T10:00:00Z"
+    old = ("topic1", "evt-old", timestamp, "source", "{}")
+    await store.try_claim([old])
+    backdate(store, 120)
+    assert (await store.compact())["compacted"] == 1
+
+    events = [("topic1", f"evt-{i:03d}", timestamp, "source", "{}") for i in range(5)]
+    # events[0] kedua juga belum ada di filter; ON CONFLICT yang menolaknya
+    results = await store.try_claim(events + [events[0], old])
+    assert results == [True] * 5 + [False, False]
+    assert store.get_bloom_stats()["skipped_lookups"] == 6
+
+    assert await store.try_claim(events) == [False] * 5
+    assert store.get_bloom_stats()["skipped_lookups"] == 6
+    assert store.get_bloom_stats()["false_positives"] == 0
+
+    # Filter bilang "mungkin ada" untuk key baru: satu false positive
+    store._bloom.add(store._bloom_key("topic1", "evt-fp"))
+    fp = ("topic1", "evt-fp", timestamp, "source", "{}")
+    assert await store.try_claim([fp]) == [True]
+    stats = store.get_bloom_stats()
+    assert (stats["skipped_lookups"], stats["false_positives"]) == (6, 1)
+    assert (await store.get_stats())[1] == 7
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_recent_cache_rejects_hot_retries(dedup_store, monkeypatch):
+    """
+    Test cache LRU key yang baru diproses.
+    Retry cepat ditolak tanpa menyentuh SQLite.
+    """
+    timestamp = "2025-10-24T10:00:00Z"
+    row = ("topic1", "evt-001", timestamp, "source", "{}")
+    assert await dedup_store.try_claim([row]) == [True]
+
+    def fail(*args):
+        raise AssertionError("SQLite tidak boleh diakses untuk hot retry")
+
+    monkeypatch.setattr(dedup_store, "_is_duplicate_sync", fail)
+    monkeypatch.setattr(dedup_store, "_mark_processed_sync", fail)
+
+    assert await dedup_store.is_duplicate("topic1", "evt-001") == True
+    assert await dedup_store.mark_processed(*row) == False
+
+    stats = dedup_store.get_recent_cache_stats()
+    assert stats["hits"] == 2
+    assert stats["size"] == 1
+
+    # Batch berisi hot retry tetap dihitung sebagai duplikat
+    monkeypatch.undo()
+    results = await dedup_store.try_claim(
+        [row, ("topic1", "evt-002", timestamp, "source", "{}")]
+    )
+    assert results == [False, True]
+    _, unique, dropped = await dedup_store.get_stats()
+    assert unique == 2
+    assert dropped == 1
+
+
+def test_recent_cache_eviction_and_ttl():
+    """
+    Test eviction LRU dan TTL RecentKeyCache.
+    """
+    from recent_cache import RecentKeyCache
+
+    cache = RecentKeyCache(capacity=2, ttl=None)
+    cache.add("a")
+    cache.add("b")
+    assert cache.contains("a")  # "a" jadi paling baru
+    cache.add("c")  # evict "b"
+    assert not cache.contains("b")
+    assert cache.contains("a") and cache.contains("c")
+    assert cache.evictions == 1
+
+    expiring = RecentKeyCache(capacity=10, ttl=0.01)
+    expiring.add("a")
+    import time
+
+    time.sleep(0.02)
+    assert not expiring.contains("a")
+    assert expiring.expirations == 1
+
+
+@pytest.mark.asyncio
+async def test_counters_flushed_and_reconciled(dedup_store):
+    """
+    Test counter in-memory di-flush ke tabel stats,
+    dan unique_processed direkonsiliasi dari processed_events setelah crash.
+    """
+    db_path = dedup_store.db_path
+    await dedup_store.increment_received(3)
+
+    # Belum di-flush: tabel stats masih 0, tapi get_stats membaca memori
+    with dedup_store._reader() as conn:
+        assert conn.execute("SELECT received FROM stats").fetchone()[0] == 0
+    assert (await dedup_store.get_stats())[0] == 3
+
+    await dedup_store.flush_stats()
+    with dedup_store._reader() as conn:
+        assert conn.execute("SELECT received FROM stats").fetchone()[0] == 3
+
+    # Batch boundary ikut menulis delta yang tertunda
+    await dedup_store.increment_received(2)
+    await dedup_store.try_claim(
+        [
+            ("topic1", "evt-001", "2025-10-24T10:00:00Z", "source", "{}"),
+            ("topic1", "evt-002", "2025-10-24T10:00:00Z", "source", "{}"),
+        ]
+    )
+    with dedup_store._reader() as conn:
+        row = conn.execute(
+            "SELECT received, unique_processed, duplicate_dropped FROM stats"
+        ).fetchone()
+    assert row == (5, 2, 0)
+
+    # Simulasi crash: event tersimpan tapi counter tidak sempat di-flush
+    await dedup_store.mark_processed(
+        "topic1", "evt-003", "2025-10-24T10:00:00Z", "source", "{}"
+    )
+    dedup_store._take_counter_deltas()
+    dedup_store.close()
+
+    recovered = DedupStore(db_path=db_path)
+    received, unique, dropped = await recovered.get_stats()
+    assert unique == 3
+    assert received >= unique + dropped
+    recovered.close()
+
+
+@pytest.mark.asyncio
+async def test_get_events_pagination(dedup_store):
+    """
+    Test keyset pagination dan filter waktu get_events_page.
+    """
+    rows = [
+        (
+            "topic1" if i % 2 == 0 else "topic2",
+            f"evt-{i:03d}",
+            "2025-10-24T10:00:00Z",
+            "source",
+            "{}",
+        )
+        for i in range(7)
+    ]
+    await dedup_store.try_claim(rows)
+
+    seen = []
+    cursor = None
+    while True:
+        page, cursor = await dedup_store.get_events_page(limit=3, cursor=cursor)
+        assert len(page) <= 3
+        seen.extend(event["event_id"] for event in page)
+        if cursor is None:
+            break
+    # Semua event, terbaru lebih dulu, tanpa duplikasi antar halaman
+    assert seen == [f"evt-{i:03d}" for i in reversed(range(7))]
+
+    page, cursor = await dedup_store.get_events_page(topic="topic1", limit=10)
+    assert [event["event_id"] for event in page] == [
+        "evt-006",
+        "evt-004",
+        "evt-002",
+        "evt-000",
+    ]
+    assert cursor is None
+
+    future, _ = await dedup_store.get_events_page(since="2999-01-01T00:00:00Z")
+    assert future == []
+    past, _ = await dedup_store.get_events_page(until="2999-01-01T00:00:00+07:00")
+    assert len(past) == 7
+
+    with pytest.raises(ValueError):
+        await dedup_store.get_events_page(cursor="abc")
+    with pytest.raises(ValueError):
+        await dedup_store.get_events_page(since="yesterday")
+
+
+@pytest.mark.asyncio
+async def test_get_events_event_time_range(dedup_store):
+    """
+    Test filter waktu event (time_from/time_to): timestamp dengan zona waktu
+    berbeda dinormalisasi ke UTC, halaman diurutkan berdasarkan timestamp
+    event dan dibaca lewat index timestamp.
+    """
+    timestamps = [
+        "2025-10-24T10:00:00Z",
+        "2025-10-24T17:30:00+07:00",  # 10:30 UTC
+        "2025-10-24T11:00:00",  # tanpa zona = UTC
+        "2025-10-24T06:30:00-05:00",  # 11:30 UTC
+        "2025-10-24T12:00:00.000001Z",
+    ]
+    rows = [
+        ("topic1", f"evt-{i}", timestamp, "source", "{}")
+        for i, timestamp in enumerate(timestamps)
+    ]
+    # Urutan insert terbalik: processed_at tidak searah dengan timestamp
+    for row in reversed(rows):
+        await dedup_store.mark_processed(*row)
+
+    seen = []
+    cursor = None
+    while True:
+        page, cursor = await dedup_store.get_events_page(
+            limit=2,
+            cursor=cursor,
+            time_from="2025-10-24T10:30:00Z",
+            time_to="2025-10-24T12:00:00.000001Z",
+        )
+        seen.extend((event["event_id"], event["timestamp"]) for event in page)
+        if cursor is None:
+            break
+    assert seen == [
+        ("evt-3", "2025-10-24T11:30:00.000000Z"),
+        ("evt-2", "2025-10-24T11:00:00.000000Z"),
+        ("evt-1", "2025-10-24T10:30:00.000000Z"),
+    ]
+
+    page, _ = await dedup_store.get_events_page(
+        topic="topic1", time_from="2025-10-24T12:00:00Z"
+    )
+    assert [event["event_id"] for event in page] == ["evt-4"]
+    page, _ = await dedup_store.get_events_page(time_to="2025-10-24T10:30:00Z")
+    assert [event["event_id"] for event in page] == ["evt-0"]
+
+    # Query yang dibangun store: range scan index timestamp, tanpa sort
+    window = dedup_store.normalize_window(time_from="2025-10-24T10:30:00Z")
+    for topic, index in ((None, "idx_timestamp"), ("topic1", "idx_topic_timestamp")):
+        statements = []
+        with dedup_store._reader() as reader:
+            reader.set_trace_callback(statements.append)
+            dedup_store._query_events_sync(reader, topic, 10, (1, 1), window)
+            reader.set_trace_callback(None)
+            plan = " ".join(
+                row[3] for row in reader.execute("EXPLAIN QUERY PLAN " + statements[-1])
+            )
+        assert index in plan and "TEMP B-TREE" not in plan
+
+    with pytest.raises(ValueError):
+        await dedup_store.get_events_page(time_from="kemarin")
+
+
+@pytest.mark.asyncio
+async def test_iter_events_raw_chunks(dedup_store):
+    """
+    Test iterasi event per chunk tanpa decode payload.
+    """
+    rows = [
+        ("topic1", f"evt-{i:03d}", "2025-10-24T10:00:00Z", "source", f'{{"i": {i}}}')
+        for i in range(5)
+    ]
+    await dedup_store.try_claim(rows)
+
+    chunks = [chunk async for chunk in dedup_store.iter_events_raw(chunk_size=2)]
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    flat = [row for chunk in chunks for row in chunk]
+    # Timestamp dikembalikan dalam bentuk tersimpan (epoch mikrodetik UTC)
+    assert flat == [
+        (topic, event_id, parse_timestamp_us(timestamp), source, payload)
+        for topic, event_id, timestamp, source, payload in rows
+    ]
+
+
+@pytest.mark.asyncio
+async def test_schema_migration_from_legacy_db(tmp_path):
+    """
+    Test migration database lama (tanpa tabel schema_migrations).
+    Data tetap ada, index processed_at dibuat, idx_topic_event di-drop,
+    kolom waktu TEXT dikonversi ke epoch mikrodetik UTC.
+    """
+    db_path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE processed_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            topic TEXT NOT NULL,
+            event_id TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            source TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            processed_at TEXT NOT NULL,
+            UNIQUE(topic, event_id)
+        );
+        CREATE INDEX idx_topic_event ON processed_events(topic, event_id);
+        CREATE INDEX idx_topic ON processed_events(topic);
+        CREATE TABLE stats (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            received INTEGER DEFAULT 0,
+            unique_processed INTEGER DEFAULT 0,
+            duplicate_dropped INTEGER DEFAULT 0
+        );
+        INSERT INTO stats VALUES (1, 1, 1, 0);
+        INSERT INTO processed_events
+        (topic, event_id, timestamp, source, payload, processed_at)
+        VALUES ('topic1', 'evt-001', '2025-10-24T10:00:00Z', 'source', '{}',
+                '2025-10-24T10:00:01');
+        -- Baris terbaru sudah dihapus (retention): id 2 tidak boleh dipakai lagi
+        INSERT INTO processed_events
+        (topic, event_id, timestamp, source, payload, processed_at)
+        VALUES ('topic1', 'evt-002', '2025-10-24T10:00:00Z', 'source', '{}',
+                '2025-10-24T10:00:02');
+        DELETE FROM processed_events WHERE event_id = 'evt-002';
+    """)
+    conn.close()
+
+    store = DedupStore(db_path=db_path)
+    from migrations import LATEST_VERSION
+
+    assert store.schema_version == LATEST_VERSION
+    with store._reader() as reader:
+        indexes = {
+            row[0]
+            for row in reader.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index'"
+            )
+        }
+    assert "idx_topic_event" not in indexes
+    assert {"idx_processed_at", "idx_topic_processed_at"} <= indexes
+    assert {"idx_timestamp", "idx_topic_timestamp"} <= indexes
+    with store._reader() as reader:
+        row = reader.execute(
+            "SELECT timestamp, typeof(timestamp), processed_at, typeof(processed_at) "
+            "FROM processed_events"
+        ).fetchone()
+    assert row == (
+        parse_timestamp_us("2025-10-24T10:00:00Z"),
+        "integer",
+        parse_timestamp_us("2025-10-24T10:00:01"),
+        "integer",
+    )
+    [event] = await store.get_events()
+    assert event["timestamp"] == "2025-10-24T10:00:00.000000Z"
+    assert await store.is_duplicate("topic1", "evt-001") == True
+    # Katalog topics di-backfill dari data lama
+    assert await store.get_unique_topics_count() == 1
+    [topic] = await store.get_topics()
+    assert topic["topic"] == "topic1"
+    assert topic["event_count"] == 1
+    assert topic["first_seen"] == "2025-10-24T10:00:01.000000Z"
+
+    # High-water mark AUTOINCREMENT ikut dipindahkan saat tabel dibangun ulang
+    await store.mark_processed("topic1", "evt-003", "2025-10-24T10:00:00Z", "s", "{}")
+    with store._reader() as reader:
+        ids = [row[0] for row in reader.execute("SELECT id FROM processed_events")]
+    assert ids == [1, 3]
+    store.close()
+
+    # Membuka ulang tidak menerapkan migration lagi
+    reopened = DedupStore(db_path=db_path)
+    assert reopened.schema_version == LATEST_VERSION
+    reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_shared_store_across_processes(tmp_path):
+    """
+    Test dua store (mewakili dua proses) pada file database yang sama:
+    dedup benar untuk key yang overlap dan statistik teragregasi.
+    """
+    db_path = str(tmp_path / "shared.db")
+    store_a = DedupStore(db_path=db_path, shared=True)
+    store_b = DedupStore(db_path=db_path, shared=True)
+    assert store_a.journal_mode == "wal"
+    # Bloom filter lokal tidak valid jika proses lain ikut menulis
+    assert store_a.get_bloom_stats() is None
+
+    timestamp = "2025-10-24T10:00:00Z"
+    events = [("topic1", f"evt-{i:03d}", timestamp, "source", "{}") for i in range(50)]
+    await store_a.increment_received(50)
+    await store_b.increment_received(50)
+    results_a, results_b = await asyncio.gather(
+        store_a.try_claim(events),
+        store_b.try_claim(events),
+    )
+    # Setiap event diproses tepat sekali di salah satu proses
+    assert all(a != b for a, b in zip(results_a, results_b))
+
+    # Key yang disimpan proses lain terdeteksi lewat SQLite
+    assert await store_b.is_duplicate("topic1", "evt-000") == True
+
+    for store in (store_a, store_b):
+        await store.flush_stats()
+    assert await store_a.get_stats() == (100, 50, 50)
+    assert await store_b.get_stats() == (100, 50, 50)
+    assert await store_b.get_unique_topics_count() == 1
+
+    store_a.close()
+    store_b.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("key_mode", ["hash64", "hash128"])
+async def test_hash_key_claim_race_across_processes(tmp_path, key_mode):
+    """
+    Test mode hash: proses lain yang meng-claim key yang sama di tengah
+    claim (setelah alokasi id, sebelum INSERT) harus menunggu write lock,
+    sehingga key hanya tersimpan sekali.
+    """
+    import threading
+
+    db_path = str(tmp_path / "race.db")
+    options = dict(shared=True, key_mode=key_mode, recent_cache_size=0)
+    store_a = DedupStore(db_path=db_path, **options)
+    store_b = DedupStore(db_path=db_path, **options)
+    event = ("topic1", "evt-001", "2025-10-24T10:00:00Z", "source", "{}")
+
+    results_b = []
+    racer = threading.Thread(
+        target=lambda: results_b.extend(
+            store_b._with_retry(store_b._try_claim_sync, [event])
+        )
+    )
+    key_hash = store_a.key_hash
+
+    def racing_key_hash(topic, event_id):
+        # Proses B meng-claim key yang sama tepat saat A sedang meng-claim;
+        # tanpa write lock B bisa memakai id baris yang sama dengan A
+        store_a.key_hash = key_hash
+        racer.start()
+        racer.join(timeout=0.5)
+        return key_hash(topic, event_id)
+
+    store_a.key_hash = racing_key_hash
+    assert await store_a.try_claim([event]) == [True]
+    await asyncio.to_thread(racer.join)
+    assert results_b == [False]
+
+    with store_a._reader() as reader:
+        count = reader.execute("SELECT COUNT(*) FROM processed_events").fetchone()[0]
+    assert count == 1
+
+    store_a.close()
+    store_b.close()
+
+
+@pytest.mark.asyncio
+async def test_write_retries_when_locked(dedup_store, monkeypatch):
+    """
+    Test write di-retry dengan backoff saat database terkunci proses lain.
+    """
+    dedup_store.retry_backoff = 0.001
+    attempts = []
+    original = dedup_store._flush_stats_sync
+
+    def flaky_flush(deltas):
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise sqlite3.OperationalError("database is locked")
+        return original(deltas)
+
+    monkeypatch.setattr(dedup_store, "_flush_stats_sync", flaky_flush)
+    await dedup_store.increment_received(1)
+    await dedup_store.flush_stats()
+    assert len(attempts) == 3
+    assert dedup_store.write_retry_count == 2
+
+    # Error selain lock tidak di-retry
+    def broken_flush(deltas):
+        raise sqlite3.OperationalError("no such table: stats")
+
+    monkeypatch.setattr(dedup_store, "_flush_stats_sync", broken_flush)
+    await dedup_store.increment_received(1)
+    with pytest.raises(sqlite3.OperationalError):
+        await dedup_store.flush_stats()
+
+
+def backdate(store, seconds, topic=None):
+    """Geser processed_at event ke masa lalu (simulasi event lama)."""
+    import time
+
+    old = time.time_ns() // 1000 - seconds * 1_000_000
+    sql = "UPDATE processed_events SET processed_at = ?"
+    params = [old]
+    if topic:
+        sql += " WHERE topic = ?"
+        params.append(topic)
+    store._writer.execute(sql, params)
+    store._writer.commit()
+
+
+@pytest.mark.asyncio
+async def test_retention_compacts_payload_to_fingerprint(tmp_path):
+    """
+    Test baris yang melewati payload TTL di-compact menjadi fingerprint:
+    payload hilang, tapi key tetap terdeteksi duplikat selama dedup window,
+    termasuk setelah restart.
+    """
+    from retention import RetentionPolicy
+
+    db_path = str(tmp_path / "retention.db")
+    policy = RetentionPolicy(payload_ttl=60, dedup_window=3600)
+    store = DedupStore(db_path=db_path, retention=policy, retention_chunk_size=4)
+    timestamp = "2025-10-24T10:00:00Z"
+    events = [
+        ("topic1", f"evt-{i:03d}", timestamp, "source", "x" * 4000) for i in range(10)
+    ]
+    await store.try_claim(events)
+    backdate(store, 120)
+
+    result = await store.compact()
+    assert result["compacted"] == 10
+    assert result["vacuumed_pages"] > 0
+    assert await store.get_events() == []
+    assert store.get_retention_stats()["compacted_rows"] == 10
+
+    store._recent.clear()
+    assert await store.is_duplicate("topic1", "evt-003") == True
+    results = await store.try_claim(
+        [events[0], ("topic1", "evt-new", timestamp, "source", "{}")]
+    )
+    assert results == [False, True]
+    store.close()
+
+    reopened = DedupStore(db_path=db_path, retention=policy)
+    assert await reopened.is_duplicate("topic1", "evt-005") == True
+    is_new = await reopened.mark_processed("topic1", "evt-005", timestamp, "s", "{}")
+    assert is_new == False
+    reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_retention_dedup_window_and_topic_override(tmp_path):
+    """
+    Test dedup window habis -> key dilupakan, dan override per topic
+    menyimpan topic tertentu selamanya (payload_ttl 0 tidak menghapus baris
+    meskipun dedup window global diset).
+    """
+    from retention import RetentionPolicy
+
+    policy = RetentionPolicy(
+        payload_ttl=60,
+        dedup_window=300,
+        topic_policies={"audit": {"payload_ttl": 0}},
+    )
+    store = DedupStore(
+        db_path=str(tmp_path / "retention.db"), retention=policy, recent_cache_size=0
+    )
+    timestamp = "2025-10-24T10:00:00Z"
+    await store.try_claim(
+        [
+            ("logs", "evt-old", timestamp, "source", "{}"),
+            ("audit", "evt-old", timestamp, "source", "{}"),
+        ]
+    )
+    backdate(store, 3600)
+    await store.mark_processed("logs", "evt-recent", timestamp, "source", "{}")
+
+    result = await store.compact()
+    # logs/evt-old: payload TTL dan dedup window habis -> dihapus tanpa fingerprint
+    assert result["compacted"] == 1
+    assert await store.is_duplicate("logs", "evt-old") == False
+    # audit disimpan selamanya, logs/evt-recent belum melewati TTL
+    remaining = {(e["topic"], e["event_id"]) for e in await store.get_events()}
+    assert remaining == {("audit", "evt-old"), ("logs", "evt-recent")}
+
+    # Fingerprint yang melewati dedup window dihapus
+    store._writer.execute(
+        "INSERT INTO dedup_keys (fingerprint, expires_at) VALUES (?, 0)",
+        (DedupStore.fingerprint("logs", "evt-expired"),),
+    )
+    store._writer.commit()
+    result = await store.compact()
+    assert result["expired_keys"] == 1
+    store.close()
+
+    with pytest.raises(ValueError):
+        RetentionPolicy(payload_ttl=-1)
+    with pytest.raises(ValueError):
+        RetentionPolicy(topic_policies={"audit": {"ttl": 1}})
+    with pytest.raises(ValueError):
+        RetentionPolicy.from_config(0, 0, "not json")
+    assert not RetentionPolicy().enabled
+    assert not RetentionPolicy(dedup_window=300).enabled
+
+
+@pytest.mark.asyncio
+async def test_key_mode_conversion_preserves_events(tmp_path):
+    """
+    Test database dikonversi antar key mode saat dibuka: id dan isi event
+    tetap sama, dedup tetap jalan, dan key disimpan di event_keys (mode hash)
+    atau UNIQUE(topic, event_id) (mode text), tidak keduanya.
+    """
+    db_path = str(tmp_path / "key_mode.db")
+    timestamp = "2025-10-24T10:00:00Z"
+    store = DedupStore(db_path=db_path)
+    await store.try_claim(
+        [("topic1", f"evt-{i}", timestamp, "source", "{}") for i in range(20)]
+    )
+    before = await store.get_events()
+    store.close()
+
+    for mode in ("hash128", "hash64", "text"):
+        store = DedupStore(db_path=db_path, key_mode=mode)
+        assert await store.get_events() == before
+        event = ("topic1", "evt-7", timestamp, "s", "{}")
+        assert await store.mark_processed(*event) == False
+        event = ("topic1", mode, timestamp, "s", "{}")
+        assert await store.mark_processed(*event) == True
+        assert await store.mark_processed(*event) == False
+
+        conn = store._writer
+        indexes = {
+            row[0]
+            for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' "
+                "AND tbl_name = 'processed_events'"
+            )
+        }
+        assert ("sqlite_autoindex_processed_events_1" in indexes) == (mode == "text")
+        keys = conn.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT row_id) FROM event_keys"
+        ).fetchone()
+        rows = conn.execute("SELECT COUNT(*) FROM processed_events").fetchone()
+        assert keys == ((0, 0) if mode == "text" else (rows[0], rows[0]))
+        before = await store.get_events()
+        store.close()
+
+    assert len(before) == 23
+
+    with pytest.raises(ValueError):
+        DedupStore(db_path=db_path, key_mode="md5")
+
+
+@pytest.mark.asyncio
+async def test_key_table_migration_from_key_hash_column(tmp_path, monkeypatch):
+    """
+    Test migration 8: database mode hash dengan kolom key_hash + index
+    non-unique (layout migration 7) dipindahkan ke event_keys; baris dengan
+    key_hash sama (collision) dicatat di colliding_keys.
+    """
+    from migrations import EPOCH_US_SCHEMAS, EVENT_COLUMNS
+
+    db_path = str(tmp_path / "v7_hash.db")
+    timestamp = "2025-10-24T10:00:00Z"
+    store = DedupStore(db_path=db_path)
+    await store.try_claim(
+        [("topic1", f"evt-{i}", timestamp, "source", "{}") for i in range(3)]
+    )
+    store.close()
+
+    # Bentuk ulang database seperti sebelum migration 8 (hash64), semua
+    # baris dengan key_hash yang sama
+    monkeypatch.setattr(DedupStore, "key_hash", lambda self, topic, event_id: 42)
+    create_table, key_indexes = EPOCH_US_SCHEMAS["hash"]
+    conn = sqlite3.connect(db_path)
+    conn.execute(create_table)
+    conn.executescript(f"""
+        INSERT INTO processed_events_new ({EVENT_COLUMNS}, key_hash)
+        SELECT {EVENT_COLUMNS}, 42 FROM processed_events;
+        DROP TABLE processed_events;
+        ALTER TABLE processed_events_new RENAME TO processed_events;
+        {key_indexes[0]};
+        DROP TABLE event_keys;
+        DROP TABLE colliding_keys;
+        DELETE FROM schema_migrations WHERE version = 8;
+        UPDATE store_meta SET value = 'hash64' WHERE key = 'key_mode';
+    """)
+    conn.commit()
+    conn.close()
+
+    store = DedupStore(db_path=db_path, key_mode="hash64", recent_cache_size=0)
+    conn = store._writer
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(processed_events)")]
+    assert "key_hash" not in columns
+    assert conn.execute("SELECT * FROM event_keys").fetchall() == [(42, 1)]
+    assert conn.execute("SELECT * FROM colliding_keys").fetchall() == [
+        ("topic1", "evt-1", 2),
+        ("topic1", "evt-2", 3),
+    ]
+    for i in range(3):
+        assert await store.is_duplicate("topic1", f"evt-{i}") == True
+    events = [("topic1", f"evt-{i}", timestamp, "source", "{}") for i in range(4)]
+    assert await store.try_claim(events) == [False, False, False, True]
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_key_hash_collision_verified(tmp_path, monkeypatch):
+    """
+    Test collision key_hash tidak dianggap duplikat: baris dengan hash sama
+    diverifikasi topic/event_id-nya. Setelah pemilik fingerprint di-compact,
+    event yang collision menjadi pemilik baru dan tetap terdeteksi duplikat.
+    """
+    from retention import RetentionPolicy
+
+    store = DedupStore(
+        db_path=str(tmp_path / "collide.db"),
+        key_mode="hash64",
+        bloom_filter=False,
+        retention=RetentionPolicy(payload_ttl=60, dedup_window=3600),
+    )
+    monkeypatch.setattr(store, "key_hash", lambda topic, event_id: 42)
+    timestamp = "2025-10-24T10:00:00Z"
+
+    assert await store.mark_processed("topic1", "evt-1", timestamp, "s", "{}") == True
+    results = await store.try_claim(
+        [
+            ("topic1", "evt-2", timestamp, "s", "{}"),
+            ("topic2", "evt-1", timestamp, "s", "{}"),
+            ("topic1", "evt-1", timestamp, "s", "{}"),
+            ("topic1", "evt-2", timestamp, "s", "{}"),
+        ]
+    )
+    assert results == [True, True, False, False]
+    assert store.key_collisions > 0
+
+    store._recent.clear()
+    assert await store.is_duplicate("topic2", "evt-1") == True
+    assert await store.is_duplicate("topic2", "evt-2") == False
+    assert len(await store.get_events()) == 3
+
+    # Pemilik fingerprint (topic1/evt-1) dan topic1/evt-2 di-compact
+    backdate(store, 120, topic="topic1")
+    assert (await store.compact())["compacted"] == 2
+    conn = store._writer
+    [(owner_id,)] = conn.execute("SELECT row_id FROM event_keys").fetchall()
+    owner = conn.execute(
+        "SELECT topic, event_id FROM processed_events WHERE id = ?", (owner_id,)
+    ).fetchone()
+    assert owner == ("topic2", "evt-1")
+    assert conn.execute("SELECT COUNT(*) FROM colliding_keys").fetchone()[0] == 0
+
+    store._recent.clear()
+    assert await store.is_duplicate("topic2", "evt-1") == True
+    assert await store.is_duplicate("topic1", "evt-1") == True
+    results = await store.try_claim(
+        [
+            ("topic2", "evt-1", timestamp, "s", "{}"),
+            ("topic1", "evt-2", timestamp, "s", "{}"),
+            ("topic3", "evt-1", timestamp, "s", "{}"),
+        ]
+    )
+    assert results == [False, False, True]
+    assert [e["topic"] for e in await store.get_events()] == ["topic3", "topic2"]
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_payload_compression_roundtrip(tmp_path):
+    """
+    Test payload dikompresi per baris (zlib + dictionary per topic), baris
+    plain lama tetap terbaca, dan dictionary dimuat ulang setelah restart.
+    """
+    db_path = str(tmp_path / "compressed.db")
+    timestamp = "2025-10-24T10:00:00Z"
+
+    def payload(i):
+        return json.dumps(
+            {"level": "INFO", "message": f"request {i} completed", "status": 200}
+        )
+
+    store = DedupStore(db_path=db_path)
+    await store.mark_processed("logs", "old", timestamp, "s", payload(0))
+    store.close()
+
+    store = DedupStore(
+        db_path=db_path, payload_compression="zlib", payload_dictionary_samples=5
+    )
+    # Duplikat tidak menjadi sample dictionary
+    for _ in range(5):
+        await store.mark_processed("logs", "first", timestamp, "s", payload(99))
+    assert store.codec.stats()["dictionaries"] == 0
+
+    # Sebelum dictionary dibuat: zlib biasa. Dictionary dibuat dari sample
+    # event yang tersimpan setelah batch di-commit, dipakai batch berikutnya
+    events = [("logs", f"evt-{i}", timestamp, "s", payload(i)) for i in range(20)]
+    assert await store.try_claim(events[:10]) == [True] * 10
+    assert store.codec.stats()["dictionaries"] == 1
+    assert await store.try_claim(events[10:]) == [True] * 10
+    await store.mark_processed("short", "evt-1", timestamp, "s", "{}")
+
+    # Duplikat yang di-skip ON CONFLICT tidak masuk statistik kompresi
+    stats = store.codec.stats()
+    assert await store.try_claim(events[:2]) == [False, False]
+    assert store.codec.stats() == stats
+    stored = store._writer.execute(
+        "SELECT sum(length(CAST(payload AS BLOB))) FROM processed_events "
+        "WHERE topic != 'logs' OR event_id != 'old'"
+    ).fetchone()[0]
+    assert stats["stored_bytes"] == stored
+    assert stats["ratio"] < 1
+
+    formats = dict(
+        store._writer.execute(
+            "SELECT event_id, payload_format FROM processed_events WHERE topic = 'logs'"
+        ).fetchall()
+    )
+    assert formats.pop("old") == 0
+    assert formats.pop("first") == 1
+    assert {formats[e[1]] for e in events[:10]} == {1}
+    assert {formats[e[1]] for e in events[10:]} == {3}
+    store.close()
+
+    store = DedupStore(db_path=db_path)
+    expected = {"old": payload(0), "first": payload(99)}
+    expected.update((e[1], e[4]) for e in events)
+    page = await store.get_events(topic="logs", limit=7)
+    assert len(page) == 7
+    assert all(event["payload"] == expected[event["event_id"]] for event in page)
+
+    chunks = store.iter_events_raw(topic="logs", chunk_size=8)
+    exported = [row async for chunk in chunks for row in chunk]
+    assert len(exported) == 22
+    assert all(row[4] == expected[row[1]] for row in exported)
+    store.close()
+
+    lzma_store = DedupStore(
+        db_path=str(tmp_path / "lzma.db"), payload_compression="lzma"
+    )
+    await lzma_store.try_claim(events[:3])
+    assert {e["payload"] for e in await lzma_store.get_events()} == {
+        e[4] for e in events[:3]
+    }
+    lzma_store.close()
+
+    with pytest.raises(ValueError):
+        DedupStore(db_path=db_path, payload_compression="brotli")
+
+
+@pytest.mark.asyncio
+async def test_try_claim_single_statement_per_chunk(dedup_store, monkeypatch):
+    """
+    Test try_claim: satu INSERT ... RETURNING per chunk (tanpa SELECT
+    is_duplicate), duplikat di dalam batch dan antar chunk terdeteksi.
+    """
+    import dedup_store as dedup_store_module
+
+    monkeypatch.setattr(dedup_store_module, "CLAIM_CHUNK_ROWS", 4)
+    dedup_store._recent = None
+    timestamp = "2025-10-24T10:00:00Z"
+    await dedup_store.try_claim([("topic1", "evt-0", timestamp, "s", "{}")])
+
+    statements = []
+    dedup_store._writer.set_trace_callback(statements.append)
+    keys = ["evt-0", "evt-1", "evt-2", "evt-1", "evt-3", "evt-4", "evt-2", "evt-5"]
+    results = await dedup_store.try_claim(
+        [("topic1", key, timestamp, "s", "{}") for key in keys]
+    )
+    dedup_store._writer.set_trace_callback(None)
+
+    assert results == [False, True, True, False, True, True, False, True]
+    event_statements = [sql for sql in statements if "processed_events" in sql]
+    assert len(event_statements) == 2
+    assert all("RETURNING" in sql for sql in event_statements)
+
+    # Single event memakai jalur yang sama, tanpa IntegrityError
+    assert (
+        await dedup_store.mark_processed("topic1", "evt-5", timestamp, "s", "{}")
+        == False
+    )
+    [topic] = await dedup_store.get_topics()
+    assert topic["event_count"] == 6
+    assert topic["duplicate_count"] == 4
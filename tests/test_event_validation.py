@@ -0,0 +1,89 @@
+import pytest
+import sys
+from pathlib import Path
+
+from pydantic import ValidationError
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from event_validation import EventValidationError, validate_publish_body
+from models import PublishRequest, parse_timestamp_us
+
+VALID = {
+    "topic": "user.login",
+    "event_id": "evt-001",
+    "timestamp": "2025-10-24T10:30:00.250Z",
+    "source": "auth-service",
+    "payload": {"user_id": "user123"},
+}
+
+INVALID_EVENTS = [
+    ({**VALID, "topic": "   "}, "topic"),
+    ({**VALID, "event_id": ""}, "event_id"),
+    ({**VALID, "timestamp": "24/10/2025"}, "timestamp"),
+    ({**VALID, "source": 123}, "source"),
+    ({**VALID, "payload": [1, 2]}, "payload"),
+    ({key: value for key, value in VALID.items() if key != "source"}, "source"),
+]
+
+
+def test_timestamp_us_normalized_to_utc():
+    """
+    Test timestamp di-parse ke epoch mikrodetik UTC (tanpa zona = UTC).
+    """
+    expected = parse_timestamp_us("2025-10-24T10:30:00Z")
+    assert parse_timestamp_us("2025-10-24T17:30:00+07:00") == expected
+    assert parse_timestamp_us("2025-10-24T10:30:00") == expected
+    assert parse_timestamp_us("2025-10-24T10:30:00.000001Z") == expected + 1
+    assert parse_timestamp_us("1970-01-01T00:00:00Z") == 0
+
+
+def test_fast_validation_matches_pydantic():
+    """
+    Test validator fast path menerima/menolak input yang sama dengan model
+    pydantic dan menghasilkan field serta timestamp_us yang sama.
+    """
+    no_payload = {key: value for key, value in VALID.items() if key != "payload"}
+    body = {"events": [VALID, no_payload, {**VALID, "extra": 1}]}
+
+    strict = PublishRequest.model_validate(body).events
+    fast = validate_publish_body(body)
+    assert len(strict) == len(fast) == 3
+    for model, event in zip(strict, fast):
+        fields = model.model_dump()
+        assert fields == {name: getattr(event, name) for name in fields}
+        assert model.timestamp_us == event.timestamp_us
+
+    for event, field in INVALID_EVENTS:
+        body = {"events": [VALID, event]}
+        with pytest.raises(ValidationError):
+            PublishRequest.model_validate(body)
+        with pytest.raises(EventValidationError) as exc:
+            validate_publish_body(body)
+        assert [error["loc"] for error in exc.value.errors] == [("events", 1, field)]
+
+    for body in ({}, {"events": "x"}, {"events": ["x"]}, []):
+        with pytest.raises(ValidationError):
+            PublishRequest.model_validate(body)
+        with pytest.raises(EventValidationError):
+            validate_publish_body(body)
+
+
+def test_model_timestamp_parsed_once(monkeypatch):
+    """
+    Test model Event menyimpan hasil parse timestamp dari validator:
+    timestamp_us tidak mem-parse ulang, dan timestamp tetap string aslinya.
+    """
+    import models
+
+    event = PublishRequest.model_validate({"events": [VALID]}).events[0]
+    expected = parse_timestamp_us(VALID["timestamp"])
+
+    def fail(value):
+        raise AssertionError("timestamp di-parse ulang")
+
+    monkeypatch.setattr(models, "parse_timestamp_us", fail)
+    assert event.timestamp_us == expected
+    assert event.timestamp == VALID["timestamp"]
+    assert event.model_dump_json().count(f'"timestamp":"{VALID["timestamp"]}"') == 1
@@ -0,0 +1,127 @@
+import pytest
+import asyncio
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from ingest_queue import IngestQueue
+
+
+@pytest.mark.asyncio
+async def test_batch_enqueued_as_one_unit():
+    """
+    Test batch masuk sebagai satu unit, qsize dihitung dalam event,
+    dan consumer bisa mengambil sebagian batch.
+    """
+    queue = IngestQueue(maxsize=100)
+    await queue.put_batch(list(range(10)))
+    await queue.put_batch(list(range(10, 15)))
+    assert queue.qsize() == 15
+
+    assert await queue.get(4) == [0, 1, 2, 3]
+    assert await queue.get(100) == list(range(4, 15))
+    assert queue.empty()
+
+    queue.task_done(15)
+    await asyncio.wait_for(queue.join(), 1)
+
+
+@pytest.mark.asyncio
+async def test_put_batch_waits_for_room():
+    """
+    Test put_batch menunggu sampai ada ruang untuk seluruh batch.
+    """
+    queue = IngestQueue(maxsize=5)
+    await queue.put_batch([1, 2, 3, 4])
+
+    put_task = asyncio.create_task(queue.put_batch([5, 6]))
+    await asyncio.sleep(0.01)
+    assert not put_task.done()
+
+    assert await queue.get(2) == [1, 2]
+    await asyncio.wait_for(put_task, 1)
+    assert queue.qsize() == 4
+
+    # Batch lebih besar dari maxsize tetap diterima saat queue kosong
+    big = IngestQueue(maxsize=2)
+    await asyncio.wait_for(big.put_batch([1, 2, 3]), 1)
+    assert big.qsize() == 3
+
+
+@pytest.mark.asyncio
+async def test_admission_control_watermarks():
+    """
+    Test try_put_batch: all-or-nothing, partial acceptance,
+    dan histeresis high/low watermark.
+    """
+    queue = IngestQueue(maxsize=10, high_watermark=8, low_watermark=4)
+
+    assert await queue.try_put_batch(list(range(6))) == 6
+    # Tidak muat utuh -> ditolak seluruhnya
+    assert await queue.try_put_batch(list(range(3))) == 0
+    assert queue.shedding
+    assert queue.rejected == 3
+
+    # Masih shedding sampai depth turun ke low watermark
+    await queue.get(1)
+    assert await queue.try_put_batch([1], allow_partial=True) == 0
+
+    await queue.get(1)  # depth 4 == low watermark
+    assert await queue.try_put_batch(list(range(10)), allow_partial=True) == 4
+    assert queue.qsize() == 8
+    assert queue.shedding
+
+    # Batch lebih besar dari high watermark diterima utuh saat queue kosong
+    for allow_partial in (False, True):
+        queue = IngestQueue(maxsize=10, high_watermark=9, low_watermark=7)
+        assert await queue.try_put_batch(list(range(10)), allow_partial) == 10
+        assert queue.shedding
+        assert queue.rejected == 0
+
+
+@pytest.mark.asyncio
+async def test_retry_after_from_drain_rate():
+    """
+    Test Retry-After dihitung dari drain rate.
+    """
+    queue = IngestQueue(maxsize=100, high_watermark=100, low_watermark=0)
+    # Belum ada data drain rate
+    await queue.try_put_batch(list(range(50)))
+    assert queue.retry_after(max_seconds=30) == 30
+
+    await queue.get(10)
+    queue.task_done(10)
+    assert queue.drain_rate() > 0
+    assert 1 <= queue.retry_after(max_seconds=30) <= 30
+
+
+@pytest.mark.asyncio
+async def test_sharded_by_key_preserves_order():
+    """
+    Test event di-shard berdasarkan key: key sama selalu ke shard yang sama
+    dengan urutan terjaga, dan kapasitas dihitung untuk seluruh queue.
+    """
+    queue = IngestQueue(maxsize=100, shards=4, shard_key=lambda e: e[0])
+    events = [(f"topic{i % 5}", i) for i in range(20)]
+    assert await queue.try_put_batch(events) == 20
+    assert queue.qsize() == 20
+
+    seen = {}
+    for shard in range(4):
+        depth = queue.shard_stats()[shard]["queue_depth"]
+        taken = await queue.get(100, shard) if depth else []
+        assert len(taken) == depth
+        for topic, index in taken:
+            assert queue.shard_for((topic, index)) == shard
+            seen.setdefault(topic, []).append(index)
+        queue.task_done(len(taken), shard)
+
+    assert seen == {f"topic{t}": list(range(t, 20, 5)) for t in range(5)}
+    assert queue.empty()
+    assert sum(s["processed"] for s in queue.shard_stats()) == 20
+    await asyncio.wait_for(queue.join(), 1)
+
+    with pytest.raises(ValueError):
+        IngestQueue(maxsize=10, shards=2)
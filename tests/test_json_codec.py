@@ -0,0 +1,71 @@
+import pytest
+import json
+import math
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from json_codec import JsonCodec, available_codecs
+
+
+@pytest.mark.parametrize("name", available_codecs())
+def test_codec_roundtrip_compact(name):
+    """
+    Test setiap backend menghasilkan JSON compact UTF-8 yang sama dan
+    decode kembali ke object semula.
+    """
+    codec = JsonCodec(name)
+    payload = {"user": "andré", "tags": ["a", "b"], "nested": {"n": 1.5, "ok": True}}
+
+    text = codec.dumps(payload)
+    assert text == json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    assert codec.encode(payload) == text.encode("utf-8")
+    assert codec.loads(text) == payload
+    assert codec.loads(text.encode("utf-8")) == payload
+
+    with pytest.raises(json.JSONDecodeError):
+        codec.loads(b"{not json")
+
+
+@pytest.mark.parametrize("name", available_codecs())
+def test_codec_matches_stdlib_outside_fast_path(name):
+    """
+    Test nilai yang tidak didukung backend cepat di-decode dan di-encode
+    persis seperti stdlib: integer di luar 64-bit tetap int (bukan float),
+    NaN/Infinity dan surrogate tunggal diterima dan tidak menjadi null.
+    """
+    codec = JsonCodec(name)
+
+    big = 123456789012345678901234567890
+    text = f'{{"big":{big},"neg":{-big},"edge":{2**64},"id":"{big}"}}'
+    for data in (text, text.encode("utf-8")):
+        decoded = codec.loads(data)
+        assert decoded == {"big": big, "neg": -big, "edge": 2**64, "id": str(big)}
+        assert type(decoded["big"]) is int
+    assert codec.dumps({"big": big}) == f'{{"big":{big}}}'
+
+    special = codec.loads(b'[NaN,Infinity,-Infinity,1e400]')
+    assert math.isnan(special[0])
+    assert special[1:] == [math.inf, -math.inf, math.inf]
+    assert codec.dumps(special) == "[NaN,Infinity,-Infinity,Infinity]"
+    assert codec.dumps({"ok": None}) == '{"ok":null}'
+
+    surrogate = codec.loads(b'{"s":"\\ud800x"}')
+    assert surrogate == {"s": "\ud800x"}
+    encoded = codec.encode(surrogate)
+    assert encoded == b'{"s":"\\ud800x"}'
+    assert codec.loads(encoded) == surrogate
+
+
+def test_codec_selection():
+    """
+    Test auto memilih backend tercepat yang ter-install dan backend yang
+    tidak dikenal ditolak.
+    """
+    assert JsonCodec("auto").name == available_codecs()[0]
+    assert JsonCodec("stdlib").name == "stdlib"
+
+    with pytest.raises(ValueError):
+        JsonCodec("simdjson")
@@ -0,0 +1,276 @@
+import pytest
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from partitioned_store import (
+    PartialClaimError,
+    PartitionedDedupStore,
+    partition_for,
+    partition_paths,
+)
+from reshard import reshard
+from dedup_store import DedupStore, TimeWindow
+
+TIMESTAMP = "2025-10-24T10:00:00Z"
+
+
+def make_events(count, topic="topic1"):
+    return [(topic, f"evt-{i:03d}", TIMESTAMP, "source", "{}") for i in range(count)]
+
+
+@pytest.fixture
+async def partitioned_store(tmp_path):
+    """
+    Fixture partitioned store dengan 3 partisi di direktori sementara.
+    """
+    store = PartitionedDedupStore(db_path=str(tmp_path / "dedup.db"), partitions=3)
+    yield store
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_events_routed_by_stable_hash(partitioned_store, tmp_path):
+    """
+    Test event diarahkan ke partisi berdasarkan hash (topic, event_id),
+    dedup tetap benar, dan statistik dijumlah dari semua partisi.
+    """
+    events = make_events(60)
+    await partitioned_store.increment_received(70)
+    results = await partitioned_store.try_claim(events + events[:10])
+    assert results == [True] * 60 + [False] * 10
+
+    # Setiap partisi hanya berisi key miliknya
+    for index, shard in enumerate(partitioned_store.shards):
+        rows = await shard.query_events(None, None, None, TimeWindow())
+        assert rows
+        assert all(partition_for(r[1], r[2], 3) == index for r in rows)
+
+    assert await partitioned_store.is_duplicate("topic1", "evt-005") == True
+    assert await partitioned_store.is_duplicate("topic1", "evt-999") == False
+    assert await partitioned_store.get_stats() == (70, 60, 10)
+    assert await partitioned_store.get_unique_topics_count() == 1
+
+    [topic] = await partitioned_store.get_topics()
+    assert topic["event_count"] == 60
+    assert topic["duplicate_count"] == 10
+
+    paths = partition_paths(str(tmp_path / "dedup.db"), 3)
+    assert all(os.path.exists(path) for path in paths)
+    assert partition_paths("data/dedup.db", 2) == [
+        "data/dedup.0-of-2.db",
+        "data/dedup.1-of-2.db",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_claim_failure_in_one_partition(partitioned_store, monkeypatch):
+    """
+    Test claim yang gagal di satu partisi: partisi lain tetap ter-commit,
+    PartialClaimError melaporkan event mana yang belum tersimpan, dan retry
+    event tersebut tidak menghitung duplikat maupun received dua kali.
+    """
+    events = make_events(30)
+    await partitioned_store.increment_received(30)
+
+    failing = partitioned_store.shards[1]
+
+    async def failing_try_claim(events):
+        raise RuntimeError("disk I/O error")
+
+    monkeypatch.setattr(failing, "try_claim", failing_try_claim)
+    with pytest.raises(PartialClaimError) as exc_info:
+        await partitioned_store.try_claim(events)
+
+    results = exc_info.value.results
+    pending = [i for i, is_new in enumerate(results) if is_new is None]
+    assert pending == [
+        i for i, event in enumerate(events) if partition_for(event[0], event[1], 3) == 1
+    ]
+    assert all(results[i] for i in range(30) if i not in pending)
+    assert await partitioned_store.get_stats() == (30, 30 - len(pending), 0)
+
+    monkeypatch.undo()
+    retried = await partitioned_store.try_claim([events[i] for i in pending])
+    assert retried == [True] * len(pending)
+    assert await partitioned_store.get_stats() == (30, 30, 0)
+    for shard in partitioned_store.shards:
+        received, unique, duplicate = await shard.get_stats()
+        assert received == unique and duplicate == 0
+
+    [topic] = await partitioned_store.get_topics()
+    assert topic["event_count"] == 30
+    assert topic["duplicate_count"] == 0
+
+
+@pytest.mark.asyncio
+async def test_pagination_merged_across_partitions(partitioned_store):
+    """
+    Test pagination dan export NDJSON di-merge dari semua partisi dengan
+    urutan global yang konsisten, tanpa event hilang atau terduplikasi.
+    """
+    # Beberapa batch agar processed_at berbeda-beda antar batch
+    for start in range(0, 50, 10):
+        await partitioned_store.try_claim(
+            [
+                ("topic1", f"evt-{i:03d}", TIMESTAMP, "source", "{}")
+                for i in range(start, start + 10)
+            ]
+        )
+
+    all_events = await partitioned_store.get_events()
+    assert len(all_events) == 50
+
+    paged = []
+    cursor = None
+    while True:
+        page, cursor = await partitioned_store.get_events_page(limit=7, cursor=cursor)
+        paged.extend(page)
+        if cursor is None:
+            break
+    assert paged == all_events
+
+    # Batch terakhir tampil lebih dulu
+    assert {e["event_id"] for e in paged[:10]} == {
+        f"evt-{i:03d}" for i in range(40, 50)
+    }
+
+    exported = []
+    async for chunk in partitioned_store.iter_events_raw(chunk_size=4):
+        assert len(chunk) <= 4
+        exported.extend(row[1] for row in chunk)
+    assert exported == [e["event_id"] for e in reversed(all_events)]
+
+    # Filter waktu event: merge berdasarkan (timestamp, partisi, id)
+    await partitioned_store.try_claim(
+        [
+            ("topic2", f"evt-{i:03d}", f"2025-10-25T10:{i:02d}:00Z", "source", "{}")
+            for i in range(20)
+        ]
+    )
+    paged = []
+    cursor = None
+    while True:
+        page, cursor = await partitioned_store.get_events_page(
+            limit=3,
+            cursor=cursor,
+            time_from="2025-10-25T10:05:00Z",
+            time_to="2025-10-25T10:15:00Z",
+        )
+        paged.extend(e["event_id"] for e in page)
+        if cursor is None:
+            break
+    assert paged == [f"evt-{i:03d}" for i in reversed(range(5, 15))]
+
+    with pytest.raises(ValueError):
+        await partitioned_store.get_events_page(limit=5, cursor="not-a-cursor")
+
+
+@pytest.mark.asyncio
+async def test_partition_count_mismatch_detected(tmp_path):
+    """
+    Test membuka database dengan jumlah partisi berbeda ditolak.
+    """
+    db_path = str(tmp_path / "dedup.db")
+    DedupStore(db_path=db_path).close()
+
+    with pytest.raises(ValueError, match="reshard"):
+        PartitionedDedupStore(db_path=db_path, partitions=2)
+
+
+@pytest.mark.asyncio
+async def test_reshard_preserves_events_and_stats(tmp_path):
+    """
+    Test reshard offline 1 -> 4 -> 2 partisi: semua event (termasuk payload
+    terkompresi), statistik, dan katalog topics tetap sama.
+    """
+    db_path = str(tmp_path / "dedup.db")
+    compression = dict(payload_compression="zlib", payload_dictionary_samples=2)
+    payload = '{"message": "' + "request completed " * 8 + '"}'
+    store = DedupStore(db_path=db_path, **compression)
+    await store.increment_received(45)
+    await store.try_claim(make_events(30) + make_events(5))
+    await store.try_claim(
+        [event[:4] + (payload,) for event in make_events(5, topic="topic2")]
+    )
+    await store.flush_stats()
+    store.close()
+
+    summary = reshard(db_path, 1, 4, remove_source=True)
+    assert summary["rows"] == 35
+    assert sum(summary["partitions"]) == 35
+    assert not os.path.exists(db_path)
+
+    summary = reshard(db_path, 4, 2, remove_source=True)
+    assert summary["rows"] == 35
+
+    store = PartitionedDedupStore(db_path=db_path, partitions=2, **compression)
+    assert await store.get_stats() == (45, 35, 5)
+    assert await store.is_duplicate("topic2", "evt-004") == True
+    assert len(await store.get_events()) == 35
+    events = await store.get_events(topic="topic2")
+    assert [event["payload"] for event in events] == [payload] * 5
+    topics = {t["topic"]: t for t in await store.get_topics()}
+    assert topics["topic1"]["event_count"] == 30
+    assert topics["topic1"]["duplicate_count"] == 5
+    assert topics["topic2"]["event_count"] == 5
+
+    # Event baru dikompresi di partisi masing-masing, di-decode setelah merge
+    await store.try_claim(
+        [("topic3", f"evt-{i}", TIMESTAMP, "source", payload) for i in range(6)]
+    )
+    page, _ = await store.get_events_page(topic="topic3", limit=4)
+    assert [event["payload"] for event in page] == [payload] * 4
+    stats = store.get_payload_stats()
+    assert stats["codec"] == "zlib"
+    assert stats["raw_bytes"] == 6 * len(payload)
+    assert stats["stored_bytes"] < stats["raw_bytes"]
+    assert stats["ratio"] == round(stats["stored_bytes"] / stats["raw_bytes"], 4)
+    store.close()
+
+    with pytest.raises(FileExistsError):
+        reshard(db_path, 2, 2)
+
+
+@pytest.mark.asyncio
+async def test_reshard_keeps_compacted_keys(tmp_path):
+    """
+    Test reshard setelah retention: key yang sudah di-compact tetap
+    terdeteksi duplikat selama dedup window, dan statistik tetap menghitung
+    event yang payload-nya sudah dihapus.
+    """
+    from retention import RetentionPolicy
+
+    db_path = str(tmp_path / "dedup.db")
+    policy = RetentionPolicy(payload_ttl=60, dedup_window=3600)
+    store = DedupStore(db_path=db_path, retention=policy)
+    await store.increment_received(12)
+    await store.try_claim(make_events(10))
+    # Geser processed_at 2 menit ke belakang: lewat payload TTL, masih dalam window
+    store._writer.execute(
+        "UPDATE processed_events SET processed_at = processed_at - ?",
+        (120 * 1_000_000,),
+    )
+    store._writer.commit()
+    assert (await store.compact())["compacted"] == 10
+    await store.try_claim(make_events(2, topic="topic2"))
+    await store.flush_stats()
+    store.close()
+
+    summary = reshard(db_path, 1, 2, remove_source=True)
+    assert summary["rows"] == 2
+    assert summary["fingerprints"] == 10
+
+    store = PartitionedDedupStore(db_path=db_path, partitions=2, retention=policy)
+    assert await store.get_stats() == (12, 12, 0)
+    topics = {t["topic"]: t for t in await store.get_topics()}
+    assert topics["topic1"]["event_count"] == 10
+    assert topics["topic2"]["event_count"] == 2
+
+    results = await store.try_claim(make_events(11))
+    assert results == [False] * 10 + [True]
+    store.close()